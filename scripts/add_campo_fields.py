@@ -1,7 +1,15 @@
-"""Adiciona quadras de CAMPO nos locais que devem ter"""
+"""
+Adiciona quadras de CAMPO nos locais que devem ter
+
+As quadras tem ID deterministico (local + nome, ver seed_ids.py) e so as que
+faltam sao criadas, num batch: rodar de novo nao duplica nada.
+"""
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+from seed_ids import SeedWriter, adopt_ids, field_id, field_key
+from venue_summaries import refresh_summaries
+
 try:
     firebase_admin.get_app()
 except:
@@ -43,7 +51,8 @@ if response.lower() != 's':
     print("Operacao cancelada.")
     exit()
 
-# Adicionar quadras
+# Adicionar quadras (as que ja existem, com ID novo ou antigo, ficam como estao)
+writer = SeedWriter(db)
 for location_name, num_fields in locations_to_add_campo.items():
     location_id = locations.get(location_name)
     if not location_id:
@@ -52,6 +61,9 @@ for location_name, num_fields in locations_to_add_campo.items():
 
     print(f"\n[PROCESSO] {location_name}:")
 
+    existing_ids = adopt_ids(db.collection('fields').where('locationId', '==', location_id).stream(),
+                             lambda d: field_key(d.get('locationId'), d.get('name')))
+
     for i in range(1, num_fields + 1):
         field_data = {
             'locationId': location_id,
@@ -66,9 +78,21 @@ for location_name, num_fields in locations_to_add_campo.items():
             'createdAt': firestore.SERVER_TIMESTAMP
         }
 
-        doc_ref = db.collection('fields').add(field_data)
-        field_id = doc_ref[1].id
-        print(f"  [OK] Campo {i} criado (ID: {field_id[:20]}...)")
+        name = field_data['name']
+        doc_id = existing_ids.get(field_key(location_id, name)) or field_id(location_id, name)
+        writer.put(db.collection('fields').document(doc_id), field_data)
+
+writer.flush()
+for path in writer.created:
+    print(f"  [OK] Quadra criada (ID: {path.split('/')[-1]})")
+for path in writer.unchanged:
+    print(f"  [=] Ja existe (ID: {path.split('/')[-1]})")
+
+# Resumo das quadras dos locais que ganharam quadra (location_summaries)
+if writer.created:
+    for location_id in sorted({locations[name] for name in locations_to_add_campo if locations.get(name)}):
+        print(f"\nAtualizando resumo do local {location_id}...")
+        refresh_summaries(location_id=location_id)
 
 print("\n" + "="*60)
 print("CONCLUIDO!")
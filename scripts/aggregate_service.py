@@ -0,0 +1,258 @@
+"""
+Servico de agregados em memoria, mantidos por listeners do Firestore
+
+Quadras por local e por tipo (check_field_types.py), jogos por status e
+usuarios por role (analyze_simple.py) eram recalculados com varreduras
+completas a cada consulta. Aqui um processo de longa duracao assina as
+colecoes com on_snapshot: o primeiro snapshot de cada listener e a unica
+varredura (carga inicial) e depois so chegam as mudancas.
+
+Cada documento guarda so as chaves que interessam (ex.: tipo e local da
+quadra); um evento ADDED/MODIFIED/REMOVED desconta a chave antiga e soma a
+nova, sem reler nada. A cada lote de eventos a resposta de cada agregado e
+montada de novo (JSON pronto), entao uma leitura e so uma busca num dict.
+
+Endpoint local (somente 127.0.0.1):
+    GET /aggregates            todos os agregados
+    GET /aggregates/<nome>     um agregado (ex.: fields_by_type)
+    GET /health                carga inicial concluida?, eventos, ultima mudanca
+
+Uso:
+    python scripts/aggregate_service.py                         # servidor na porta 8765
+    python scripts/aggregate_service.py --port 9000
+    python scripts/aggregate_service.py --get fields_by_type    # consulta o servidor
+    python scripts/aggregate_service.py --once                  # carga inicial, imprime e sai
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+try:
+    firebase_admin.get_app()
+except:
+    cred = credentials.Certificate('scripts/serviceAccountKey.json')
+    firebase_admin.initialize_app(cred)
+
+db = firestore.client()
+
+DEFAULT_PORT = 8765
+BOOTSTRAP_TIMEOUT_SECONDS = 120
+
+
+def field_location(data):
+    # populate_real_data grava location_id; add_campo_fields, locationId
+    return data.get('location_id') or data.get('locationId') or 'NO_LOCATION'
+
+
+# Agregado -> (colecao, chave do documento); campo null vira UNKNOWN (as chaves sao ordenadas)
+GROUPS = {
+    'fields_by_type': ('fields', lambda d: d.get('type') or 'UNKNOWN'),
+    'fields_by_location': ('fields', field_location),
+    'games_by_status': ('games', lambda d: d.get('status') or 'UNKNOWN'),
+    'users_by_role': ('users', lambda d: d.get('role') or 'UNKNOWN'),
+}
+
+COLLECTIONS = ['locations', 'fields', 'games', 'users']
+
+
+class AggregateStore:
+    """Contagens por grupo atualizadas por eventos; leituras devolvem JSON ja montado"""
+
+    def __init__(self, groups=GROUPS, collections=COLLECTIONS):
+        self._groups = groups
+        self._lock = threading.Lock()
+        # colecao -> {doc_id: {grupo: chave}} (so o necessario para descontar o valor antigo)
+        self._docs = {collection: {} for collection in collections}
+        self._names = {}  # locations: id -> nome
+        self._counts = {name: Counter() for name in groups}
+        self.ready = {collection: threading.Event() for collection in collections}
+        self.events = 0
+        self.updated_at = None
+        self._responses = {}
+        self._publish()
+
+    def apply(self, collection, changes):
+        """changes: [(doc_id, dados ou None se removido)]"""
+        groups = [(name, key) for name, (coll, key) in self._groups.items() if coll == collection]
+        with self._lock:
+            docs = self._docs[collection]
+            for doc_id, data in changes:
+                old = docs.pop(doc_id, None)
+                if old is not None:
+                    for name, value in old.items():
+                        self._counts[name][value] -= 1
+                        if not self._counts[name][value]:
+                            del self._counts[name][value]
+                if data is None:
+                    self._names.pop(doc_id, None)
+                    continue
+                keys = {name: key(data) for name, key in groups}
+                for name, value in keys.items():
+                    self._counts[name][value] += 1
+                docs[doc_id] = keys
+                if collection == 'locations':
+                    self._names[doc_id] = data.get('name') or 'SEM NOME'
+            self.events += len(changes)
+            self.updated_at = datetime.now().isoformat(timespec='seconds')
+            self._publish()
+
+    def _publish(self):
+        # Monta todas as respostas uma vez por lote de eventos (chamado com o lock)
+        fields_by_location = self._counts['fields_by_location']
+        locations = self._docs['locations']
+        with_fields = sum(1 for loc_id in locations if fields_by_location.get(loc_id))
+        aggregates = {
+            'totals': {collection: len(docs) for collection, docs in self._docs.items()},
+            'fields_by_type': dict(sorted(self._counts['fields_by_type'].items())),
+            'fields_by_location': {
+                loc_id: {'name': self._names.get(loc_id, 'LOCAL NAO ENCONTRADO'), 'fields': count}
+                for loc_id, count in sorted(fields_by_location.items())
+            },
+            'locations_with_fields': {'with_fields': with_fields, 'without_fields': len(locations) - with_fields},
+            'games_by_status': dict(sorted(self._counts['games_by_status'].items())),
+            'users_by_role': dict(sorted(self._counts['users_by_role'].items())),
+        }
+        responses = {name: json.dumps(value, ensure_ascii=False).encode('utf-8')
+                     for name, value in aggregates.items()}
+        responses[None] = json.dumps(aggregates, ensure_ascii=False).encode('utf-8')
+        self._responses = responses
+
+    def read(self, name=None):
+        """JSON (bytes) de um agregado, ou de todos; None se o nome nao existe"""
+        return self._responses.get(name)
+
+    def health(self):
+        return {
+            'ready': all(event.is_set() for event in self.ready.values()),
+            'collections': {collection: event.is_set() for collection, event in self.ready.items()},
+            'events': self.events,
+            'updated_at': self.updated_at,
+        }
+
+    def listener(self, collection):
+        """Callback de on_snapshot para uma colecao"""
+        def on_snapshot(docs, changes, read_time):
+            self.apply(collection, [
+                (change.document.id, None if change.type.name == 'REMOVED' else change.document.to_dict())
+                for change in changes
+            ])
+            self.ready[collection].set()
+        return on_snapshot
+
+
+def subscribe(store):
+    """Um listener por colecao; o primeiro snapshot de cada um e a carga inicial"""
+    return [db.collection(collection).on_snapshot(store.listener(collection)) for collection in store.ready]
+
+
+def wait_ready(store, timeout=BOOTSTRAP_TIMEOUT_SECONDS):
+    deadline = time.monotonic() + timeout
+    for collection, event in store.ready.items():
+        if not event.wait(max(0, deadline - time.monotonic())):
+            print(f"ERRO: carga inicial de '{collection}' nao terminou em {timeout}s")
+            exit(1)
+
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.rstrip('/')
+            if path == '/health':
+                body = json.dumps(store.health()).encode('utf-8')
+            elif path == '/aggregates':
+                body = store.read()
+            elif path.startswith('/aggregates/'):
+                body = store.read(path[len('/aggregates/'):])
+            else:
+                body = None
+            if body is None:
+                self.send_error(404, 'agregado desconhecido')
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port):
+    store = AggregateStore()
+    watches = subscribe(store)
+    print("Carregando colecoes (primeiro snapshot de cada listener)...")
+    started = time.monotonic()
+    wait_ready(store)
+    totals = json.loads(store.read('totals'))
+    print(f"Carga inicial em {time.monotonic() - started:.1f}s: "
+          + ", ".join(f"{collection} {count}" for collection, count in totals.items()))
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(store))
+    print(f"\nServindo em http://127.0.0.1:{port}/aggregates (Ctrl+C para parar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for watch in watches:
+            watch.unsubscribe()
+    print("\nServico encerrado")
+
+
+def query(port, name=None):
+    url = f"http://127.0.0.1:{port}/aggregates" + (f"/{name}" if name else '')
+    try:
+        with urllib.request.urlopen(url) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        print(f"ERRO: {name}: agregado desconhecido ({e.code})")
+        exit(1)
+    except urllib.error.URLError:
+        print(f"ERRO: servico nao esta rodando em {url} (inicie com: python scripts/aggregate_service.py)")
+        exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Agregados em memoria mantidos por listeners do Firestore')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Porta local (padrao: {DEFAULT_PORT})')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--get', nargs='?', const='', metavar='NOME',
+                       help='Consulta o servico rodando (sem nome: todos os agregados)')
+    group.add_argument('--once', action='store_true', help='Faz a carga inicial, imprime os agregados e sai')
+    args = parser.parse_args()
+
+    if args.get is not None:
+        print(json.dumps(query(args.port, args.get or None), indent=2, ensure_ascii=False))
+        return
+
+    if args.once:
+        store = AggregateStore()
+        watches = subscribe(store)
+        wait_ready(store)
+        for watch in watches:
+            watch.unsubscribe()
+        print(json.dumps(json.loads(store.read()), indent=2, ensure_ascii=False))
+        return
+
+    print("\n" + "="*60)
+    print("SERVICO DE AGREGADOS")
+    print("="*60 + "\n")
+    serve(args.port)
+
+
+if __name__ == "__main__":
+    main()
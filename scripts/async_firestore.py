@@ -0,0 +1,52 @@
+"""
+Utilitarios para os caminhos assincronos (--async) dos scripts de inspecao
+
+Usa o cliente assincrono do Firestore (firebase_admin.firestore_async) e um
+semaforo para limitar quantas leituras ficam em voo ao mesmo tempo: centenas
+de get() e contagens independentes rodam juntas sem estourar o limite de
+conexoes.
+
+O app do Firebase continua sendo inicializado pelo proprio script; o
+cliente deve ser criado dentro do loop (async_client()).
+
+Uso:
+    import asyncio
+    from async_firestore import async_client, count_docs, gather_bounded
+
+    async def run():
+        db = async_client()
+        snaps = await gather_bounded([db.collection('locations').document(i).get() for i in ids])
+
+    asyncio.run(run())
+"""
+
+import asyncio
+
+from firebase_admin import firestore_async
+
+DEFAULT_CONCURRENCY = 50
+
+
+def async_client():
+    return firestore_async.client()
+
+
+async def bounded(semaphore, awaitable):
+    async with semaphore:
+        return await awaitable
+
+
+async def gather_bounded(awaitables, limit=DEFAULT_CONCURRENCY):
+    """asyncio.gather com no maximo `limit` operacoes em andamento; mantem a ordem"""
+    semaphore = asyncio.Semaphore(limit)
+    return await asyncio.gather(*(bounded(semaphore, awaitable) for awaitable in awaitables))
+
+
+async def count_docs(query):
+    """Quantidade de documentos via agregacao count() (nao baixa os documentos)"""
+    result = await query.count().get()
+    return int(result[0][0].value)
+
+
+async def stream_all(query):
+    return [doc async for doc in query.stream()]
@@ -8,19 +8,18 @@ echo "🔍 Auditing Unused Resources..."
 echo "==============================="
 
 echo ""
-echo "Running Android Lint for unused resources..."
-echo "This may take a few minutes..."
+echo "Indexing resource definitions and references (app, composeApp, shared)..."
 echo ""
 
-# Run lint with focus on unused resources
-./gradlew lintDebug -PandroidLintCheck=UnusedResources --quiet
+# One pass over res/, composeResources/, mr/ and the Kotlin sources (scripts/resource_index.py);
+# both reports come from the same index
+python3 scripts/resource_index.py --unused --missing "$@"
 
 echo ""
-echo "📊 Lint report generated at:"
+echo "For Android Lint's view (slower, needs a Gradle build):"
+echo "   ./gradlew lintDebug -PandroidLintCheck=UnusedResources"
 echo "   app/build/reports/lint-results-debug.html"
 echo ""
-echo "Open it in a browser to see detailed unused resources."
-echo ""
 echo "Alternatively, run R8 with resource shrinking enabled:"
 echo "   ./gradlew assembleRelease"
 echo ""
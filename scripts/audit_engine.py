@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Single-traversal source audit for app, composeApp and shared.
+
+Replaces running audit_real_cd.py, fix_accessibility.py and the
+audit-*.sh scripts one after another, each walking and reading the whole
+tree. Here the tree is walked once and every Kotlin file is read once; each
+file goes through all registered rules, files are spread over a process
+pool, and one combined report comes out (text or JSON).
+
+A rule is a function registered with @rule(name, triggers): it receives a
+SourceFile (path, text, lines, a lazily built CallIndex shared by every rule
+of that file, a metrics Counter) and yields Finding records. Rules with
+triggers only see files whose raw bytes contain one of them (see
+source_files.py); rules without triggers see every file. A metric is
+registered the same way with @metric: it only adds to src.metrics, yields no
+findings and is reported apart from the rules. Per-file results are cached
+like the other scanners (.cache/kotlin-audit).
+
+Resource keys referenced but not defined are checked against
+resource_index.py; unused resources need the whole tree at once and are
+reported by resource_index.py --unused. Detekt is not covered here.
+
+Usage:
+    python3 scripts/audit_engine.py [--rules a,b] [--format text|json] [--output FILE]
+                                    [--metrics a,b] [--limit N] [--workers N] [--no-cache]
+                                    [--changed-since RANGE]
+    python3 scripts/audit_engine.py --list-rules
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import kotlin_lexer
+import multi_pattern
+import resource_index
+import source_files
+from audit_real_cd import audit_index
+from fix_accessibility import NON_UI_PATHS, fix_async_images, fix_clickables, fix_icon_calls
+from kotlin_lexer import IDENT, OP, STRING, CallIndex, string_value
+from multi_pattern import MultiPattern
+from scan_cache import MISS, ResultCache, changed_files, version_of
+from source_files import CHUNKS_PER_WORKER, balanced_chunks, read_source
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_ROOTS = ['app', 'composeApp', 'shared']
+SKIP_DIRS = {'build', '.gradle', '.idea', 'node_modules'}
+
+# androidTest/, test/, commonTest/, ...: UI assertions there use literal strings on purpose
+TEST_SOURCES = re.compile(r'/src/\w*[tT]est/')
+
+LARGE_FILE_LINES = 500
+
+Finding = namedtuple('Finding', ['rule', 'path', 'line', 'message'])
+
+RULES = {}
+METRICS = {}
+
+
+class Rule:
+    def __init__(self, name, check, triggers, tests, description):
+        self.name = name
+        self.check = check
+        self.triggers = [t.encode() for t in triggers] if triggers is not None else None
+        self.tests = tests
+        self.description = description
+
+
+def rule(name, triggers=None, tests=False):
+    """
+    Register a rule. triggers: literals one of which must occur in the file
+    (None: every file); tests: also run on test source sets.
+    """
+    def register(check):
+        RULES[name] = Rule(name, check, triggers, tests, (check.__doc__ or '').strip())
+        return check
+    return register
+
+
+def metric(name, triggers=None, tests=False):
+    """Register a metric: like @rule, but it only counts into src.metrics"""
+    def register(count):
+        METRICS[name] = Rule(name, count, triggers, tests, (count.__doc__ or '').strip())
+        return count
+    return register
+
+
+class SourceFile:
+    def __init__(self, path, rel, text, hits):
+        self.path = path
+        self.rel = rel
+        self.text = text
+        self.hits = hits
+        self.metrics = Counter()
+        self._lines = None
+        self._index = None
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = self.text.split('\n')
+        return self._lines
+
+    @property
+    def index(self):
+        # Lexed once, on first use, for every rule of this file
+        if self._index is None:
+            self._index = CallIndex(self.text)
+        return self._index
+
+
+def has_words(value):
+    """String literal content with letters outside ${...} and $name templates"""
+    depth = 0
+    idx = 0
+    while idx < len(value):
+        if value.startswith('${', idx):
+            depth += 1
+            idx += 1
+        elif value[idx] == '}' and depth:
+            depth -= 1
+        elif not depth and value[idx] == '$':
+            while idx + 1 < len(value) and (value[idx + 1].isalnum() or value[idx + 1] == '_'):
+                idx += 1
+        elif not depth and value[idx].isalpha():
+            return True
+        idx += 1
+    return False
+
+
+def literal_arg(arg):
+    """Content of an argument that is a plain string literal, or None"""
+    if arg is None or len(arg.tokens) != 1 or arg.tokens[0].kind != STRING:
+        return None
+    return string_value(arg.tokens[0])
+
+
+def qualified(index, call, receiver):
+    """True for receiver.call(...)"""
+    tokens = index.src[max(0, call.start - len(receiver) - 1):call.start]
+    return tokens == receiver + '.'
+
+
+# ---------------------------------------------------------------- rules
+
+@rule('content-description', triggers=['Icon', 'Image'])
+def check_content_description(src):
+    """Icon/Image calls with missing, positional or hardcoded contentDescription (audit_real_cd)"""
+    missing, positional, hardcoded = audit_index(src.index, src.rel)
+    for _, line, text in missing:
+        yield Finding('content-description', src.rel, line, f'missing contentDescription: {text}')
+    for _, line, text, value in positional:
+        yield Finding('content-description', src.rel, line, f'positional contentDescription [{value}]: {text}')
+    for _, line, value in hardcoded:
+        yield Finding('content-description', src.rel, line, f'hardcoded contentDescription "{value}"')
+
+
+@rule('auto-fixable', triggers=['Icon', 'AsyncImage', '.clickable'])
+def check_auto_fixable(src):
+    """Changes fix_accessibility.py would make (run it to apply them)"""
+    if NON_UI_PATHS.search(src.path):
+        return
+    edits = []
+    if b'Icon' in src.hits:
+        edits += fix_icon_calls(src.text, src.index)
+    if b'AsyncImage' in src.hits:
+        edits += fix_async_images(src.text)
+    if b'.clickable' in src.hits:
+        edits += fix_clickables(src.text)
+    for edit in sorted(edits):
+        line = src.index.line_of(edit.offset)
+        yield Finding('auto-fixable', src.rel, line, src.lines[line - 1].strip()[:120])
+
+
+@rule('clickable-semantics', triggers=['.clickable'])
+def check_clickable_semantics(src):
+    """.clickable modifiers without role/semantics/onClickLabel (audit-content-descriptions.sh)"""
+    tokens = src.index.tokens
+    for idx in range(1, len(tokens)):
+        tok = tokens[idx]
+        if tok.kind != IDENT or tok.text != 'clickable' or tokens[idx - 1].text != '.':
+            continue
+        line = src.index.line_of(tok.start)
+        text = src.lines[line - 1]
+        if text.lstrip().startswith('import ') or 'role =' in text or 'semantics' in text or 'onClickLabel' in text:
+            continue
+        # onClickLabel/role on the following lines of clickable(...)
+        nxt = tokens[idx + 1] if idx + 1 < len(tokens) else None
+        if nxt is not None and nxt.kind == OP and nxt.text == '(':
+            call = next((c for c in src.index.calls_named('clickable') if c.start == tok.start), None)
+            if call is not None and (call.arg('onClickLabel') or call.arg('role')):
+                continue
+        yield Finding('clickable-semantics', src.rel, line, text.strip()[:120])
+
+
+@rule('hardcoded-text', triggers=['Text'])
+def check_hardcoded_text(src):
+    """Text() with a literal string instead of a resource (audit-hardcoded-strings.sh)"""
+    for call in src.index.calls_named('Text'):
+        if call.declaration:
+            continue
+        value = literal_arg(call.arg('text') or call.positional(0))
+        if value and has_words(value):
+            yield Finding('hardcoded-text', src.rel, call.line, f'Text("{value[:80]}")')
+
+
+@rule('hardcoded-toast', triggers=['Toast'])
+def check_hardcoded_toast(src):
+    """Toast.makeText with a literal message (audit-hardcoded-strings.sh)"""
+    for call in src.index.calls_named('makeText'):
+        if not qualified(src.index, call, 'Toast'):
+            continue
+        value = literal_arg(call.arg('text') or call.positional(1))
+        if value and has_words(value):
+            yield Finding('hardcoded-toast', src.rel, call.line, f'Toast.makeText(..., "{value[:80]}")')
+
+
+@metric('log-statements', triggers=['Log.'], tests=True)
+def count_log_statements(src):
+    """android.util.Log calls (messages should be English)"""
+    for name in ('v', 'd', 'i', 'w', 'e'):
+        for call in src.index.calls_named(name):
+            if qualified(src.index, call, 'Log'):
+                src.metrics['log_statements'] += 1
+
+
+@rule('complexity', tests=True)
+def check_complexity(src):
+    """Lines of code, control flow and files over 500 lines (audit-code-complexity.sh)"""
+    loc = 0
+    for line in src.lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith('//'):
+            loc += 1
+    src.metrics['kotlin_files'] += 1
+    src.metrics['lines_of_code'] += loc
+    src.metrics['control_flow'] += sum(1 for tok in src.index.tokens
+                                       if tok.kind == IDENT and tok.text in ('if', 'when', 'for', 'while'))
+    total = len(src.lines) - (1 if src.text.endswith('\n') else 0)
+    if total > LARGE_FILE_LINES:
+        yield Finding('complexity', src.rel, 1, f'large file: {total} lines')
+
+
+@lru_cache(maxsize=None)
+def resource_definitions():
+    # Built once per worker process: resource files only, no sources
+    return resource_index.ResourceIndex.build(SOURCE_ROOTS, sources=False, use_cache=False).definitions
+
+
+@rule('missing-resource', triggers=['R.', 'Res.', 'MR.'])
+def check_missing_resource(src):
+    """R./Res./MR. references to keys no resource file defines (resource_index.py)"""
+    definitions = resource_definitions()
+    for ns, kind, name, line in resource_index.source_references(src.text, src.index.code):
+        if (ns, kind, name) not in definitions and kind not in resource_index.MISSING_IGNORED_TYPES:
+            yield Finding('missing-resource', src.rel, line, f'{ns}.{kind}.{name} is not defined')
+
+
+# ---------------------------------------------------------------- engine
+
+def audit_source(path, rules, prefilter):
+    """(findings, metrics) of one file for the given rules"""
+    rel = os.path.relpath(path, PROJECT_ROOT).replace('\\', '/')
+    if TEST_SOURCES.search(rel):
+        rules = [r for r in rules if r.tests]
+        if not rules:
+            return [], {}
+        prefilter = make_prefilter(rules)
+    text, hits = read_source(path, prefilter)
+    if text is None:
+        if all(r.triggers is not None for r in rules):
+            return [], {}
+        text, _ = read_source(path)
+
+    src = SourceFile(path, rel, text, hits)
+    findings = []
+    for r in rules:
+        if r.triggers is not None and not any(t in hits for t in r.triggers):
+            continue
+        findings.extend(r.check(src) or ())
+    return [list(f) for f in findings], dict(src.metrics)
+
+
+def audit_chunk(task):
+    check_names, paths = task
+    rules = [RULES.get(name) or METRICS[name] for name in check_names]
+    prefilter = make_prefilter(rules)
+    return [(path, audit_source(path, rules, prefilter)) for path in paths]
+
+
+def make_prefilter(rules):
+    triggers = [t for r in rules if r.triggers is not None for t in r.triggers]
+    return MultiPattern(triggers) if triggers else None
+
+
+def source_files_under(roots):
+    """Every .kt file under the source roots, in a stable order (one walk)"""
+    paths = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(PROJECT_ROOT, root)):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.'))
+            paths.extend(os.path.join(dirpath, name) for name in sorted(filenames) if name.endswith('.kt'))
+    return paths
+
+
+def run_engine(rule_names, roots=SOURCE_ROOTS, workers=None, use_cache=True, changed_since=None,
+               metric_names=None):
+    """Returns (findings sorted by rule/path/line, summed metrics, number of files)"""
+    paths = source_files_under(roots)
+    check_names = list(rule_names) + list(METRICS if metric_names is None else metric_names)
+    workers = workers or os.cpu_count() or 1
+
+    cache = None
+    if use_cache:
+        # Resource files are part of the version: a new key changes missing-resource/auto-fixable results
+        version = version_of(__file__, kotlin_lexer.__file__, multi_pattern.__file__, source_files.__file__,
+                             resource_index.__file__,
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'audit_real_cd.py'),
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fix_accessibility.py'),
+                             *resource_index.resource_paths(roots))
+        # One cache per set of checks; hashed so the file name stays short however many there are
+        checks = hashlib.sha1(','.join(sorted(check_names)).encode()).hexdigest()[:12]
+        cache = ResultCache(f'audit_engine-{checks}', version)
+    changed = changed_files(changed_since) if changed_since else None
+
+    results = {}
+    if cache is not None:
+        for path in paths:
+            trust = changed is not None and os.path.abspath(path) not in changed
+            cached = cache.lookup(path, trust=trust)
+            if cached is not MISS:
+                results[path] = cached
+    pending = [path for path in paths if path not in results]
+
+    if workers == 1 or len(pending) < 2:
+        fresh = dict(audit_chunk((check_names, pending)))
+    else:
+        fresh = {}
+        chunks = balanced_chunks(pending, workers * CHUNKS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_result in pool.map(audit_chunk, [(check_names, chunk) for chunk in chunks]):
+                fresh.update(chunk_result)
+    results.update(fresh)
+
+    if cache is not None:
+        for path, result in fresh.items():
+            cache.store(path, result)
+        for root in roots:
+            cache.prune(os.path.join(PROJECT_ROOT, root), paths)
+        cache.save()
+
+    findings = []
+    metrics = Counter()
+    for path in paths:
+        file_findings, file_metrics = results[path]
+        findings.extend(Finding(*f) for f in file_findings)
+        metrics.update(file_metrics)
+    findings.sort(key=lambda f: (rule_names.index(f.rule), f.path, f.line))
+    return findings, metrics, len(paths)
+
+
+def text_report(findings, metrics, files, rule_names, limit):
+    by_rule = {name: [f for f in findings if f.rule == name] for name in rule_names}
+    out = ['=' * 70, 'SOURCE AUDIT (app, composeApp, shared)', '=' * 70]
+    for name in rule_names:
+        rule_findings = by_rule[name]
+        out.append(f'\n--- {name}: {len(rule_findings)} --- {RULES[name].description}')
+        for finding in rule_findings[:limit]:
+            out.append(f'  {finding.path}:{finding.line}: {finding.message}')
+        if len(rule_findings) > limit:
+            out.append(f'  ... {len(rule_findings) - limit} more (--limit, or --format json for all)')
+    out.append(f"\n{'=' * 70}")
+    out.append(f'Summary ({files} Kotlin files read once):')
+    out.append('  Findings per rule:')
+    for name in rule_names:
+        out.append(f'    {name + ":":<22} {len(by_rule[name])}')
+    out.append('  Metrics:')
+    for name, value in sorted(metrics.items()):
+        out.append(f'    {name + ":":<22} {value}')
+    out.append('=' * 70)
+    return '\n'.join(out) + '\n'
+
+
+def json_report(findings, metrics, files, rule_names):
+    return json.dumps({
+        'files': files,
+        'rules': rule_names,
+        'counts': {name: sum(1 for f in findings if f.rule == name) for name in rule_names},
+        'metrics': dict(sorted(metrics.items())),
+        'findings': [f._asdict() for f in findings],
+    }, indent=2, ensure_ascii=False) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-pass source audit (all rules, one tree read)')
+    parser.add_argument('--rules', help='Comma-separated rules to run (default: all, see --list-rules)')
+    parser.add_argument('--metrics', help='Comma-separated metrics to count (default: all, see --list-rules)')
+    parser.add_argument('--list-rules', action='store_true', help='List the registered rules and metrics')
+    parser.add_argument('--format', choices=['text', 'json'], default='text')
+    parser.add_argument('--output', metavar='FILE', help='Write the report here instead of stdout')
+    parser.add_argument('--limit', type=int, default=50, help='Findings listed per rule in the text report')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-read every file, ignore the result cache')
+    parser.add_argument('--changed-since', metavar='RANGE',
+                        help='Only re-read files changed in this git range (e.g. HEAD, origin/main...HEAD)')
+    args = parser.parse_args()
+
+    if args.list_rules:
+        for r in RULES.values():
+            print(f'{r.name:<22} {r.description}')
+        print('\nMetrics:')
+        for m in METRICS.values():
+            print(f'{m.name:<22} {m.description}')
+        return
+
+    rule_names = args.rules.split(',') if args.rules else list(RULES)
+    unknown = [name for name in rule_names if name not in RULES]
+    if unknown:
+        parser.error(f"unknown rule(s): {', '.join(unknown)} (see --list-rules)")
+    metric_names = args.metrics.split(',') if args.metrics else list(METRICS)
+    unknown = [name for name in metric_names if name not in METRICS]
+    if unknown:
+        parser.error(f"unknown metric(s): {', '.join(unknown)} (see --list-rules)")
+
+    findings, metrics, files = run_engine(rule_names, workers=args.workers, use_cache=not args.no_cache,
+                                          changed_since=args.changed_since, metric_names=metric_names)
+    if args.format == 'json':
+        report = json_report(findings, metrics, files, rule_names)
+    else:
+        report = text_report(findings, metrics, files, rule_names, args.limit)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f'Report written to {args.output} ({len(findings)} findings, {files} files)')
+    else:
+        sys.stdout.write(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the contentDescription audit (audit_real_cd.py).
+
+Starts from the cached audit (.cache/kotlin-audit), keeps the per-file
+findings in memory and re-audits only the Kotlin files that change, printing
+the delta (new / resolved findings) right after each save. Findings are
+compared without their line numbers, so editing above an Icon call does not
+report it as resolved and new again.
+
+On Linux the tree is watched with inotify (through ctypes, one watch per
+directory, new directories picked up as they appear, moved-out or deleted
+ones dropped with their findings); the process sleeps in
+select() between saves. Elsewhere, or with --poll, it falls back to comparing
+mtimes every --interval seconds.
+
+Usage: python3 scripts/audit_watch.py [--root DIR] [--poll] [--interval SECONDS] [--no-cache]
+"""
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import glob
+import os
+import select
+import struct
+import time
+from collections import Counter
+
+from audit_real_cd import UI_DIR, audit_file, result_cache
+from scan_cache import MISS
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+# Editors save in bursts (temp file, rename, chmod): wait this long for the burst to end
+SETTLE_SECONDS = 0.05
+
+CATEGORIES = ('missing', 'positional', 'hardcoded')
+
+
+class InotifyWatcher:
+    def __init__(self, root):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.dirs = {}
+        self.add_tree(root)
+
+    def add_tree(self, root):
+        for dirpath, dirnames, _ in os.walk(root):
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, 'inotify watch limit reached (fs.inotify.max_user_watches)')
+                continue
+            self.dirs[wd] = dirpath
+
+    def drop_tree(self, root):
+        # A directory moved inside the tree keeps its watch (and reports under the
+        # old path): drop it, IN_MOVED_TO adds it back under the new one
+        prefix = os.path.join(root, '')
+        for wd, dirpath in list(self.dirs.items()):
+            if dirpath == root or dirpath.startswith(prefix):
+                self._rm_watch(self.fd, wd)
+                del self.dirs[wd]
+
+    def _read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                directory = self.dirs.get(wd)
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_MOVED_FROM | IN_DELETE):
+                        # The directory stands for every file indexed under it (FindingsIndex.update)
+                        self.drop_tree(path)
+                        changed.add(path)
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may land in the new directory before its watch exists
+                        self.add_tree(path)
+                        changed.update(glob.glob(os.path.join(path, '**', '*.kt'), recursive=True))
+                elif path.endswith('.kt'):
+                    changed.add(path)
+
+    def wait(self, timeout=None):
+        """Block until files change; returns the changed .kt paths"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = self._read_events()
+        while select.select([self.fd], [], [], SETTLE_SECONDS)[0]:
+            changed |= self._read_events()
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, root, interval=1.0):
+        self.root = root
+        self.interval = interval
+        self.stats = self._scan()
+
+    def _scan(self):
+        stats = {}
+        for path in glob.glob(os.path.join(self.root, '**', '*.kt'), recursive=True):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            stats = self._scan()
+            changed = {path for path in stats.keys() | self.stats.keys() if stats.get(path) != self.stats.get(path)}
+            self.stats = stats
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(root, poll=False, interval=1.0):
+    if not poll:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f'inotify unavailable ({e}); polling every {interval}s')
+    return PollingWatcher(root, interval)
+
+
+def finding_key(category, finding):
+    """Finding identity without its line number"""
+    return (category, finding[0]) + tuple(finding[2:])
+
+
+class FindingsIndex:
+    """Per-file audit findings, kept in memory between saves"""
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.files = {}
+
+    def load(self, root):
+        kt_files = sorted(glob.glob(os.path.join(root, '**', '*.kt'), recursive=True))
+        for path in kt_files:
+            result = self.cache.lookup(path) if self.cache is not None else MISS
+            if result is MISS:
+                try:
+                    result = audit_file(path)
+                except (FileNotFoundError, UnicodeDecodeError):
+                    # Gone or mid-write since the walk; its next event audits it
+                    continue
+                if self.cache is not None:
+                    self.cache.store(path, result)
+            self.files[path] = [list(map(tuple, findings)) for findings in result]
+        if self.cache is not None:
+            self.cache.prune(root, kt_files)
+            self.cache.save()
+
+    def expand(self, paths):
+        """.kt paths, with a directory standing for the files indexed under it"""
+        expanded = set()
+        for path in paths:
+            if path.endswith('.kt'):
+                expanded.add(path)
+            else:
+                prefix = os.path.join(path, '')
+                expanded.update(known for known in self.files if known.startswith(prefix))
+        return sorted(expanded)
+
+    def update(self, paths):
+        """Re-audit paths (see expand); returns (added, resolved) lists of (category, finding)"""
+        paths = self.expand(paths)
+        before = Counter()
+        after = Counter()
+        current = {}
+        for path in paths:
+            for category, findings in zip(CATEGORIES, self.files.get(path, ())):
+                for finding in findings:
+                    before[finding_key(category, finding)] += 1
+            try:
+                result = [list(map(tuple, findings)) for findings in audit_file(path)]
+                if self.cache is not None:
+                    self.cache.store(path, result)
+            except (FileNotFoundError, UnicodeDecodeError):
+                # Deleted (or caught mid-write; the next event re-audits it)
+                self.files.pop(path, None)
+                if self.cache is not None:
+                    self.cache.discard(path)
+                continue
+            self.files[path] = result
+            for category, findings in zip(CATEGORIES, result):
+                for finding in findings:
+                    key = finding_key(category, finding)
+                    after[key] += 1
+                    current[key] = (category, finding)
+
+        added = [current[key] for key in sorted(after - before)]
+        resolved = [(key[0], (key[1], None) + key[2:]) for key in sorted(before - after)]
+        if self.cache is not None:
+            self.cache.save()
+        return added, resolved
+
+    def totals(self):
+        totals = Counter()
+        for result in self.files.values():
+            for category, findings in zip(CATEGORIES, result):
+                totals[category] += len(findings)
+        return totals
+
+
+def format_finding(category, finding):
+    location = finding[0] if finding[1] is None else f'{finding[0]}:{finding[1]}'
+    detail = finding[2] if category != 'positional' else f'{finding[2]}  [value: {finding[3]}]'
+    return f'[{category}] {location}: {detail}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Continuous contentDescription audit')
+    parser.add_argument('--root', default=UI_DIR, help='Directory to watch (default: app ui package)')
+    parser.add_argument('--poll', action='store_true', help='Poll mtimes instead of using inotify')
+    parser.add_argument('--interval', type=float, default=1.0, help='Polling interval in seconds')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or update the result cache')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else result_cache()
+
+    started = time.perf_counter()
+    index = FindingsIndex(cache)
+    index.load(args.root)
+    totals = index.totals()
+    print(f'Watching {args.root}: {len(index.files)} files, '
+          f"{totals['missing']} missing / {totals['hardcoded']} hardcoded / {totals['positional']} positional "
+          f'({(time.perf_counter() - started) * 1000:.0f} ms)')
+
+    watcher = make_watcher(args.root, args.poll, args.interval)
+    try:
+        while True:
+            changed = watcher.wait()
+            if not changed:
+                continue
+            started = time.perf_counter()
+            paths = index.expand(changed)
+            added, resolved = index.update(paths)
+            elapsed = (time.perf_counter() - started) * 1000
+            stamp = time.strftime('%H:%M:%S')
+            for category, finding in added:
+                print(f'{stamp} + {format_finding(category, finding)}')
+            for category, finding in resolved:
+                print(f'{stamp} - {format_finding(category, finding)}')
+            totals = index.totals()
+            print(f"{stamp}   {len(paths)} file(s) re-audited in {elapsed:.1f} ms: "
+                  f"{totals['missing']} missing / {totals['hardcoded']} hardcoded / {totals['positional']} positional")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Gera sugestoes de times para todos os proximos jogos
+
+Le de uma vez os jogos futuros (SCHEDULED/CONFIRMED), as confirmacoes de
+todos eles (consultas 'in' em pedacos) e as estatisticas dos jogadores (um
+get_all), balanceia cada jogo com team_balancer.balance e grava o resultado
+em suggested_teams/{gameId} com o BulkWriter.
+
+Uso:
+    python scripts/balance_teams_batch.py
+    python scripts/balance_teams_batch.py --from 2026-03-01 --to 2026-03-31
+    python scripts/balance_teams_batch.py --dry-run
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import date
+
+from firebase_admin import firestore
+
+from evaluate_badges import get_docs
+from recompute_season_standings import db, game_id_of, is_goalkeeper, stream_by_game_ids
+from team_balancer import balance, player_rating
+
+UPCOMING_STATUSES = ['SCHEDULED', 'CONFIRMED']
+GAME_FIELDS = ['date', 'status', 'maxPlayers', 'maxGoalkeepers']
+STATISTICS_FIELDS = ['total_games', 'total_goals', 'total_saves', 'total_wins', 'yellow_cards', 'red_cards']
+
+
+def load_upcoming_games(date_from, date_to=None):
+    query = (db.collection('games')
+             .where('status', 'in', UPCOMING_STATUSES)
+             .where('date', '>=', date_from))
+    if date_to:
+        query = query.where('date', '<=', date_to)
+    return {game.id: game.to_dict() for game in query.select(GAME_FIELDS).stream()}
+
+
+def load_pools(game_ids):
+    """game_id -> {'players': [user_id], 'goalkeepers': [user_id]} so com CONFIRMED"""
+    pools = defaultdict(lambda: {'players': [], 'goalkeepers': []})
+    confirmations = stream_by_game_ids(db.collection_group('confirmations'), game_ids,
+                                       ['game_id', 'user_id', 'status', 'is_goalkeeper', 'position'])
+    for conf in confirmations:
+        data = conf.to_dict()
+        if data.get('status') != 'CONFIRMED' or not data.get('user_id'):
+            continue
+        pool = pools[game_id_of(conf)]
+        pool['goalkeepers' if is_goalkeeper(data) else 'players'].append(data['user_id'])
+    return pools
+
+
+def suggest_teams(date_from=None, date_to=None, dry_run=False):
+    date_from = date_from or date.today().isoformat()
+    games = load_upcoming_games(date_from, date_to)
+    print(f"Jogos futuros: {len(games)}")
+    if not games:
+        return 0
+
+    pools = load_pools(games.keys())
+    user_ids = {uid for pool in pools.values() for uid in pool['players'] + pool['goalkeepers']}
+    stats = get_docs('statistics', sorted(user_ids), STATISTICS_FIELDS) if user_ids else {}
+    ratings = {uid: player_rating(stats.get(uid)) for uid in user_ids}
+    print(f"Jogadores confirmados: {len(user_ids)} ({len(stats)} com estatisticas)\n")
+
+    writer = None if dry_run else db.bulk_writer()
+    suggested = 0
+    for game_id, pool in sorted(pools.items()):
+        game = games.get(game_id)
+        if game is None or len(pool['players']) + len(pool['goalkeepers']) < 2:
+            continue
+
+        per_team = max((game.get('maxGoalkeepers') or 2) // 2, 1)
+        result = balance([(uid, ratings[uid]) for uid in pool['players']],
+                         [(uid, ratings[uid]) for uid in pool['goalkeepers']],
+                         goalkeepers_per_team=per_team)
+        suggested += 1
+        print(f"  {game_id} ({game.get('date')}): {len(result['teamA'])} x {len(result['teamB'])}"
+              f" | media {result['ratingA']:.2f} x {result['ratingB']:.2f}")
+
+        if writer is not None:
+            writer.set(db.collection('suggested_teams').document(game_id), {
+                'gameId': game_id,
+                **result,
+                'generatedAt': firestore.SERVER_TIMESTAMP,
+            })
+
+    if writer is not None:
+        writer.close()
+
+    print(f"\nSugestoes geradas: {suggested}")
+    return suggested
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sugere times balanceados para os proximos jogos')
+    parser.add_argument('--from', dest='date_from', help='Jogos a partir desta data (padrao: hoje)')
+    parser.add_argument('--to', dest='date_to', help='Jogos ate esta data')
+    parser.add_argument('--dry-run', action='store_true', help='Calcula sem gravar')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("SUGESTAO DE TIMES EM LOTE")
+    print("="*60 + "\n")
+
+    suggest_teams(args.date_from, args.date_to, dry_run=args.dry_run)
+
+    if args.dry_run:
+        print("\n(dry-run: nada foi gravado)")
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
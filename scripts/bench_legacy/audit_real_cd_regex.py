@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Frozen copy of audit_real_cd.py as it was before the shared Kotlin lexer
+(line scan and regexes), the reference scanner of bench_scanners.py.
+Do not change it: the benchmark weighs the lexer path against this code.
+
+Real accessibility audit - checks multi-line context for contentDescription.
+Unlike the bash script, this properly handles multi-line Icon/Image calls.
+Files are scanned in parallel over a process pool (size-balanced chunks);
+findings are merged in sorted file order, so the report is identical for any
+number of workers.
+Per-file findings are cached in .cache/kotlin-audit (see scan_cache.py), so
+only changed files are re-parsed; --changed-since trusts the cache for every
+file outside a git range.
+Usage: python3 scripts/bench_legacy/audit_real_cd_regex.py [--workers N] [--root DIR] [--no-cache] [--changed-since RANGE]
+"""
+import re
+import os
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from scan_cache import MISS, ResultCache, changed_files, version_of
+
+UI_DIR = 'app/src/main/java/com/futebadosparcas/ui'
+
+# Chunks per worker: more chunks smooth out uneven files, fewer cut IPC overhead
+CHUNKS_PER_WORKER = 4
+
+SKIP_LINE_PATTERNS = [
+    'IconButton', 'AsyncImage', 'CachedProfileImage', 'CachedAsyncImage',
+    'ProgressiveImage', 'LocationImage', 'FieldImage', 'processImage',
+    'compressImage', 'setSmallIcon', 'setLargeIcon', 'BadgedIcon',
+    'LeadingIcon', 'TrailingIcon', 'NavigationIcon', 'leadingIcon',
+    'trailingIcon', 'GroupImage', 'ProfileImage', 'rememberAsyncImagePainter',
+    'shareAsImage', 'NotificationIcon', 'FieldTypeIcon', 'PlayerCardShareHelper',
+    'getActivityIcon', 'getEventIcon', 'getConnectionIcon', 'getErrorIcon',
+    'getAmenityIcon', 'getMilestoneIcon', 'getDivisionIcon', 'ZoomableImage',
+    'navigationIcon', 'fun ', 'import ', 'val icon', 'val ', '* ', 'painter =',
+    'imageVector =',
+]
+
+def extract_full_call(lines, start_idx):
+    paren_count = 0
+    call_lines = []
+    started = False
+    for j in range(start_idx, min(start_idx + 30, len(lines))):
+        for ch in lines[j]:
+            if ch == '(':
+                paren_count += 1
+                started = True
+            elif ch == ')':
+                paren_count -= 1
+        call_lines.append(lines[j])
+        if started and paren_count <= 0:
+            break
+    return ''.join(call_lines)
+
+def parse_positional_params(inner_text):
+    parts = []
+    depth = 0
+    current = ''
+    for ch in inner_text:
+        if ch in '([':
+            depth += 1
+            current += ch
+        elif ch in ')]':
+            if depth == 0:
+                parts.append(current.strip())
+                break
+            depth -= 1
+            current += ch
+        elif ch == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+        else:
+            current += ch
+    return parts
+
+def audit_file(filepath):
+    """Findings for one file: (missing_cd, positional_cd, hardcoded_cd)"""
+    missing_cd = []
+    positional_cd = []
+    hardcoded_cd = []
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        if stripped.startswith('//') or stripped.startswith('*') or stripped.startswith('/*'):
+            i += 1
+            continue
+
+        for comp in ['Icon(', 'Image(']:
+            if comp not in stripped:
+                continue
+
+            skip = any(pat in stripped for pat in SKIP_LINE_PATTERNS)
+            if skip:
+                continue
+
+            call_text = extract_full_call(lines, i)
+
+            if 'contentDescription' not in call_text:
+                is_single = stripped.count('(') > 0 and (stripped.rstrip().endswith(')') or stripped.rstrip().endswith('),') or stripped.rstrip().endswith(') {') or stripped.rstrip().endswith('} }') or stripped.rstrip().endswith(') },'))
+
+                if is_single and comp in stripped:
+                    idx = stripped.index(comp) + len(comp)
+                    inner = stripped[idx:]
+                    parts = parse_positional_params(inner)
+
+                    if len(parts) >= 2:
+                        second = parts[1].strip()
+                        if second == 'null' or second.startswith('stringResource') or second.startswith('"'):
+                            positional_cd.append((filepath.replace('\\', '/'), i + 1, stripped[:120], second))
+                        else:
+                            positional_cd.append((filepath.replace('\\', '/'), i + 1, stripped[:120], second))
+                    else:
+                        missing_cd.append((filepath.replace('\\', '/'), i + 1, stripped[:120]))
+                else:
+                    # Multi-line: check if 2nd line has positional contentDescription
+                    if i + 2 < len(lines):
+                        line2 = lines[i + 2].strip().rstrip(',').strip()
+                        if line2 in ['null'] or line2.startswith('stringResource') or line2.startswith('"'):
+                            if '=' not in lines[i + 2] or 'contentDescription =' in lines[i + 2]:
+                                if 'contentDescription =' not in lines[i + 2]:
+                                    positional_cd.append((filepath.replace('\\', '/'), i + 1, stripped[:120], line2))
+                                    i += 1
+                                    continue
+                    missing_cd.append((filepath.replace('\\', '/'), i + 1, stripped[:120]))
+            else:
+                cd_match = re.search(r'contentDescription\s*=\s*"([^"]+)"', call_text)
+                if cd_match:
+                    hardcoded_cd.append((filepath.replace('\\', '/'), i + 1, cd_match.group(1)))
+
+        i += 1
+
+    return missing_cd, positional_cd, hardcoded_cd
+
+
+def audit_chunk(paths):
+    return [(path, audit_file(path)) for path in paths]
+
+
+def balanced_chunks(paths, count):
+    """Split paths into `count` chunks of similar total size (largest file first)"""
+    chunks = [[] for _ in range(max(count, 1))]
+    loads = [0] * len(chunks)
+    for path in sorted(paths, key=lambda p: (-os.path.getsize(p), p)):
+        idx = loads.index(min(loads))
+        chunks[idx].append(path)
+        loads[idx] += os.path.getsize(path)
+    return [chunk for chunk in chunks if chunk]
+
+
+def run_audit(root=UI_DIR, workers=None, use_cache=True, changed_since=None):
+    """Audit every .kt file under root; returns (missing_cd, positional_cd, hardcoded_cd)"""
+    kt_files = sorted(glob.glob(os.path.join(root, '**', '*.kt'), recursive=True))
+    workers = workers or os.cpu_count() or 1
+
+    cache = ResultCache('audit_real_cd', version_of(__file__)) if use_cache else None
+    changed = changed_files(changed_since) if changed_since else None
+
+    results = {}
+    if cache is not None:
+        for filepath in kt_files:
+            trust = changed is not None and os.path.abspath(filepath) not in changed
+            cached = cache.lookup(filepath, trust=trust)
+            if cached is not MISS:
+                results[filepath] = cached
+    pending = [filepath for filepath in kt_files if filepath not in results]
+
+    if workers == 1 or len(pending) < 2:
+        fresh = dict(audit_chunk(pending))
+    else:
+        fresh = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_result in pool.map(audit_chunk, balanced_chunks(pending, workers * CHUNKS_PER_WORKER)):
+                fresh.update(chunk_result)
+    results.update(fresh)
+
+    if cache is not None:
+        for filepath, result in fresh.items():
+            cache.store(filepath, result)
+        cache.prune(root, kt_files)
+        cache.save()
+
+    missing_cd = []
+    positional_cd = []
+    hardcoded_cd = []
+    for filepath in kt_files:
+        missing, positional, hardcoded = results[filepath]
+        missing_cd.extend(missing)
+        positional_cd.extend(positional)
+        hardcoded_cd.extend(hardcoded)
+    return missing_cd, positional_cd, hardcoded_cd
+
+
+def print_report(missing_cd, positional_cd, hardcoded_cd):
+    print("=" * 70)
+    print("REAL ACCESSIBILITY AUDIT RESULTS")
+    print("=" * 70)
+
+    if positional_cd:
+        print(f"\n--- Positional contentDescription (cosmetic, should use named param): {len(positional_cd)} ---")
+        for rel, ln, text, val in positional_cd:
+            print(f"  {rel}:{ln}: {text}  [value: {val}]")
+
+    if missing_cd:
+        print(f"\n--- ACTUALLY MISSING contentDescription: {len(missing_cd)} ---")
+        for rel, ln, text in missing_cd:
+            print(f"  {rel}:{ln}: {text}")
+
+    if hardcoded_cd:
+        print(f"\n--- Hardcoded contentDescription strings: {len(hardcoded_cd)} ---")
+        for rel, ln, text in hardcoded_cd:
+            print(f"  {rel}:{ln}: \"{text}\"")
+
+    print(f"\n{'=' * 70}")
+    print(f"Summary:")
+    print(f"  Positional (cosmetic): {len(positional_cd)}")
+    print(f"  Missing (real issue):  {len(missing_cd)}")
+    print(f"  Hardcoded (real issue): {len(hardcoded_cd)}")
+    print(f"  Total real issues: {len(missing_cd) + len(hardcoded_cd)}")
+    print(f"{'=' * 70}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-line contentDescription audit')
+    parser.add_argument('--root', default=UI_DIR, help='Directory to scan (default: app ui package)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse every file, ignore the result cache')
+    parser.add_argument('--changed-since', metavar='RANGE',
+                        help='Only re-parse files changed in this git range (e.g. HEAD, origin/main...HEAD)')
+    args = parser.parse_args()
+
+    print_report(*run_audit(args.root, args.workers, use_cache=not args.no_cache,
+                            changed_since=args.changed_since))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Kotlin source scanners.
+
+Runs audit_real_cd, fix_accessibility (as a dry run, patch discarded) and
+the javax-inject codemod (remove_javax_inject) over synthetic trees from
+gen_kotlin_corpus.py (generated on first use, then reused) or over an
+existing tree (--root, e.g. the project itself). Each scanner runs in its
+own process, so peak RSS is its own; worker processes are reported
+separately. Nothing in the scanned tree is written and no result cache is
+used. audit_real_cd_regex is the reference for audit_real_cd: the audit as
+it was before the shared lexer (line scan and regexes), frozen in
+bench_legacy/, so a change to the lexer path can be weighed against it.
+
+Per scanner and tree size it records wall time, files/s, MB/s, peak memory
+and the finding count. --json saves the run; --baseline compares against a
+saved run and exits with 1 when throughput drops more than --tolerance or a
+finding count changes (a scanner behaving differently is a regression too).
+
+Usage:
+    python3 scripts/bench_scanners.py --files 1000 10000 [--workers N] [--repeat 3]
+    python3 scripts/bench_scanners.py --root . --json bench.json
+    python3 scripts/bench_scanners.py --files 10000 --baseline bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+from gen_kotlin_corpus import JAVA_DIR, corpus_dir, generate
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_JAVA_DIR = os.path.join('app', 'src', 'main', 'java')
+
+
+def kotlin_files(directory):
+    paths = []
+    for dirpath, _, filenames in os.walk(directory):
+        paths.extend(os.path.join(dirpath, name) for name in filenames if name.endswith('.kt'))
+    return sorted(paths)
+
+
+def scan_audit(root, workers):
+    from audit_real_cd import run_audit
+    ui_dir = os.path.join(root, JAVA_DIR, 'ui')
+    missing, positional, hardcoded = run_audit(ui_dir, workers, use_cache=False)
+    return kotlin_files(ui_dir), len(missing) + len(positional) + len(hardcoded)
+
+
+def scan_audit_regex(root, workers):
+    from bench_legacy.audit_real_cd_regex import run_audit
+    ui_dir = os.path.join(root, JAVA_DIR, 'ui')
+    missing, positional, hardcoded = run_audit(ui_dir, workers, use_cache=False)
+    return kotlin_files(ui_dir), len(missing) + len(positional) + len(hardcoded)
+
+
+def scan_fix(root, workers):
+    from fix_accessibility import process_file
+    paths = kotlin_files(os.path.join(root, APP_JAVA_DIR))
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        # FAILED is truthy: count only files that really need a fix
+        needs_fix = sum(1 for path in paths if process_file(path, diff_label=os.path.relpath(path, root)) is True)
+    return paths, needs_fix
+
+
+def scan_codemod(root, workers):
+    from codemod import PROJECT_ROOT as CODEMOD_ROOT, RULE_SETS, RuleSet, run
+    java_dir = os.path.join(root, APP_JAVA_DIR)
+    template = RULE_SETS['javax-inject']
+    rule_set = RuleSet(template.name, template.rules, os.path.relpath(java_dir, CODEMOD_ROOT),
+                       template.suffix, template.exclude)
+    results = run([rule_set], mode='dry-run', workers=workers)
+    return [path for path, *_ in results], sum(sum(counts.values()) for _, _, counts, _ in results)
+
+
+SCANNERS = {
+    'audit_real_cd': scan_audit,
+    'audit_real_cd_regex': scan_audit_regex,
+    'fix_accessibility': scan_fix,
+    'remove_javax_inject': scan_codemod,
+}
+
+
+def peak_rss_kb(who):
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_child(name, root, workers):
+    """Runs inside the benchmark subprocess: one scanner, one tree"""
+    started = time.perf_counter()
+    paths, findings = SCANNERS[name](root, workers)
+    seconds = time.perf_counter() - started
+    print(json.dumps({
+        'seconds': seconds,
+        'files': len(paths),
+        'bytes': sum(os.path.getsize(path) for path in paths),
+        'findings': findings,
+        'peak_rss_kb': peak_rss_kb(resource.RUSAGE_SELF) if resource else None,
+        'workers_peak_rss_kb': peak_rss_kb(resource.RUSAGE_CHILDREN) if resource else None,
+    }))
+
+
+def measure(name, root, workers, repeat):
+    """Best of `repeat` runs (each in a fresh process)"""
+    best = None
+    for _ in range(repeat):
+        cmd = [sys.executable, os.path.abspath(__file__), '--child', name, '--root', root]
+        if workers:
+            cmd += ['--workers', str(workers)]
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    best['files_per_s'] = best['files'] / best['seconds'] if best['seconds'] else 0.0
+    best['mb_per_s'] = best['bytes'] / 1e6 / best['seconds'] if best['seconds'] else 0.0
+    return best
+
+
+def format_kb(kb):
+    return '-' if not kb else f'{kb / 1024:.0f} MB'
+
+
+def print_table(results):
+    print(f"{'tree':<16} {'scanner':<20} {'files':>7} {'MB':>7} {'time':>8} {'files/s':>9} {'MB/s':>7} "
+          f"{'peak':>7} {'workers':>8} {'findings':>9}")
+    for tree, scanners in results.items():
+        for name, r in scanners.items():
+            print(f"{tree:<16} {name:<20} {r['files']:>7} {r['bytes'] / 1e6:>7.1f} {r['seconds']:>7.2f}s "
+                  f"{r['files_per_s']:>9.0f} {r['mb_per_s']:>7.2f} {format_kb(r['peak_rss_kb']):>7} "
+                  f"{format_kb(r['workers_peak_rss_kb']):>8} {r['findings']:>9}")
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages against a saved run (same trees and scanners only)"""
+    problems = []
+    for tree, scanners in results.items():
+        for name, r in scanners.items():
+            base = baseline.get('results', {}).get(tree, {}).get(name)
+            if base is None:
+                continue
+            if r['findings'] != base['findings']:
+                problems.append(f"{tree}/{name}: findings {base['findings']} -> {r['findings']}")
+            if r['files_per_s'] < base['files_per_s'] * (1 - tolerance):
+                problems.append(f"{tree}/{name}: {base['files_per_s']:.0f} -> {r['files_per_s']:.0f} files/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Kotlin source scanners')
+    parser.add_argument('--files', type=int, nargs='+', default=[1000],
+                        help='Synthetic tree sizes to benchmark (default: 1000)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the synthetic trees')
+    parser.add_argument('--root', help='Benchmark this tree (containing app/src/main/java) instead of synthetic ones')
+    parser.add_argument('--scanners', nargs='+', choices=sorted(SCANNERS), default=list(SCANNERS))
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for the parallel scanners')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per measurement (the fastest is kept)')
+    parser.add_argument('--json', metavar='FILE', help='Save the results as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='Compare with a saved run; exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed throughput drop against the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.root, args.workers)
+        return
+
+    if args.root:
+        trees = {os.path.basename(os.path.abspath(args.root)) or args.root: os.path.abspath(args.root)}
+    else:
+        trees = {}
+        for files in args.files:
+            root = corpus_dir(files, args.seed)
+            if not os.path.isdir(root):
+                print(f'Generating {files} files in {root}...')
+                generate(root, files, args.seed)
+            trees[f'{files}-s{args.seed}'] = root
+
+    results = {}
+    for tree, root in trees.items():
+        results[tree] = {name: measure(name, root, args.workers, args.repeat) for name in args.scanners}
+
+    print_table(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'cpus': os.cpu_count(), 'workers': args.workers,
+                       'results': results}, f, indent=2)
+        print(f'\nSaved to {args.json}')
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        if problems:
+            print('\nREGRESSIONS:')
+            for problem in problems:
+                print(f'  {problem}')
+            exit(1)
+        print('\nNo regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
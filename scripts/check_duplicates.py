@@ -6,6 +6,9 @@ import firebase_admin
 from firebase_admin import credentials, firestore
 from collections import defaultdict
 
+from doc_loader import where_in
+from venue_summaries import SUMMARY_COLLECTION, count_fields, refresh_summaries
+
 # Inicializar Firebase Admin
 try:
     cred = credentials.Certificate('scripts/serviceAccountKey.json')
@@ -69,6 +72,12 @@ def remove_duplicates(duplicates, keep_strategy='newest'):
     total_removed = 0
     total_fields_moved = 0
     
+    # Quadras de todos os locais duplicados em poucas consultas 'in' (em vez de uma por local)
+    location_ids = [loc['id'] for locs in duplicates.values() for loc in locs]
+    fields_by_location = defaultdict(list)
+    for field in where_in(db.collection('fields'), 'location_id', location_ids, fields=['location_id']):
+        fields_by_location[field.to_dict().get('location_id')].append(field)
+    
     for name, locs in duplicates.items():
         # Ordenar por data de criação (tratar None)
         def get_timestamp(loc):
@@ -95,9 +104,8 @@ def remove_duplicates(duplicates, keep_strategy='newest'):
         
         # Para cada local a ser removido
         for loc in remove_locs:
-            # Buscar quadras associadas
-            fields = db.collection('fields').where('location_id', '==', loc['id']).stream()
-            fields_list = list(fields)
+            # Quadras associadas
+            fields_list = fields_by_location.get(loc['id'], [])
             
             if fields_list:
                 print(f"   📦 Movendo {len(fields_list)} quadra(s) de {loc['id'][:20]}... para {keep_loc['id'][:20]}...")
@@ -142,6 +150,9 @@ def list_all_locations():
             'neighborhood': data.get('neighborhood'),
         })
     
+    # Contagem de quadras dos resumos materializados (venue_summaries.py): N leituras, nao N + quadras
+    summaries = {snap.id: snap.to_dict() for snap in db.collection(SUMMARY_COLLECTION).select(['fieldCount']).stream()}
+    
     # Ordenar alfabeticamente
     sorted_names = sorted(locations_by_name.keys())
     
@@ -149,9 +160,11 @@ def list_all_locations():
         locs = locations_by_name[name]
         loc = locs[0]  # Pegar o primeiro
         
-        # Contar quadras
-        fields = db.collection('fields').where('location_id', '==', loc['id']).stream()
-        field_count = len(list(fields))
+        # Contar quadras (consulta so se o local ainda nao tem resumo, com a mesma regra do resumo)
+        if loc['id'] in summaries:
+            field_count = summaries[loc['id']].get('fieldCount', 0)
+        else:
+            field_count = count_fields(loc['id'])
         
         status = "✅" if field_count > 0 else "⚠️ "
         print(f"{i:2d}. {status} {name}")
@@ -184,6 +197,9 @@ def main():
         if response.lower() == 's':
             remove_duplicates(duplicates, keep_strategy='newest')
             
+            # Quadras mudaram de local: atualizar os resumos antes de listar de novo
+            refresh_summaries()
+            
             # Listar novamente após limpeza
             print("\n" + "="*60)
             print("📋 VERIFICAÇÃO FINAL")
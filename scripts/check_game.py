@@ -1,7 +1,16 @@
-"""Verifica detalhes de um jogo especifico"""
+"""Verifica detalhes de um jogo especifico
+
+Uso:
+    python scripts/check_game.py
+    python scripts/check_game.py --async    # locais e contagens em paralelo
+"""
 import firebase_admin
 from firebase_admin import credentials, firestore
-import sys
+import argparse
+import asyncio
+
+from async_firestore import DEFAULT_CONCURRENCY, async_client, count_docs, gather_bounded, stream_all
+from doc_loader import AsyncDocLoader, DocLoader
 
 try:
     firebase_admin.get_app()
@@ -11,15 +20,8 @@ except:
 
 db = firestore.client()
 
-print("\n" + "="*60)
-print("VERIFICAR JOGO")
-print("="*60 + "\n")
-
-# Listar todos os jogos
-games = db.collection('games').stream()
 
-print("JOGOS CADASTRADOS:\n")
-for game in games:
+def print_game(game, location_name, count):
     data = game.to_dict()
     print(f"ID: {game.id}")
     print(f"  Owner: {data.get('ownerName', 'SEM NOME')}")
@@ -28,18 +30,79 @@ for game in games:
     print(f"  Status: {data.get('status', 'SEM STATUS')}")
     print(f"  Location ID: {data.get('locationId', 'SEM LOCAL')}")
     print(f"  Field ID: {data.get('fieldId', 'SEM QUADRA')}")
-
-    # Pegar nome do local
-    location_id = data.get('locationId')
-    if location_id:
-        location = db.collection('locations').document(location_id).get()
-        if location.exists:
-            print(f"  Local: {location.to_dict().get('name')}")
-
-    # Contar confirmacoes
-    confirmations = db.collection('games').document(game.id).collection('confirmations').stream()
-    count = len(list(confirmations))
+    if location_name is not None:
+        print(f"  Local: {location_name}")
     print(f"  Confirmacoes: {count}")
     print()
 
-print("="*60 + "\n")
+
+def check_games():
+    # Listar todos os jogos
+    games = list(db.collection('games').stream())
+
+    # Locais de todos os jogos em um unico get_all (cada local uma vez)
+    loader = DocLoader(db)
+    locations = [
+        loader.load(db.collection('locations').document(game.to_dict()['locationId']))
+        if game.to_dict().get('locationId') else None
+        for game in games
+    ]
+
+    for game, location in zip(games, locations):
+        # Pegar nome do local
+        location_name = None
+        if location is not None and location.result().exists:
+            location_name = location.result().to_dict().get('name')
+
+        # Contar confirmacoes
+        confirmations = db.collection('games').document(game.id).collection('confirmations').stream()
+        count = len(list(confirmations))
+        print_game(game, location_name, count)
+
+
+async def check_games_async(concurrency=DEFAULT_CONCURRENCY):
+    adb = async_client()
+    loader = AsyncDocLoader(adb)
+    games = await stream_all(adb.collection('games'))
+
+    async def location_name(game):
+        location_id = game.to_dict().get('locationId')
+        if not location_id:
+            return None
+        location = await loader.load(adb.collection('locations').document(location_id))
+        return location.to_dict().get('name') if location.exists else None
+
+    # Os locais pedidos no mesmo ciclo viram um get_all; as contagens vao em paralelo pelo semaforo
+    names, counts = await asyncio.gather(
+        asyncio.gather(*(location_name(game) for game in games)),
+        gather_bounded([count_docs(adb.collection('games').document(game.id).collection('confirmations'))
+                        for game in games], limit=concurrency),
+    )
+
+    for game, name, count in zip(games, names, counts):
+        print_game(game, name, count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lista os jogos com local e confirmacoes')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Usa o cliente assincrono (leituras em paralelo)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Leituras simultaneas no modo --async')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("VERIFICAR JOGO")
+    print("="*60 + "\n")
+
+    print("JOGOS CADASTRADOS:\n")
+    if args.use_async:
+        asyncio.run(check_games_async(args.concurrency))
+    else:
+        check_games()
+
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
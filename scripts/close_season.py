@@ -0,0 +1,197 @@
+"""
+Encerra uma temporada aplicando promocao e rebaixamento de divisao
+
+Percorre as participacoes da temporada que fecha (leitura com projecao, em
+paginas ordenadas por ID), calcula a nova divisao de cada jogador com
+promotionThreshold/relegationThreshold e cria a participacao na proxima
+temporada. Cada pagina e gravada em um batch junto com o checkpoint em
+season_rollovers/{seasonId}, entao a execucao pode ser interrompida e
+retomada sem duplicar nem pular jogadores, e rodar de novo depois de
+concluida nao faz nada.
+
+Uso:
+    python scripts/close_season.py                        # temporada ativa -> proxima
+    python scripts/close_season.py --season ID --next ID
+    python scripts/close_season.py --dry-run
+"""
+
+import argparse
+
+from firebase_admin import firestore
+
+from recompute_season_standings import db, existing_participations, get_season, participation_ref
+
+DIVISIONS = ['BRONZE', 'PRATA', 'OURO', 'DIAMANTE']
+
+# Cada jogador gera uma escrita; sobra espaco para o checkpoint no limite de 500 do batch
+DEFAULT_PAGE_SIZE = 400
+
+PARTICIPATION_FIELDS = ['userId', 'points', 'division']
+
+
+def next_division(division, points, promotion_threshold, relegation_threshold):
+    """Sobe uma divisao ao atingir a promocao, desce uma abaixo do rebaixamento"""
+    idx = DIVISIONS.index(division) if division in DIVISIONS else 0
+    if promotion_threshold is not None and points >= promotion_threshold:
+        idx = min(idx + 1, len(DIVISIONS) - 1)
+    elif relegation_threshold is not None and points < relegation_threshold:
+        idx = max(idx - 1, 0)
+    return DIVISIONS[idx]
+
+
+def find_next_season(season_data):
+    """Primeira temporada que comeca depois do fim da temporada informada"""
+    for doc in (db.collection('seasons')
+                .where('startDate', '>', season_data['endDate'])
+                .order_by('startDate')
+                .limit(1)
+                .stream()):
+        return doc
+    return None
+
+
+def rollover(season, next_season, page_size=DEFAULT_PAGE_SIZE, dry_run=False):
+    season_id = season.id
+    season_data = season.to_dict()
+    next_id = next_season.id
+    promotion = season_data.get('promotionThreshold')
+    relegation = season_data.get('relegationThreshold')
+
+    checkpoint_ref = db.collection('season_rollovers').document(season_id)
+    checkpoint = checkpoint_ref.get()
+    progress = checkpoint.to_dict() if checkpoint.exists else {}
+
+    if progress.get('status') == 'DONE':
+        print(f"Temporada {season_id} ja encerrada em {progress.get('toSeasonId')}. Nada a fazer.")
+        return progress
+    if progress and progress.get('toSeasonId') != next_id:
+        print(f"ERRO: Virada em andamento para outra temporada ({progress.get('toSeasonId')})")
+        return None
+
+    counters = {key: progress.get(key, 0) for key in ('processed', 'promoted', 'relegated')}
+    cursor = None
+    if progress.get('lastDocId'):
+        cursor = db.collection('season_participations').document(progress['lastDocId']).get()
+        print(f"Retomando apos {progress['lastDocId']} ({counters['processed']} ja processados)")
+
+    # Participacoes que ja existem na proxima temporada (ex.: jogos ja aplicados)
+    next_existing = existing_participations(next_id)
+
+    base_query = (db.collection('season_participations')
+                  .where('seasonId', '==', season_id)
+                  .order_by('__name__')
+                  .select(PARTICIPATION_FIELDS))
+
+    while True:
+        query = base_query.limit(page_size)
+        if cursor is not None:
+            query = query.start_after(cursor)
+        page = list(query.stream())
+        if not page:
+            break
+
+        batch = db.batch()
+        for doc in page:
+            data = doc.to_dict()
+            user_id = data.get('userId')
+            old_division = data.get('division') if data.get('division') in DIVISIONS else DIVISIONS[0]
+            new_division = next_division(old_division, data.get('points', 0) or 0, promotion, relegation)
+
+            if DIVISIONS.index(new_division) > DIVISIONS.index(old_division):
+                counters['promoted'] += 1
+            elif DIVISIONS.index(new_division) < DIVISIONS.index(old_division):
+                counters['relegated'] += 1
+
+            update = {
+                'seasonId': next_id,
+                'userId': user_id,
+                'division': new_division,
+                'previousDivision': old_division,
+            }
+            ref = next_existing.get(user_id)
+            if ref is None:
+                ref = participation_ref(next_id, user_id)
+                update.update({
+                    'points': 0,
+                    'gamesPlayed': 0,
+                    'goalsScored': 0,
+                    'assists': 0,
+                    'cleanSheets': 0,
+                    'mvpCount': 0,
+                    'joinedAt': firestore.SERVER_TIMESTAMP,
+                })
+            batch.set(ref, update, merge=True)
+
+        counters['processed'] += len(page)
+        cursor = page[-1]
+        batch.set(checkpoint_ref, {
+            'fromSeasonId': season_id,
+            'toSeasonId': next_id,
+            'lastDocId': cursor.id,
+            'status': 'RUNNING',
+            'updatedAt': firestore.SERVER_TIMESTAMP,
+            **counters,
+        })
+
+        if dry_run:
+            print(f"  Pagina calculada (nao gravada): {counters['processed']} jogadores")
+        else:
+            batch.commit()
+            print(f"  Pagina gravada: {counters['processed']} jogadores")
+
+    # Fecha a temporada, ativa a proxima e marca o checkpoint como concluido
+    batch = db.batch()
+    batch.update(season.reference, {'isActive': False, 'closedAt': firestore.SERVER_TIMESTAMP})
+    batch.update(next_season.reference, {'isActive': True})
+    batch.set(checkpoint_ref, {
+        'fromSeasonId': season_id,
+        'toSeasonId': next_id,
+        'status': 'DONE',
+        'updatedAt': firestore.SERVER_TIMESTAMP,
+        **counters,
+    }, merge=True)
+    if not dry_run:
+        batch.commit()
+
+    print(f"\nJogadores processados: {counters['processed']}")
+    print(f"Promovidos: {counters['promoted']}")
+    print(f"Rebaixados: {counters['relegated']}")
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Encerra a temporada com promocao e rebaixamento')
+    parser.add_argument('--season', help='ID da temporada a encerrar (padrao: temporada ativa)')
+    parser.add_argument('--next', help='ID da proxima temporada (padrao: a seguinte por data)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help='Participacoes por batch (maximo 499)')
+    parser.add_argument('--dry-run', action='store_true', help='Calcula sem gravar')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("ENCERRAR TEMPORADA")
+    print("="*60 + "\n")
+
+    season = get_season(args.season)
+    if season is None:
+        print("ERRO: Temporada nao encontrada!")
+        exit(1)
+
+    next_season = get_season(args.next) if args.next else find_next_season(season.to_dict())
+    if next_season is None:
+        print("ERRO: Proxima temporada nao encontrada! Crie-a antes (automate_seasons.js)")
+        exit(1)
+
+    print(f"Encerrando: {season.to_dict().get('name')} ({season.id})")
+    print(f"Proxima: {next_season.to_dict().get('name')} ({next_season.id})\n")
+
+    rollover(season, next_season, page_size=min(args.page_size, 499), dry_run=args.dry_run)
+
+    if args.dry_run:
+        print("\n(dry-run: nada foi gravado)")
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Declarative codemod engine for the Kotlin sources.
+
+A migration is data: a RuleSet names the tree it applies to (root, file
+suffix, excluded path fragments) and a list of rules:
+    RemoveImport(pattern)          drop `import <pattern>` lines
+    StripAnnotation(name)          drop `@Name` (own line or followed by a space)
+    RenameCall(old, new)           rename `old(...)` calls, outside comments and strings
+    ReplaceRegex(pattern, repl)    anything else, as a regex substitution
+
+Every selected rule set runs in ONE traversal: the roots are walked once,
+each file is read once, a multi-pattern prefilter on its raw bytes picks the
+rules whose trigger occurs in it (files with none are not even decoded), and
+all rules contribute edits against the original content that are spliced in
+a single pass (source_edits.py). Files are processed in parallel and written
+atomically, only when they change.
+
+Rule sets can also come from a JSON file (--rules):
+    [{"name": "compose-rename", "root": "app/src/main/java", "exclude": ["/di/"],
+      "rules": [{"type": "rename_call", "old": "Foo", "new": "Bar"}]}]
+
+Usage:
+    python3 scripts/codemod.py --list
+    python3 scripts/codemod.py javax-inject [--rules FILE.json] [--dry-run | --diff] [--workers N]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from kotlin_lexer import CallIndex
+from multi_pattern import MultiPattern
+from source_edits import Edit, apply_edits, unified_diff, write_atomic
+from source_files import CHUNKS_PER_WORKER, balanced_chunks, read_source
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RemoveImport:
+    def __init__(self, pattern):
+        self.name = f'remove import {pattern}'
+        self.trigger = 'import'
+        self.regex = re.compile(rf'^[ \t]*import[ \t]+(?:{pattern})[ \t]*\r?\n', re.MULTILINE)
+
+    def edits(self, content):
+        return [Edit(m.start(), m.end() - m.start(), '') for m in self.regex.finditer(content)]
+
+
+class StripAnnotation:
+    def __init__(self, annotation):
+        self.name = f'strip @{annotation}'
+        self.trigger = '@' + annotation
+        self.regex = re.compile(rf'(?<![\w.@])@{re.escape(annotation)}(?:\r?\n| )')
+
+    def edits(self, content):
+        return [Edit(m.start(), m.end() - m.start(), '') for m in self.regex.finditer(content)]
+
+
+class RenameCall:
+    def __init__(self, old, new):
+        self.name = f'rename {old}() -> {new}()'
+        self.trigger = old
+        self.old = old
+        self.new = new
+
+    def edits(self, content):
+        return [Edit(call.start, len(self.old), self.new)
+                for call in CallIndex(content).calls_named(self.old) if not call.declaration]
+
+
+class ReplaceRegex:
+    def __init__(self, pattern, replacement, trigger=None, flags=0):
+        self.name = f'replace /{pattern}/'
+        self.trigger = trigger          # None: the rule runs on every file
+        self.regex = re.compile(pattern, flags)
+        self.replacement = replacement
+
+    def edits(self, content):
+        return [Edit(m.start(), m.end() - m.start(), m.expand(self.replacement))
+                for m in self.regex.finditer(content)]
+
+
+RULE_TYPES = {
+    'remove_import': lambda spec: RemoveImport(spec['pattern']),
+    'strip_annotation': lambda spec: StripAnnotation(spec['annotation']),
+    'rename_call': lambda spec: RenameCall(spec['old'], spec['new']),
+    'replace_regex': lambda spec: ReplaceRegex(spec['pattern'], spec['replacement'], spec.get('trigger')),
+}
+
+
+class RuleSet:
+    def __init__(self, name, rules, root='app/src/main/java', suffix='.kt', exclude=()):
+        self.name = name
+        self.rules = rules
+        self.root = root
+        self.suffix = suffix
+        self.exclude = list(exclude)
+
+    def matches(self, rel_path):
+        rel_path = rel_path.replace('\\', '/')
+        return (rel_path.startswith(self.root.rstrip('/') + '/') and rel_path.endswith(self.suffix)
+                and not any(fragment in rel_path for fragment in self.exclude))
+
+    @classmethod
+    def from_dict(cls, spec):
+        rules = []
+        for rule in spec['rules']:
+            if rule.get('type') not in RULE_TYPES:
+                raise ValueError(f"{spec['name']}: tipo de regra desconhecido: {rule.get('type')}")
+            rules.append(RULE_TYPES[rule['type']](rule))
+        return cls(spec['name'], rules, spec.get('root', 'app/src/main/java'),
+                   spec.get('suffix', '.kt'), spec.get('exclude', ()))
+
+
+# Migrations known to the engine (select them by name on the command line)
+RULE_SETS = {
+    'javax-inject': RuleSet(
+        'javax-inject',
+        [
+            RemoveImport(r'javax\.inject\.(?:Inject|Singleton|Named|Qualifier)'),
+            StripAnnotation('Inject'),
+            StripAnnotation('Singleton'),
+        ],
+        exclude=['/di/'],
+    ),
+}
+
+
+def load_rule_sets(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [RuleSet.from_dict(spec) for spec in (data if isinstance(data, list) else [data])]
+
+
+def rewrite_file(path, rules, prefilter, mode):
+    """Returns (changed, Counter of edits per rule name, diff text or None)"""
+    # The trigger prefilter runs on the raw bytes: a file no rule applies to is never decoded
+    content, present = read_source(path, prefilter)
+    if content is None:
+        if all(rule.trigger is not None for rule in rules):
+            return False, Counter(), None
+        content, _ = read_source(path)
+
+    edits = []
+    counts = Counter()
+    for rule in rules:
+        if rule.trigger is not None and rule.trigger.encode() not in present:
+            continue
+        rule_edits = rule.edits(content)
+        if rule_edits:
+            counts[rule.name] += len(rule_edits)
+            edits.extend(rule_edits)
+
+    if not edits:
+        return False, counts, None
+    new_content = apply_edits(content, edits)
+    if new_content == content:
+        return False, Counter(), None
+
+    if mode == 'diff':
+        return True, counts, unified_diff(path, content, new_content, label=os.path.relpath(path, PROJECT_ROOT))
+    if mode == 'write':
+        write_atomic(path, new_content)
+    return True, counts, None
+
+
+def rewrite_chunk(task):
+    rule_sets, files, mode = task
+    prefilters = {}
+    results = []
+    for path, set_indices in files:
+        rules = [rule for idx in set_indices for rule in rule_sets[idx].rules]
+        if set_indices not in prefilters:
+            triggers = [rule.trigger.encode() for rule in rules if rule.trigger is not None]
+            prefilters[set_indices] = MultiPattern(triggers) if triggers else None
+        results.append((path, *rewrite_file(path, rules, prefilters[set_indices], mode)))
+    return results
+
+
+def collect_files(rule_sets):
+    """One walk over the union of the rule set roots: (path, indices of the rule sets that apply)"""
+    roots = sorted({rule_set.root.rstrip('/') for rule_set in rule_sets})
+    top_roots = [root for root in roots if not any(root.startswith(other + '/') for other in roots)]
+
+    files = []
+    for root in top_roots:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(PROJECT_ROOT, root)):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(path, PROJECT_ROOT)
+                indices = tuple(idx for idx, rule_set in enumerate(rule_sets) if rule_set.matches(rel_path))
+                if indices:
+                    files.append((path, indices))
+    return files
+
+
+def run(rule_sets, mode='write', workers=None):
+    """
+    Apply every rule set in one traversal. mode: 'write', 'dry-run' or 'diff'.
+    Returns [(path, changed, counts, diff)] in path order.
+    """
+    files = collect_files(rule_sets)
+    workers = workers or os.cpu_count() or 1
+    indices_of = dict(files)
+
+    if workers == 1 or len(files) < 2:
+        return rewrite_chunk((rule_sets, files, mode))
+
+    results = []
+    chunks = balanced_chunks([path for path, _ in files], workers * CHUNKS_PER_WORKER)
+    tasks = [(rule_sets, [(path, indices_of[path]) for path in chunk], mode) for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_result in pool.map(rewrite_chunk, tasks):
+            results.extend(chunk_result)
+    return sorted(results, key=lambda result: result[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aplica migracoes declarativas nos fontes Kotlin')
+    parser.add_argument('names', nargs='*', help='Rule sets embutidos a aplicar (ver --list)')
+    parser.add_argument('--rules', metavar='FILE.json', action='append', default=[],
+                        help='Rule sets adicionais em JSON (pode repetir)')
+    parser.add_argument('--list', action='store_true', help='Lista os rule sets embutidos')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--dry-run', action='store_true', help='Conta as mudancas sem gravar')
+    group.add_argument('--diff', action='store_true', help='Imprime as mudancas como diff unificado, sem gravar')
+    parser.add_argument('--workers', type=int, default=None, help='Processos (padrao: numero de CPUs)')
+    args = parser.parse_args()
+
+    if args.list:
+        for rule_set in RULE_SETS.values():
+            print(f'{rule_set.name}: {rule_set.root}/**/*{rule_set.suffix}')
+            for rule in rule_set.rules:
+                print(f'    {rule.name}')
+        return
+
+    unknown = [name for name in args.names if name not in RULE_SETS]
+    if unknown:
+        print(f"ERRO: rule set desconhecido: {', '.join(unknown)} (ver --list)")
+        exit(1)
+    rule_sets = [RULE_SETS[name] for name in args.names]
+    for path in args.rules:
+        rule_sets.extend(load_rule_sets(path))
+    if not rule_sets:
+        parser.error('informe ao menos um rule set ou --rules')
+
+    mode = 'diff' if args.diff else 'dry-run' if args.dry_run else 'write'
+    # Com --diff o stdout e so o patch; mensagens vao para o stderr
+    out = sys.stderr if args.diff else sys.stdout
+
+    results = run(rule_sets, mode, args.workers)
+    totals = Counter()
+    changed = 0
+    for path, file_changed, counts, diff in results:
+        if not file_changed:
+            continue
+        changed += 1
+        totals.update(counts)
+        if diff:
+            sys.stdout.write(diff)
+        print(f'Fixed: {os.path.relpath(path, PROJECT_ROOT)}', file=out)
+
+    print(f'\nArquivos analisados: {len(results)}', file=out)
+    for name, count in sorted(totals.items()):
+        print(f'  {name}: {count}', file=out)
+    suffix = ' (nada gravado)' if mode != 'write' else ''
+    print(f'Total: {changed}{suffix}', file=out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Disponibilidade de quadras e deteccao de reservas sobrepostas
+
+Monta, a partir de uma unica leitura com projecao de locais, quadras e jogos,
+um indice de intervalos por quadra: inicios ordenados e o maior fim acumulado,
+de modo que "a quadra esta livre neste horario?" e uma busca binaria
+(O(log n)), mesmo com um ano de reservas de todos os locais.
+
+Uso:
+    python scripts/court_availability.py --weekday quinta --start 19:00 --end 20:00
+    python scripts/court_availability.py --date 2026-03-12 --start 19:00 --end 20:00
+    python scripts/court_availability.py --conflicts
+"""
+
+import argparse
+import bisect
+from collections import defaultdict
+from datetime import date, timedelta
+
+from materialize_recurring_games import db, game_slot, to_minutes
+
+WEEKDAYS = {
+    'segunda': 1, 'terca': 2, 'quarta': 3, 'quinta': 4,
+    'sexta': 5, 'sabado': 6, 'domingo': 7,
+}
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def absolute_minutes(day, minutes):
+    """Minutos absolutos (data + hora) para comparar intervalos de dias diferentes"""
+    return date.fromisoformat(day).toordinal() * MINUTES_PER_DAY + minutes
+
+
+class CourtIntervalIndex:
+    """Intervalos ocupados de uma quadra, ordenados pelo inicio"""
+
+    def __init__(self, intervals):
+        # intervals: [(inicio, fim, game_id)] em minutos absolutos
+        self.intervals = sorted(intervals)
+        self.starts = [start for start, _, _ in self.intervals]
+        self.max_end = []
+        running = None
+        for _, end, _ in self.intervals:
+            running = end if running is None else max(running, end)
+            self.max_end.append(running)
+
+    def is_free(self, start, end):
+        """Nenhum jogo que comeca antes de `end` termina depois de `start`"""
+        idx = bisect.bisect_left(self.starts, end)
+        return idx == 0 or self.max_end[idx - 1] <= start
+
+    def overlaps(self):
+        """Pares (game_id, game_id) com horarios sobrepostos, em uma varredura"""
+        pairs = []
+        active = []  # (fim, game_id) dos jogos que ainda podem sobrepor
+        for start, end, game_id in self.intervals:
+            active = [(other_end, other_id) for other_end, other_id in active if other_end > start]
+            pairs.extend((other_id, game_id) for _, other_id in active)
+            active.append((end, game_id))
+        return pairs
+
+
+def location_id_of(field_data):
+    # Quadras antigas usam location_id, as mais novas locationId
+    return field_data.get('location_id') or field_data.get('locationId')
+
+
+def load_data(date_from=None, date_to=None):
+    """Locais, quadras e indice de intervalos por quadra"""
+    venues = {
+        loc.id: loc.to_dict()
+        for loc in (db.collection('locations')
+                    .select(['name', 'opening_time', 'closing_time', 'operating_days'])
+                    .stream())
+    }
+
+    courts = {}
+    for field in db.collection('fields').select(['name', 'type', 'location_id', 'locationId']).stream():
+        data = field.to_dict()
+        data['location'] = location_id_of(data)
+        courts[field.id] = data
+
+    query = db.collection('games')
+    if date_from:
+        query = query.where('date', '>=', date_from)
+    if date_to:
+        query = query.where('date', '<=', date_to)
+
+    intervals = defaultdict(list)
+    games = {}
+    for game in query.select(['date', 'time', 'endTime', 'fieldId', 'status']).stream():
+        data = game.to_dict()
+        if data.get('status') == 'CANCELLED' or not data.get('fieldId') or not data.get('date'):
+            continue
+        start, end = game_slot(data)
+        intervals[data['fieldId']].append(
+            (absolute_minutes(data['date'], start), absolute_minutes(data['date'], end), game.id))
+        games[game.id] = data
+
+    index = {field_id: CourtIntervalIndex(items) for field_id, items in intervals.items()}
+    return venues, courts, index, games
+
+
+def venue_open(venue, weekday, start, end):
+    """Local funciona no dia da semana (1=segunda) e cobre o horario pedido"""
+    days = venue.get('operating_days')
+    if days and weekday not in days:
+        return False
+    opening = to_minutes(venue['opening_time']) if venue.get('opening_time') else 0
+    closing = to_minutes(venue['closing_time']) if venue.get('closing_time') else MINUTES_PER_DAY
+    return opening <= start and end <= closing
+
+
+def free_courts(venues, courts, index, day, start, end):
+    """Quadras livres no dia e horario, em locais abertos"""
+    weekday = date.fromisoformat(day).isoweekday()
+    abs_start = absolute_minutes(day, start)
+    abs_end = absolute_minutes(day, end)
+
+    free = []
+    for field_id, court in courts.items():
+        venue = venues.get(court['location'])
+        if venue is None or not venue_open(venue, weekday, start, end):
+            continue
+        court_index = index.get(field_id)
+        if court_index is None or court_index.is_free(abs_start, abs_end):
+            free.append((venue.get('name', ''), court.get('name', ''), court.get('type', ''), field_id))
+    return sorted(free)
+
+
+def next_weekday(weekday):
+    today = date.today()
+    return today + timedelta(days=(weekday - today.isoweekday()) % 7)
+
+
+def print_free(venues, courts, index, day, start_str, end_str):
+    free = free_courts(venues, courts, index, day, to_minutes(start_str), to_minutes(end_str))
+    print(f"Quadras livres em {day} das {start_str} as {end_str}: {len(free)}\n")
+    current_venue = None
+    for venue_name, court_name, court_type, field_id in free:
+        if venue_name != current_venue:
+            print(f"{venue_name}:")
+            current_venue = venue_name
+        print(f"  - {court_name} ({court_type}) [{field_id}]")
+
+
+def print_conflicts(courts, index, games):
+    total = 0
+    for field_id, court_index in sorted(index.items()):
+        pairs = court_index.overlaps()
+        if not pairs:
+            continue
+        print(f"{courts.get(field_id, {}).get('name', 'QUADRA NAO ENCONTRADA')} [{field_id}]:")
+        for first, second in pairs:
+            a, b = games[first], games[second]
+            print(f"  ! {first} ({a['date']} {a.get('time')}-{a.get('endTime')})"
+                  f" x {second} ({b['date']} {b.get('time')}-{b.get('endTime')})")
+        total += len(pairs)
+    print(f"\nReservas sobrepostas: {total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quadras livres e reservas sobrepostas')
+    parser.add_argument('--date', help='Data (AAAA-MM-DD)')
+    parser.add_argument('--weekday', choices=sorted(WEEKDAYS), help='Proximo dia da semana')
+    parser.add_argument('--start', default='19:00', help='Inicio (HH:MM)')
+    parser.add_argument('--end', default='20:00', help='Fim (HH:MM)')
+    parser.add_argument('--conflicts', action='store_true', help='Lista jogos sobrepostos na mesma quadra')
+    parser.add_argument('--from', dest='date_from', help='Considera jogos a partir desta data')
+    parser.add_argument('--to', dest='date_to', help='Considera jogos ate esta data')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("DISPONIBILIDADE DE QUADRAS")
+    print("="*60 + "\n")
+
+    if args.conflicts:
+        _, courts, index, games = load_data(args.date_from, args.date_to)
+        print_conflicts(courts, index, games)
+    else:
+        day = args.date or next_weekday(WEEKDAYS[args.weekday or 'quinta']).isoformat()
+        venues, courts, index, _ = load_data(args.date_from or day, args.date_to or day)
+        print_free(venues, courts, index, day, args.start, args.end)
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
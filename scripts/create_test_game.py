@@ -1,7 +1,16 @@
-"""Cria um jogo de teste válido"""
+"""Cria um jogo de teste válido
+
+Uso:
+    python scripts/create_test_game.py
+    python scripts/create_test_game.py --async    # quadra e usuário buscados em paralelo
+"""
 import firebase_admin
 from firebase_admin import credentials, firestore
 from datetime import datetime, timedelta
+import argparse
+import asyncio
+
+from async_firestore import async_client, stream_all
 
 try:
     firebase_admin.get_app()
@@ -11,82 +20,138 @@ except:
 
 db = firestore.client()
 
-print("\n" + "="*60)
-print("CRIAR JOGO DE TESTE")
-print("="*60 + "\n")
-
-# Pegar todas as quadras e pegar a primeira
-fields = list(db.collection('fields').stream())
-if not fields:
-    print("ERRO: Nenhuma quadra encontrada!")
-    exit(1)
-
-field = fields[0]
-field_data = field.to_dict()
-field_id = field.id
-location_id = field_data.get('locationId')
-
-print(f"Quadra selecionada: {field_data.get('name')} (ID: {field_id})")
-print(f"Location ID: {location_id}")
-
-# Pegar o local
-location = db.collection('locations').document(location_id).get()
-if not location.exists:
-    print("ERRO: Local não encontrado!")
-    exit(1)
-
-location_data = location.to_dict()
-print(f"Local: {location_data.get('name')}")
-
-# Pegar todos os usuários e pegar o primeiro
-users = list(db.collection('users').stream())
-if not users:
-    print("ERRO: Nenhum usuário encontrado!")
-    exit(1)
-
-user = users[0]
-user_data = user.to_dict()
-user_id = user.id
-
-print(f"Usuário: {user_data.get('name')}")
-
-# Criar jogo para amanhã às 19h
-tomorrow = datetime.now() + timedelta(days=1)
-game_date = tomorrow.strftime('%Y-%m-%d')
-game_time = "19:00"
-game_end_time = "20:00"
-
-game_data = {
-    'date': game_date,
-    'time': game_time,
-    'endTime': game_end_time,
-    'locationId': location_id,
-    'fieldId': field_id,
-    'locationName': location_data.get('name'),
-    'locationAddress': location_data.get('address'),
-    'locationLat': location_data.get('latitude'),
-    'locationLng': location_data.get('longitude'),
-    'fieldName': field_data.get('name'),
-    'gameType': field_data.get('type'),
-    'ownerName': user_data.get('name'),
-    'ownerId': user_id,
-    'dailyPrice': 60.0,
-    'maxPlayers': 14,
-    'maxGoalkeepers': 2,
-    'confirmationCount': 0,
-    'goalkeeperCount': 0,
-    'recurrence': 'none',
-    'status': 'SCHEDULED',
-    'createdAt': firestore.SERVER_TIMESTAMP
-}
-
-print(f"\nCriando jogo:")
-print(f"  Data: {game_date}")
-print(f"  Horário: {game_time} - {game_end_time}")
-
-doc_ref = db.collection('games').add(game_data)
-game_id = doc_ref[1].id
-
-print(f"\nJogo criado com sucesso!")
-print(f"ID: {game_id}")
-print("\n" + "="*60 + "\n")
+
+def build_game(field, location_data, user):
+    field_data = field.to_dict()
+    user_data = user.to_dict()
+
+    # Criar jogo para amanhã às 19h
+    tomorrow = datetime.now() + timedelta(days=1)
+    return {
+        'date': tomorrow.strftime('%Y-%m-%d'),
+        'time': "19:00",
+        'endTime': "20:00",
+        'locationId': field_data.get('locationId'),
+        'fieldId': field.id,
+        'locationName': location_data.get('name'),
+        'locationAddress': location_data.get('address'),
+        'locationLat': location_data.get('latitude'),
+        'locationLng': location_data.get('longitude'),
+        'fieldName': field_data.get('name'),
+        'gameType': field_data.get('type'),
+        'ownerName': user_data.get('name'),
+        'ownerId': user.id,
+        'dailyPrice': 60.0,
+        'maxPlayers': 14,
+        'maxGoalkeepers': 2,
+        'confirmationCount': 0,
+        'goalkeeperCount': 0,
+        'recurrence': 'none',
+        'status': 'SCHEDULED',
+        'createdAt': firestore.SERVER_TIMESTAMP
+    }
+
+
+def print_field(field):
+    field_data = field.to_dict()
+    print(f"Quadra selecionada: {field_data.get('name')} (ID: {field.id})")
+    print(f"Location ID: {field_data.get('locationId')}")
+
+
+def print_game(game_data):
+    print(f"\nCriando jogo:")
+    print(f"  Data: {game_data['date']}")
+    print(f"  Horário: {game_data['time']} - {game_data['endTime']}")
+
+
+def create_game():
+    # Pegar todas as quadras e pegar a primeira
+    fields = list(db.collection('fields').stream())
+    if not fields:
+        print("ERRO: Nenhuma quadra encontrada!")
+        exit(1)
+
+    field = fields[0]
+    print_field(field)
+
+    # Pegar o local
+    location = db.collection('locations').document(field.to_dict().get('locationId')).get()
+    if not location.exists:
+        print("ERRO: Local não encontrado!")
+        exit(1)
+
+    location_data = location.to_dict()
+    print(f"Local: {location_data.get('name')}")
+
+    # Pegar todos os usuários e pegar o primeiro
+    users = list(db.collection('users').stream())
+    if not users:
+        print("ERRO: Nenhum usuário encontrado!")
+        exit(1)
+
+    user = users[0]
+    print(f"Usuário: {user.to_dict().get('name')}")
+
+    game_data = build_game(field, location_data, user)
+    print_game(game_data)
+
+    doc_ref = db.collection('games').add(game_data)
+    return doc_ref[1].id
+
+
+async def create_game_async():
+    adb = async_client()
+
+    # Primeira quadra e primeiro usuário em paralelo; o local depende da quadra
+    fields, users = await asyncio.gather(
+        stream_all(adb.collection('fields').limit(1)),
+        stream_all(adb.collection('users').limit(1)),
+    )
+    if not fields:
+        print("ERRO: Nenhuma quadra encontrada!")
+        exit(1)
+
+    field = fields[0]
+    print_field(field)
+
+    location = await adb.collection('locations').document(field.to_dict().get('locationId')).get()
+    if not location.exists:
+        print("ERRO: Local não encontrado!")
+        exit(1)
+
+    location_data = location.to_dict()
+    print(f"Local: {location_data.get('name')}")
+
+    if not users:
+        print("ERRO: Nenhum usuário encontrado!")
+        exit(1)
+
+    user = users[0]
+    print(f"Usuário: {user.to_dict().get('name')}")
+
+    game_data = build_game(field, location_data, user)
+    print_game(game_data)
+
+    doc_ref = await adb.collection('games').add(game_data)
+    return doc_ref[1].id
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cria um jogo de teste para amanhã às 19h')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Usa o cliente assincrono (leituras em paralelo)')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("CRIAR JOGO DE TESTE")
+    print("="*60 + "\n")
+
+    game_id = asyncio.run(create_game_async()) if args.use_async else create_game()
+
+    print(f"\nJogo criado com sucesso!")
+    print(f"ID: {game_id}")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Carregador de documentos com agrupamento de buscas e memoizacao (estilo DataLoader)
+
+As buscas por referencia feitas antes do primeiro resultado ser pedido sao
+juntadas e resolvidas com um unico get_all; buscas repetidas da mesma
+referencia viram uma so e o resultado fica em cache durante a execucao
+(opcionalmente limitado, com descarte LRU).
+
+- DocLoader (cliente sincrono): load() devolve um handle preguicoso; o
+  primeiro handle.result() dispara o get_all de tudo que esta pendente.
+- AsyncDocLoader (cliente assincrono): as chamadas de `await load()` feitas
+  no mesmo ciclo do loop viram um get_all.
+
+Uso:
+    loader = DocLoader(db)
+    handles = [loader.load(db.collection('locations').document(i)) for i in ids]
+    names = [h.result().to_dict().get('name') for h in handles if h.result().exists]  # 1 RPC
+
+    loader = AsyncDocLoader(adb)
+    snaps = await asyncio.gather(*(loader.load(adb.collection('locations').document(i)) for i in ids))
+"""
+
+import asyncio
+from collections import OrderedDict
+
+# Referencias por chamada de get_all
+LOAD_BATCH_SIZE = 100
+
+# Limite do operador 'in' do Firestore
+IN_QUERY_LIMIT = 30
+
+
+class _Cache:
+    """Snapshots por caminho; com max_size, descarta o menos usado"""
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self._items = OrderedDict()
+
+    def get(self, path):
+        snapshot = self._items.get(path)
+        if snapshot is not None:
+            self._items.move_to_end(path)
+        return snapshot
+
+    def put(self, path, snapshot):
+        self._items[path] = snapshot
+        self._items.move_to_end(path)
+        if self.max_size is not None and len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def clear(self, path=None):
+        if path is None:
+            self._items.clear()
+        else:
+            self._items.pop(path, None)
+
+
+class DocHandle:
+    """Resultado preguicoso de DocLoader.load()"""
+
+    def __init__(self, loader, path, snapshot=None):
+        self._loader = loader
+        self.path = path
+        self._snapshot = snapshot
+
+    def result(self):
+        if self._snapshot is None:
+            self._loader.dispatch()
+        return self._snapshot
+
+
+class DocLoader:
+    def __init__(self, client, max_size=None, batch_size=LOAD_BATCH_SIZE):
+        self._client = client
+        self._cache = _Cache(max_size)
+        self._batch_size = batch_size
+        self._pending = OrderedDict()  # caminho -> (referencia, [handles])
+        self.rpcs = 0
+        self.hits = 0
+
+    def load(self, ref):
+        snapshot = self._cache.get(ref.path)
+        if snapshot is not None:
+            self.hits += 1
+            return DocHandle(self, ref.path, snapshot)
+
+        handle = DocHandle(self, ref.path)
+        if ref.path in self._pending:
+            self.hits += 1
+            self._pending[ref.path][1].append(handle)
+        else:
+            self._pending[ref.path] = (ref, [handle])
+        return handle
+
+    def load_many(self, refs):
+        return [self.load(ref) for ref in refs]
+
+    def get(self, ref):
+        """Busca imediata (ainda aproveita o cache e o que estiver pendente)"""
+        return self.load(ref).result()
+
+    def dispatch(self):
+        """Resolve todas as buscas pendentes com get_all"""
+        pending = list(self._pending.values())
+        self._pending.clear()
+
+        for i in range(0, len(pending), self._batch_size):
+            chunk = pending[i:i + self._batch_size]
+            self.rpcs += 1
+            snapshots = {snap.reference.path: snap for snap in self._client.get_all([ref for ref, _ in chunk])}
+            for ref, handles in chunk:
+                snapshot = snapshots[ref.path]
+                self._cache.put(ref.path, snapshot)
+                for handle in handles:
+                    handle._snapshot = snapshot
+
+    def prime(self, snapshot):
+        """Guarda um documento ja lido (ex.: vindo de um stream)"""
+        self._cache.put(snapshot.reference.path, snapshot)
+
+    def clear(self, ref=None):
+        self._cache.clear(ref.path if ref is not None else None)
+
+
+class AsyncDocLoader:
+    def __init__(self, client, max_size=None, batch_size=LOAD_BATCH_SIZE):
+        self._client = client
+        self._cache = _Cache(max_size)
+        self._batch_size = batch_size
+        self._pending = OrderedDict()  # caminho -> (referencia, future)
+        self._scheduled = False
+        self.rpcs = 0
+        self.hits = 0
+
+    async def load(self, ref):
+        snapshot = self._cache.get(ref.path)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        if ref.path in self._pending:
+            self.hits += 1
+            future = self._pending[ref.path][1]
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[ref.path] = (ref, future)
+            if not self._scheduled:
+                # Espera o ciclo atual terminar para juntar as outras buscas
+                self._scheduled = True
+                loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        return await future
+
+    async def load_many(self, refs):
+        return await asyncio.gather(*(self.load(ref) for ref in refs))
+
+    async def _dispatch(self):
+        pending = list(self._pending.values())
+        self._pending.clear()
+        self._scheduled = False
+
+        chunks = [pending[i:i + self._batch_size] for i in range(0, len(pending), self._batch_size)]
+        await asyncio.gather(*(self._load_chunk(chunk) for chunk in chunks))
+
+    async def _load_chunk(self, chunk):
+        self.rpcs += 1
+        try:
+            snapshots = {snap.reference.path: snap
+                         async for snap in self._client.get_all([ref for ref, _ in chunk])}
+        except Exception as error:
+            for _, future in chunk:
+                future.set_exception(error)
+            return
+        for ref, future in chunk:
+            snapshot = snapshots[ref.path]
+            self._cache.put(ref.path, snapshot)
+            future.set_result(snapshot)
+
+    def prime(self, snapshot):
+        self._cache.put(snapshot.reference.path, snapshot)
+
+    def clear(self, ref=None):
+        self._cache.clear(ref.path if ref is not None else None)
+
+
+def where_in(query, field, values, fields=None):
+    """Uma consulta 'in' por pedaco de IN_QUERY_LIMIT valores distintos, em vez de uma por valor"""
+    values = sorted(set(values))
+    for i in range(0, len(values), IN_QUERY_LIMIT):
+        chunk_query = query.where(field, 'in', values[i:i + IN_QUERY_LIMIT])
+        if fields is not None:
+            chunk_query = chunk_query.select(fields)
+        yield from chunk_query.stream()
@@ -0,0 +1,346 @@
+"""
+Avalia as badges do catalogo (badges) sobre os jogos finalizados ainda nao processados
+
+Cada jogo novo vira um fluxo de eventos por jogador (jogou, gols, clean sheet,
+organizou). O estado minimo de cada jogador fica em badge_progress/{userId}
+(contadores e as datas jogadas recentes, ordenadas, para a sequencia de dias:
+datas que nenhum jogo ainda lido pode estender sao descartadas) e os gols do
+mes em badge_months/{YYYY-MM}, de onde sai o artilheiro quando o mes fecha.
+Assim cada execucao passa uma unica vez pelos jogos novos, sem reler o historico.
+
+Os jogos lidos sao so os finalizados a partir da marca d'agua em
+badge_state/games (data do jogo mais recente ja avaliado), menos uma folga
+de LOOKBACK_DAYS para jogos finalizados com atraso; o custo acompanha os
+jogos novos, nao o historico. Um jogo finalizado mais tarde que a folga so
+entra com --full, que varre todos os finalizados (sem sequencia de dias com
+datas ja descartadas).
+
+Uso:
+    python scripts/evaluate_badges.py
+    python scripts/evaluate_badges.py --dry-run
+    python scripts/evaluate_badges.py --full     # ignora a marca d'agua
+"""
+
+import argparse
+import bisect
+from collections import defaultdict
+from datetime import date, timedelta
+
+from firebase_admin import firestore
+
+from recompute_season_standings import (IN_QUERY_LIMIT, chunked, conceded_by_team,
+                                        db, is_goalkeeper, load_game_rows)
+
+# Requisitos usados quando o catalogo no Firestore nao define 'requirement'
+DEFAULT_REQUIREMENTS = {
+    'HAT_TRICK': 3,
+    'PAREDAO': 1,
+    'FOMINHA': 5,
+    'STREAK_7': 7,
+    'ARTILHEIRO_MES': 1,
+    'ORGANIZADOR_MASTER': 10,
+    'LENDA': 50,
+}
+
+# Badges que podem ser conquistadas mais de uma vez (incrementam unlock_count)
+REPEATABLE = {'HAT_TRICK', 'PAREDAO'}
+
+# Jogos com data ate tantos dias antes da marca d'agua ainda sao relidos
+LOOKBACK_DAYS = 14
+
+
+def trim_play_dates(play_dates, watermark, streak):
+    """
+    Descarta as datas que nao entram mais em uma sequencia de `streak` dias:
+    os proximos jogos lidos tem data >= marca d'agua - LOOKBACK_DAYS
+    """
+    cutoff = (date.fromisoformat(watermark) - timedelta(days=LOOKBACK_DAYS + streak - 1)).isoformat()
+    del play_dates[:bisect.bisect_left(play_dates, cutoff)]
+
+
+def streak_at(play_dates, day):
+    """Tamanho da sequencia de dias consecutivos que contem `day` (datas ordenadas)"""
+    idx = bisect.bisect_left(play_dates, day)
+    ordinal = date.fromisoformat(day).toordinal()
+
+    start = idx
+    while start > 0 and date.fromisoformat(play_dates[start - 1]).toordinal() == ordinal - (idx - start + 1):
+        start -= 1
+    end = idx
+    while end + 1 < len(play_dates) and date.fromisoformat(play_dates[end + 1]).toordinal() == ordinal + (end + 1 - idx):
+        end += 1
+
+    return end - start + 1
+
+
+# Regras do catalogo: tipo -> (evento que dispara, condicao(estado, evento, requisito))
+BADGE_RULES = {
+    'HAT_TRICK': ('played', lambda state, event, req: event['goals'] >= req),
+    'PAREDAO': ('played', lambda state, event, req: event['clean_sheet']),
+    'FOMINHA': ('played', lambda state, event, req: state['gamesPlayed'] >= req),
+    'STREAK_7': ('played', lambda state, event, req: streak_at(state['playDates'], event['date']) >= req),
+    'ORGANIZADOR_MASTER': ('organized', lambda state, event, req: state['gamesOrganized'] >= req),
+    'LENDA': ('profile', lambda state, event, req: (event.get('level') or 0) >= req),
+}
+
+
+def load_catalog():
+    """Le o catalogo de badges: tipo -> (badge_id, requisito)"""
+    catalog = {}
+    for badge in db.collection('badges').select(['type', 'requirement']).stream():
+        data = badge.to_dict()
+        badge_type = data.get('type')
+        if badge_type:
+            requirement = data.get('requirement') or DEFAULT_REQUIREMENTS.get(badge_type, 1)
+            catalog[badge_type] = (badge.id, requirement)
+    return catalog
+
+
+def watermark_ref():
+    return db.collection('badge_state').document('games')
+
+
+def load_watermark():
+    """Data do jogo mais recente ja avaliado, ou None na primeira execucao"""
+    snap = watermark_ref().get()
+    return (snap.to_dict() or {}).get('lastGameDate') if snap.exists else None
+
+
+def since_watermark(last):
+    """Data a partir da qual os jogos sao lidos: a marca d'agua menos a folga"""
+    return (date.fromisoformat(last) - timedelta(days=LOOKBACK_DAYS)).isoformat() if last else None
+
+
+def pending_games(since=None):
+    """Jogos finalizados (com data >= since) ainda nao avaliados, em ordem de data"""
+    games = {}
+    query = db.collection('games').where('status', '==', 'FINISHED')
+    if since:
+        query = query.where('date', '>=', since)
+    for game in query.select(['date', 'ownerId', 'badgesProcessed']).stream():
+        data = game.to_dict()
+        if not data.get('badgesProcessed') and data.get('date'):
+            games[game.id] = data
+    return dict(sorted(games.items(), key=lambda item: item[1]['date']))
+
+
+def build_events(games, confirmations, teams):
+    """Transforma jogos/confirmacoes em eventos por jogador, em ordem de data"""
+    conceded = conceded_by_team(teams)
+    by_game = defaultdict(list)
+    for conf in confirmations:
+        if conf.get('status') == 'CONFIRMED' and conf.get('user_id'):
+            by_game[conf['game_id']].append(conf)
+
+    events = []
+    for game_id, game in games.items():
+        if game.get('ownerId'):
+            events.append({'type': 'organized', 'user_id': game['ownerId'], 'date': game['date']})
+        for conf in by_game.get(game_id, []):
+            events.append({
+                'type': 'played',
+                'user_id': conf['user_id'],
+                'date': game['date'],
+                'goals': conf.get('goals', 0) or 0,
+                'clean_sheet': is_goalkeeper(conf) and conceded.get(conf.get('team_id')) == 0,
+            })
+    return events
+
+
+def get_docs(collection, ids, fields=None):
+    """Busca varios documentos por ID em um unico get_all"""
+    refs = [db.collection(collection).document(doc_id) for doc_id in ids]
+    return {doc.id: doc.to_dict() for doc in db.get_all(refs, field_paths=fields) if doc.exists}
+
+
+def load_awarded(user_ids):
+    """Badges ja conquistadas: (user_id, badge_id) -> referencia do documento"""
+    awarded = {}
+    for chunk in chunked(list(user_ids), IN_QUERY_LIMIT):
+        for doc in (db.collection('user_badges')
+                    .where('user_id', 'in', chunk)
+                    .select(['user_id', 'badge_id'])
+                    .stream()):
+            data = doc.to_dict()
+            awarded[(data.get('user_id'), data.get('badge_id'))] = doc.reference
+    return awarded
+
+
+class BadgeEvaluator:
+    """Aplica as regras do catalogo sobre o fluxo de eventos mantendo estado minimo por jogador"""
+
+    def __init__(self, catalog, progress, awarded):
+        self.catalog = catalog
+        self.progress = progress
+        self.awarded = awarded
+        self.month_goals = defaultdict(lambda: defaultdict(int))
+        self.unlocks = defaultdict(int)  # (user_id, badge_id) -> conquistas nesta execucao
+        self.touched = set()
+
+    def state_for(self, user_id):
+        if user_id not in self.progress:
+            self.progress[user_id] = {'gamesPlayed': 0, 'gamesOrganized': 0, 'playDates': []}
+        self.touched.add(user_id)
+        return self.progress[user_id]
+
+    def award(self, user_id, badge_type):
+        badge_id, _ = self.catalog[badge_type]
+        key = (user_id, badge_id)
+        if badge_type in REPEATABLE or (key not in self.awarded and key not in self.unlocks):
+            self.unlocks[key] += 1
+
+    def apply(self, event):
+        state = self.state_for(event['user_id'])
+
+        if event['type'] == 'played':
+            state['gamesPlayed'] += 1
+            if event['date'] not in state['playDates']:
+                bisect.insort(state['playDates'], event['date'])
+            if event['goals']:
+                self.month_goals[event['date'][:7]][event['user_id']] += event['goals']
+        elif event['type'] == 'organized':
+            state['gamesOrganized'] += 1
+
+        for badge_type, (trigger, condition) in BADGE_RULES.items():
+            if trigger == event['type'] and badge_type in self.catalog:
+                if condition(state, event, self.catalog[badge_type][1]):
+                    self.award(event['user_id'], badge_type)
+
+    def apply_profiles(self, users):
+        """Regras que dependem do perfil (nivel) dos jogadores tocados"""
+        for user_id, data in users.items():
+            event = {'type': 'profile', 'user_id': user_id, 'level': data.get('level')}
+            for badge_type, (trigger, condition) in BADGE_RULES.items():
+                if trigger == 'profile' and badge_type in self.catalog:
+                    if condition(self.progress.get(user_id, {}), event, self.catalog[badge_type][1]):
+                        self.award(user_id, badge_type)
+
+    def close_months(self, months, current_month):
+        """Premia o artilheiro de cada mes ja encerrado. Retorna os meses fechados"""
+        closed = []
+        if 'ARTILHEIRO_MES' not in self.catalog:
+            return closed
+
+        for month, entry in months.items():
+            goals = entry['goals']
+            if entry['awarded'] or month >= current_month or not goals:
+                continue
+            top = max(goals.values())
+            for user_id, total in goals.items():
+                if total == top:
+                    self.award(user_id, 'ARTILHEIRO_MES')
+            closed.append(month)
+        return closed
+
+
+def evaluate_badges(dry_run=False, full=False):
+    catalog = load_catalog()
+    if not catalog:
+        print("ERRO: Catalogo de badges vazio! Execute create_season_and_badges.py")
+        return None
+
+    watermark = load_watermark()
+    since = None if full else since_watermark(watermark)
+    games = pending_games(since)
+    print(f"Jogos lidos a partir de: {since or 'inicio (varredura completa)'}")
+    print(f"Jogos novos para avaliar: {len(games)}")
+
+    events = []
+    if games:
+        confirmations, teams = load_game_rows(games.keys())
+        events = build_events(games, confirmations, teams)
+    user_ids = {event['user_id'] for event in events}
+    print(f"Eventos: {len(events)} | Jogadores: {len(user_ids)}\n")
+
+    progress = get_docs('badge_progress', user_ids) if user_ids else {}
+    evaluator = BadgeEvaluator(catalog, progress, load_awarded(user_ids))
+    for event in events:
+        evaluator.apply(event)
+    if user_ids:
+        evaluator.apply_profiles(get_docs('users', user_ids, fields=['level']))
+
+    # Gols do mes: soma o que ja estava salvo com o que veio nos jogos novos. Meses
+    # ja encerrados sao fechados mesmo sem jogo novo
+    months = get_docs('badge_months', evaluator.month_goals.keys()) if evaluator.month_goals else {}
+    for doc in db.collection('badge_months').where('awarded', '==', False).stream():
+        months.setdefault(doc.id, doc.to_dict())
+    for month, goals in evaluator.month_goals.items():
+        entry = months.setdefault(month, {})
+        entry.setdefault('goals', {})
+        entry.setdefault('awarded', False)
+        for user_id, total in goals.items():
+            entry['goals'][user_id] = entry['goals'].get(user_id, 0) + total
+
+    # Artilheiros de meses antigos podem nao estar entre os jogadores dos jogos novos
+    scorers = {user_id for entry in months.values() if not entry['awarded'] for user_id in entry['goals']}
+    evaluator.awarded.update(load_awarded(scorers - user_ids))
+    closed = evaluator.close_months(months, date.today().strftime('%Y-%m'))
+
+    badge_names = {badge_id: badge_type for badge_type, (badge_id, _) in catalog.items()}
+    for (user_id, badge_id), count in sorted(evaluator.unlocks.items()):
+        print(f"  + {user_id[:20]:20} {badge_names.get(badge_id, badge_id)} x{count}")
+    print(f"\nBadges conquistadas: {len(evaluator.unlocks)}")
+    print(f"Meses encerrados: {', '.join(sorted(closed)) or 'nenhum'}")
+
+    if dry_run:
+        return evaluator.unlocks
+
+    writer = db.bulk_writer()
+    for (user_id, badge_id), count in evaluator.unlocks.items():
+        ref = evaluator.awarded.get((user_id, badge_id))
+        data = {'unlock_count': firestore.Increment(count)}
+        if ref is None:
+            ref = db.collection('user_badges').document(f'{user_id}_{badge_id}')
+            data.update({
+                'id': ref.id,
+                'user_id': user_id,
+                'badge_id': badge_id,
+                'unlocked_at': firestore.SERVER_TIMESTAMP,
+            })
+        writer.set(ref, data, merge=True)
+
+    last = max([game['date'] for game in games.values()] + [watermark or ''])
+    streak = catalog['STREAK_7'][1] if 'STREAK_7' in catalog else DEFAULT_REQUIREMENTS['STREAK_7']
+    for user_id in evaluator.touched:
+        if last:
+            trim_play_dates(evaluator.progress[user_id]['playDates'], last, streak)
+        writer.set(db.collection('badge_progress').document(user_id), evaluator.progress[user_id])
+
+    for month, entry in months.items():
+        if month not in evaluator.month_goals and month not in closed:
+            continue
+        writer.set(db.collection('badge_months').document(month),
+                   {'goals': entry['goals'], 'awarded': entry['awarded'] or month in closed})
+
+    for game_id in games:
+        writer.update(db.collection('games').document(game_id), {'badgesProcessed': True})
+
+    if games:
+        if last > (watermark or ''):
+            writer.set(watermark_ref(), {'lastGameDate': last, 'updatedAt': firestore.SERVER_TIMESTAMP})
+
+    writer.close()
+    return evaluator.unlocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Avalia as badges dos jogos finalizados')
+    parser.add_argument('--dry-run', action='store_true', help='Avalia sem gravar')
+    parser.add_argument('--full', action='store_true',
+                        help="Le todos os jogos finalizados, ignorando a marca d'agua")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("AVALIAR BADGES")
+    print("="*60 + "\n")
+
+    evaluate_badges(dry_run=args.dry_run, full=args.full)
+
+    if args.dry_run:
+        print("\n(dry-run: nada foi gravado)")
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,38 @@
 """
 Script para corrigir TODOS os accessibility issues automaticamente.
 Foca em adicionar contentDescription em Icons, Images e onClickLabel em Clickables.
+
+Cada fixer devolve edicoes (offset, tamanho, texto) sobre o conteudo original;
+elas sao aplicadas numa unica passada e o arquivo e gravado de forma atomica,
+so quando muda (ver source_edits.py). Com --diff nada e gravado: as correcoes
+saem como patch unificado no stdout, para revisao ou `git apply`.
+
+So sao inseridas chaves que existem em strings.xml (ver resource_index.py):
+um icone cuja chave de ICON_MAP (e a generica cd_icon) nao esta definida
+fica como esta, e as chaves ausentes sao listadas no inicio.
+
+Arquivos ja verificados sem nada a corrigir ficam no cache (.cache/kotlin-audit,
+ver scan_cache.py) e so sao relidos quando mudam.
+Uso: python3 scripts/fix_accessibility.py [--no-cache] [--changed-since RANGE] [--diff]
 """
 
+import argparse
+import functools
 import os
 import re
 import sys
 
+import kotlin_lexer
+import multi_pattern
+import resource_index
+import source_edits
+import source_files
+from kotlin_lexer import CallIndex
+from multi_pattern import MultiPattern
+from source_edits import Edit, apply_edits, unified_diff, write_atomic
+from scan_cache import MISS, ResultCache, changed_files, version_of
+from source_files import read_source
+
 # Mapeamento de ícones para content descriptions
 ICON_MAP = {
     'ArrowBack': 'cd_back',
@@ -67,194 +93,164 @@ ICON_MAP = {
 }
 
 
-def get_icon_cd_key(icon_name):
-    """Get contentDescription key for an icon."""
-    return ICON_MAP.get(icon_name, 'cd_icon')
-
-
-def fix_icon_calls(content):
-    """Fix Icon() calls that are missing contentDescription."""
-    modified = False
-
-    # Pattern 1: Icon(Icons.xxx) - simple case
-    def replace_simple_icon(match):
-        nonlocal modified
-        icon_full = match.group(1)
-        icon_name = icon_full.split('.')[-1]
-        cd_key = get_icon_cd_key(icon_name)
-        modified = True
-        return f'Icon({icon_full}, contentDescription = stringResource(R.string.{cd_key}))'
-
-    content = re.sub(
-        r'Icon\s*\(\s*(Icons\.[A-Za-z.]+)\s*\)',
-        replace_simple_icon,
-        content
-    )
-
-    # Pattern 2: Icon(imageVector = Icons.xxx, ...) without contentDescription
-    lines = content.split('\n')
-    new_lines = []
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-
-        # Check if this line starts an Icon call
-        if re.match(r'\s*Icon\s*\(', line):
-            # Collect the full Icon call
-            icon_call_lines = [line]
-            paren_count = line.count('(') - line.count(')')
-            j = i + 1
-
-            while paren_count > 0 and j < len(lines):
-                icon_call_lines.append(lines[j])
-                paren_count += lines[j].count('(') - lines[j].count(')')
-                j += 1
-
-            # Check if contentDescription is already present
-            icon_call_text = '\n'.join(icon_call_lines)
-
-            if 'contentDescription' not in icon_call_text:
-                # Extract icon name if present
-                icon_match = re.search(r'Icons\.[A-Za-z.]+\.(\w+)', icon_call_text)
-                if icon_match:
-                    icon_name = icon_match.group(1)
-                    cd_key = get_icon_cd_key(icon_name)
-
-                    # Find where to insert contentDescription
-                    # Insert after imageVector line if present
-                    for k, call_line in enumerate(icon_call_lines):
-                        if 'imageVector' in call_line and k + 1 < len(icon_call_lines):
-                            indent = len(call_line) - len(call_line.lstrip())
-                            cd_line = ' ' * indent + f'contentDescription = stringResource(R.string.{cd_key}),'
-                            icon_call_lines.insert(k + 1, cd_line)
-                            modified = True
-                            break
-
-                    new_lines.extend(icon_call_lines)
-                    i = j
-                    continue
-
-            new_lines.extend(icon_call_lines)
-            i = j
-        else:
-            new_lines.append(line)
-            i += 1
+# Arquivos fora da UI (caminho contendo algum destes trechos) sao ignorados
+NON_UI_PATHS = MultiPattern(['/model/', '/data/', '/domain/', '/util/', 'FcmService'])
 
-    if modified:
-        content = '\n'.join(new_lines)
+# Gatilho de cada fixer: uma unica passada nos bytes do arquivo diz quais precisam rodar
+# (arquivo sem nenhum gatilho nem e decodificado, ver source_files.py)
+FIX_TRIGGERS = MultiPattern([b'Icon', b'AsyncImage', b'.clickable'])
 
-    return content, modified
 
+@functools.lru_cache(maxsize=None)
+def defined_strings():
+    """R.string keys defined in the app resources."""
+    return frozenset(resource_index.ResourceIndex.build(['app'], sources=False, use_cache=False).names('R', 'string'))
 
-def fix_async_images(content):
-    """Fix AsyncImage calls that are missing contentDescription."""
-    modified = False
-
-    def replace_async_image(match):
-        nonlocal modified
-        full_match = match.group(0)
-        if 'contentDescription' not in full_match:
-            modified = True
-            # Insert contentDescription after model parameter
-            return re.sub(
-                r'(model\s*=\s*[^,]+,)',
-                r'\1\n    contentDescription = stringResource(R.string.cd_profile_photo),',
-                full_match
-            )
-        return full_match
-
-    content = re.sub(
-        r'AsyncImage\s*\([^)]+\)',
-        replace_async_image,
-        content,
-        flags=re.DOTALL
-    )
-
-    return content, modified
 
+def get_icon_cd_key(icon_name):
+    """Get contentDescription key for an icon, or None when no suitable string exists."""
+    for key in (ICON_MAP.get(icon_name, 'cd_icon'), 'cd_icon'):
+        if key in defined_strings():
+            return key
+    return None
+
+
+def fix_icon_calls(content, index=None):
+    """Edits adding contentDescription to Icon() calls that are missing it (index: CallIndex of content, if built)."""
+    index = index or CallIndex(content, names=['Icon'])
+    edits = []
+
+    for call in index.calls_named('Icon'):
+        if call.declaration or call.arg('contentDescription') or call.positional(1):
+            continue
+
+        # Pattern 1: Icon(Icons.xxx) - simple case
+        first = call.positional(0)
+        if len(call.args) == 1 and first is not None and re.fullmatch(r'Icons\.[A-Za-z.]+', first.text):
+            cd_key = get_icon_cd_key(first.text.split('.')[-1])
+            if cd_key is None:
+                continue
+            edits.append(Edit(call.start, call.end - call.start,
+                              f'Icon({first.text}, contentDescription = stringResource(R.string.{cd_key}))'))
+            continue
+
+        # Pattern 2: Icon(imageVector = Icons.xxx, ...) without contentDescription
+        vector = call.arg('imageVector')
+        if vector is None:
+            continue
+        icon_match = re.search(r'Icons\.[A-Za-z.]+\.(\w+)', vector.text)
+        vector_line = index.line_of(vector.end)
+        # Insert after the imageVector line, only when the call continues below it
+        if icon_match is None or vector_line >= index.line_of(call.end - 1):
+            continue
+        line_text = index.line_text(vector_line)
+        indent = line_text[:len(line_text) - len(line_text.lstrip())]
+        cd_key = get_icon_cd_key(icon_match.group(1))
+        if cd_key is None:
+            continue
+        edits.append(Edit(content.find('\n', vector.end), 0,
+                          f'\n{indent}contentDescription = stringResource(R.string.{cd_key}),'))
+
+    return edits
 
-def fix_clickables(content):
-    """Fix .clickable calls that are missing onClickLabel."""
-    modified = False
-
-    def replace_clickable(match):
-        nonlocal modified
-        full_match = match.group(0)
-        if 'onClickLabel' not in full_match:
-            modified = True
-            return '.clickable(\n        onClickLabel = stringResource(R.string.action_click)\n    ) {'
-        return full_match
-
-    content = re.sub(
-        r'\.clickable\s*\{',
-        replace_clickable,
-        content
-    )
-
-    return content, modified
-
-
-def add_import_if_needed(content, modified):
-    """Add stringResource import if not present and modifications were made."""
-    if modified and 'import androidx.compose.ui.res.stringResource' not in content:
-        # Find the imports section and add
-        import_match = re.search(r'(import androidx\.compose[^\n]*\n)', content)
-        if import_match:
-            content = content.replace(
-                import_match.group(0),
-                import_match.group(0) + 'import androidx.compose.ui.res.stringResource\n'
-            )
-        else:
-            # Add after package declaration
-            package_match = re.search(r'(package [^\n]+\n\n)', content)
-            if package_match:
-                content = content.replace(
-                    package_match.group(0),
-                    package_match.group(0) + 'import androidx.compose.ui.res.stringResource\n\n'
-                )
 
-    return content
+def fix_async_images(content):
+    """Edits adding contentDescription to AsyncImage calls that are missing it."""
+    edits = []
+    if 'cd_profile_photo' not in defined_strings():
+        return edits
+    for match in re.finditer(r'AsyncImage\s*\([^)]+\)', content, flags=re.DOTALL):
+        if 'contentDescription' in match.group(0):
+            continue
+        # Insert contentDescription after model parameter
+        for model in re.finditer(r'model\s*=\s*[^,]+,', match.group(0)):
+            edits.append(Edit(match.start() + model.end(), 0,
+                              '\n    contentDescription = stringResource(R.string.cd_profile_photo),'))
+    return edits
 
 
-def process_file(file_path):
-    """Process a single Kotlin file."""
+def fix_clickables(content):
+    """Edits adding onClickLabel to .clickable calls that are missing it."""
+    if 'action_click' not in defined_strings():
+        return []
+    return [
+        Edit(match.start(), match.end() - match.start(),
+             '.clickable(\n        onClickLabel = stringResource(R.string.action_click)\n    ) {')
+        for match in re.finditer(r'\.clickable\s*\{', content)
+    ]
+
+
+def import_edit(content):
+    """Edit adding the stringResource import, or None when it is already there."""
+    if 'import androidx.compose.ui.res.stringResource' in content:
+        return None
+
+    # Find the imports section and add
+    import_match = re.search(r'import androidx\.compose[^\n]*\n', content)
+    if import_match:
+        return Edit(import_match.end(), 0, 'import androidx.compose.ui.res.stringResource\n')
+
+    # Add after package declaration
+    package_match = re.search(r'package [^\n]+\n\n', content)
+    if package_match:
+        return Edit(package_match.end(), 0, 'import androidx.compose.ui.res.stringResource\n\n')
+    return None
+
+
+# process_file() result for a file that raised: reported, never cached
+FAILED = object()
+
+
+def process_file(file_path, diff_label=None):
+    """
+    Process a single Kotlin file: every fixer adds edits against the original
+    content, applied in one pass. With diff_label the change is printed as a
+    unified diff instead of written. Returns True if the file needs changes,
+    False if not and FAILED if it could not be processed.
+    """
     # Skip non-UI files
-    if any(x in file_path for x in ['/model/', '/data/', '/domain/', '/util/', 'FcmService']):
+    if NON_UI_PATHS.search(file_path):
         return False
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        original = content
-        overall_modified = False
+        content, triggers = read_source(file_path, FIX_TRIGGERS)
+        if content is None:
+            return False
+        edits = []
 
         # Fix Icons
-        content, mod1 = fix_icon_calls(content)
-        overall_modified = overall_modified or mod1
+        if b'Icon' in triggers:
+            edits.extend(fix_icon_calls(content))
 
         # Fix AsyncImages
-        content, mod2 = fix_async_images(content)
-        overall_modified = overall_modified or mod2
+        if b'AsyncImage' in triggers:
+            edits.extend(fix_async_images(content))
 
         # Fix Clickables
-        content, mod3 = fix_clickables(content)
-        overall_modified = overall_modified or mod3
+        if b'.clickable' in triggers:
+            edits.extend(fix_clickables(content))
+
+        if not edits:
+            return False
 
         # Add import if needed
-        if overall_modified:
-            content = add_import_if_needed(content, overall_modified)
+        edit = import_edit(content)
+        if edit is not None:
+            edits.append(edit)
 
-        if overall_modified:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
+        new_content = apply_edits(content, edits)
+        if new_content == content:
+            return False
 
-        return False
+        if diff_label is not None:
+            sys.stdout.write(unified_diff(file_path, content, new_content, label=diff_label))
+        else:
+            write_atomic(file_path, new_content)
+        return True
 
     except Exception as e:
         print(f'Error processing {file_path}: {e}', file=sys.stderr)
-        return False
+        return FAILED
 
 
 def get_all_kotlin_files(directory):
@@ -268,7 +264,18 @@ def get_all_kotlin_files(directory):
 
 
 def main():
-    print('>>> Accessibility Fix - Python Edition\n')
+    parser = argparse.ArgumentParser(description='Corrige accessibility issues nos arquivos Kotlin')
+    parser.add_argument('--no-cache', action='store_true', help='Processa todos os arquivos, ignorando o cache')
+    parser.add_argument('--changed-since', metavar='RANGE',
+                        help='Processa so os arquivos alterados neste range do git (ex.: HEAD, origin/main...HEAD)')
+    parser.add_argument('--diff', action='store_true',
+                        help='Imprime as correcoes como diff unificado em vez de gravar os arquivos')
+    args = parser.parse_args()
+
+    # Com --diff o stdout e so o patch; mensagens vao para o stderr
+    log = functools.partial(print, file=sys.stderr) if args.diff else print
+
+    log('>>> Accessibility Fix - Python Edition\n')
 
     # Get project root
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -277,21 +284,65 @@ def main():
 
     # Get all Kotlin files
     kotlin_files = get_all_kotlin_files(app_dir)
-    print(f'Found {len(kotlin_files)} Kotlin files\n')
+    log(f'Found {len(kotlin_files)} Kotlin files\n')
+
+    missing_keys = sorted((set(ICON_MAP.values()) | {'cd_icon'}) - defined_strings())
+    if missing_keys:
+        log(f"AVISO: chaves sem <string> em app/src/main/res (esses icones ficam sem correcao): "
+            f"{', '.join(missing_keys)}\n")
+
+    # Arquivos sem nada a corrigir ficam no cache como False; as strings definidas
+    # entram na versao, pois uma chave nova torna corrigiveis arquivos ja vistos
+    version = version_of(__file__, kotlin_lexer.__file__, multi_pattern.__file__, source_edits.__file__,
+                         source_files.__file__, resource_index.__file__, *resource_index.resource_paths(['app']))
+    cache = None if args.no_cache else ResultCache('fix_accessibility', version)
+    changed = changed_files(args.changed_since) if args.changed_since else None
 
     # Process files
     modified_count = 0
+    failed = []
     for i, file_path in enumerate(kotlin_files):
-        if process_file(file_path):
-            modified_count += 1
-            rel_path = os.path.relpath(file_path, app_dir)
-            print(f'[OK] {rel_path}')
+        cached = MISS
+        if cache is not None:
+            trust = changed is not None and os.path.abspath(file_path) not in changed
+            cached = cache.lookup(file_path, trust=trust)
+
+        if cached is MISS:
+            result = process_file(file_path, os.path.relpath(file_path, project_root) if args.diff else None)
+            if result is FAILED:
+                # Not cached: the file is retried on the next run even if it does not change
+                failed.append(os.path.relpath(file_path, app_dir))
+                if cache is not None:
+                    cache.discard(file_path)
+            elif result:
+                modified_count += 1
+                rel_path = os.path.relpath(file_path, app_dir)
+                log(f'[OK] {rel_path}')
+                if cache is not None:
+                    cache.discard(file_path)
+            elif cache is not None:
+                cache.store(file_path, False)
 
         if (i + 1) % 100 == 0:
-            print(f'Progress: {i + 1}/{len(kotlin_files)}...')
-
-    print(f'\n>>> Modified {modified_count}/{len(kotlin_files)} files')
-    print('\nRun: ./gradlew compileDebugKotlin to verify')
+            log(f'Progress: {i + 1}/{len(kotlin_files)}...')
+
+    if cache is not None:
+        cache.prune(app_dir, kotlin_files)
+        cache.save()
+        log(f'\nCache: {cache.hits} arquivos sem mudanca, {cache.misses} processados')
+
+    if args.diff:
+        log(f'\n>>> {modified_count}/{len(kotlin_files)} files need changes (nothing written)')
+        log('\nApply: git apply <patch>, then ./gradlew compileDebugKotlin to verify')
+    else:
+        log(f'\n>>> Modified {modified_count}/{len(kotlin_files)} files')
+        log('\nRun: ./gradlew compileDebugKotlin to verify')
+
+    if failed:
+        log(f'\n>>> {len(failed)} file(s) could not be processed (not cached, retried next run):')
+        for rel_path in failed:
+            log(f'  - {rel_path}')
+        sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -1,6 +1,16 @@
-"""Remove quadras órfãs (sem locationId válido)"""
+"""Remove quadras órfãs (sem locationId válido)
+
+Uso:
+    python scripts/fix_all_orphan_fields.py
+    python scripts/fix_all_orphan_fields.py --async    # locais verificados em paralelo
+"""
 import firebase_admin
 from firebase_admin import credentials, firestore
+import argparse
+import asyncio
+
+from async_firestore import DEFAULT_CONCURRENCY, async_client, gather_bounded, stream_all
+from doc_loader import AsyncDocLoader, DocLoader
 
 try:
     firebase_admin.get_app()
@@ -10,33 +20,92 @@ except:
 
 db = firestore.client()
 
-print("\n" + "="*60)
-print("CORRIGIR QUADRAS ORFAS")
-print("="*60 + "\n")
 
-fields = db.collection('fields').stream()
+def fix_fields():
+    fields = list(db.collection('fields').stream())
 
-deleted = 0
-kept = 0
+    # Locais de todas as quadras em um unico get_all (cada local uma vez)
+    loader = DocLoader(db)
+    for field in fields:
+        location_id = field.to_dict().get('locationId')
+        if location_id and location_id != 'None':
+            loader.load(db.collection('locations').document(location_id))
 
-for field in fields:
-    field_data = field.to_dict()
-    location_id = field_data.get('locationId')
+    deleted = 0
+    kept = 0
 
-    if not location_id or location_id == 'None':
-        print(f"Deletando quadra órfã: {field_data.get('name')} (ID: {field.id})")
-        field.reference.delete()
-        deleted += 1
-    else:
-        # Verificar se o location existe
-        loc = db.collection('locations').document(location_id).get()
-        if not loc.exists:
-            print(f"Deletando quadra com location inválido: {field_data.get('name')} (location_id: {location_id})")
+    for field in fields:
+        field_data = field.to_dict()
+        location_id = field_data.get('locationId')
+
+        if not location_id or location_id == 'None':
+            print(f"Deletando quadra órfã: {field_data.get('name')} (ID: {field.id})")
             field.reference.delete()
             deleted += 1
+        else:
+            # Verificar se o location existe
+            loc = loader.get(db.collection('locations').document(location_id))
+            if not loc.exists:
+                print(f"Deletando quadra com location inválido: {field_data.get('name')} (location_id: {location_id})")
+                field.reference.delete()
+                deleted += 1
+            else:
+                kept += 1
+
+    return deleted, kept
+
+
+async def fix_fields_async(concurrency=DEFAULT_CONCURRENCY):
+    adb = async_client()
+    fields = await stream_all(adb.collection('fields'))
+
+    # Cada local e verificado uma unica vez, todos no mesmo get_all
+    location_ids = sorted({field.to_dict().get('locationId') for field in fields} - {None, '', 'None'})
+    snapshots = await AsyncDocLoader(adb).load_many(
+        [adb.collection('locations').document(location_id) for location_id in location_ids])
+    existing = {location_id for location_id, snap in zip(location_ids, snapshots) if snap.exists}
+
+    to_delete = []
+    kept = 0
+    for field in fields:
+        field_data = field.to_dict()
+        location_id = field_data.get('locationId')
+
+        if not location_id or location_id == 'None':
+            print(f"Deletando quadra órfã: {field_data.get('name')} (ID: {field.id})")
+            to_delete.append(field)
+        elif location_id not in existing:
+            print(f"Deletando quadra com location inválido: {field_data.get('name')} (location_id: {location_id})")
+            to_delete.append(field)
         else:
             kept += 1
 
-print(f"\n{deleted} quadras órfãs deletadas")
-print(f"{kept} quadras válidas mantidas")
-print("\n" + "="*60 + "\n")
+    await gather_bounded([adb.collection('fields').document(field.id).delete() for field in to_delete],
+                         limit=concurrency)
+    return len(to_delete), kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove quadras sem local valido')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Usa o cliente assincrono (leituras em paralelo)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Operacoes simultaneas no modo --async')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("CORRIGIR QUADRAS ORFAS")
+    print("="*60 + "\n")
+
+    if args.use_async:
+        deleted, kept = asyncio.run(fix_fields_async(args.concurrency))
+    else:
+        deleted, kept = fix_fields()
+
+    print(f"\n{deleted} quadras órfãs deletadas")
+    print(f"{kept} quadras válidas mantidas")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
-"""Corrige locationId das quadras de Campo"""
+"""
+Corrige locationId das quadras de Campo
+
+Em vez de apagar e recriar todas (IDs novos a cada execucao), mantem uma
+quadra por nome com ID deterministico (local + nome, ver seed_ids.py),
+corrige so os campos errados e apaga apenas as sobras. Rodar de novo nao
+grava nada.
+"""
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+from seed_ids import BATCH_LIMIT, SeedWriter, field_id, normalize
+from venue_summaries import refresh_summaries
+
 try:
     firebase_admin.get_app()
 except:
@@ -26,17 +36,36 @@ if not jb_location_id:
 
 print(f"JB Esportes & Eventos ID: {jb_location_id}")
 
-# Deletar quadras de Campo antigas
-fields = db.collection('fields').where('type', '==', 'CAMPO').stream()
+CAMPO_NAMES = [f'Campo {i}' for i in range(1, 3)]
+
+# Quadras de Campo atuais: a primeira com cada nome esperado e mantida
+# (o ID deterministico tem preferencia), as demais sao sobras
+wanted = {normalize(name): name for name in CAMPO_NAMES}
+deterministic = {field_id(jb_location_id, name) for name in CAMPO_NAMES}
+keep = {}
+to_delete = []
+fields = sorted(db.collection('fields').where('type', '==', 'CAMPO').stream(),
+                key=lambda f: (f.id not in deterministic, f.id))
 for field in fields:
-    print(f"Deletando quadra antiga: {field.id}")
-    field.reference.delete()
+    key = normalize(field.to_dict().get('name'))
+    if key in wanted and key not in keep:
+        keep[key] = field.id
+    else:
+        to_delete.append(field)
 
-# Criar novas quadras de Campo
-for i in range(1, 3):
+for i in range(0, len(to_delete), BATCH_LIMIT):
+    batch = db.batch()
+    for field in to_delete[i:i + BATCH_LIMIT]:
+        print(f"Deletando quadra antiga: {field.id}")
+        batch.delete(field.reference)
+    batch.commit()
+
+# Criar as que faltam e corrigir locationId (e o resto) das mantidas
+writer = SeedWriter(db, merge=True)
+for name in CAMPO_NAMES:
     field_data = {
         'locationId': jb_location_id,
-        'name': f'Campo {i}',
+        'name': name,
         'type': 'CAMPO',
         'hourlyPrice': 180.0,
         'isActive': True,
@@ -46,8 +75,19 @@ for i in range(1, 3):
         'dimensions': '105m x 68m',
         'createdAt': firestore.SERVER_TIMESTAMP
     }
+    doc_id = keep.get(normalize(name)) or field_id(jb_location_id, name)
+    writer.put(db.collection('fields').document(doc_id), field_data)
+
+writer.flush()
+for path in writer.created:
+    print(f"Campo criado (ID: {path.split('/')[-1]})")
+for path in writer.updated:
+    print(f"Campo corrigido (ID: {path.split('/')[-1]})")
 
-    doc_ref = db.collection('fields').add(field_data)
-    print(f"Campo {i} criado (ID: {doc_ref[1].id})")
+print(f"\nQuadras de Campo corrigidas! ({len(to_delete)} removida(s), {len(writer.created)} criada(s), "
+      f"{len(writer.updated)} corrigida(s), {len(writer.unchanged)} ja certa(s))\n")
 
-print("\nQuadras de Campo corrigidas!\n")
+# Quadras removidas podiam ser de outros locais: atualizar todos os resumos
+if to_delete or writer.created or writer.updated:
+    print("Atualizando resumos dos locais...")
+    refresh_summaries()
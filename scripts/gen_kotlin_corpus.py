@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Reproducible synthetic Kotlin tree for benchmarking the source scanners.
+
+Writes an app/src/main/java/... layout of Compose-like screens, view models
+and repositories: multi-line and nested Icon/Image calls (positional,
+named, missing or hardcoded contentDescription), AsyncImage calls,
+.clickable { } modifiers, javax.inject annotations, plus Icon( text inside
+comments and strings that scanners must ignore. The same --files/--seed
+always produce byte-identical trees, so benchmark runs are comparable.
+
+Usage: python3 scripts/gen_kotlin_corpus.py --files 10000 [--seed 1] [--out DIR]
+"""
+import argparse
+import os
+import random
+import shutil
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUT_DIR = os.path.join(PROJECT_ROOT, '.cache', 'kotlin-corpus')
+PACKAGE = 'com.futebadosparcas'
+JAVA_DIR = os.path.join('app', 'src', 'main', 'java', *PACKAGE.split('.'))
+
+FILES_PER_DIR = 40
+
+FEATURES = ['games', 'players', 'groups', 'league', 'locations', 'profile', 'statistics', 'badges',
+            'cashbox', 'schedules', 'livegame', 'ranking', 'settings', 'notifications', 'home']
+ICONS = ['ArrowBack', 'Close', 'Add', 'Delete', 'Edit', 'Star', 'Search', 'Person', 'Groups',
+         'LocationOn', 'Event', 'SportsSoccer', 'EmojiEvents', 'Info', 'Warning', 'Settings',
+         'SearchOff', 'QrCode', 'Whatshot', 'TrendingUp']
+
+IMPORTS = [
+    'import androidx.compose.foundation.Image',
+    'import androidx.compose.foundation.clickable',
+    'import androidx.compose.foundation.layout.*',
+    'import androidx.compose.material.icons.Icons',
+    'import androidx.compose.material.icons.filled.*',
+    'import androidx.compose.material3.*',
+    'import androidx.compose.runtime.Composable',
+    'import androidx.compose.ui.Modifier',
+    'import androidx.compose.ui.unit.dp',
+    'import coil.compose.AsyncImage',
+]
+
+
+def icon_snippet(rng, indent):
+    """One Icon/Image call in one of the shapes found in the app"""
+    pad = ' ' * indent
+    inner = ' ' * (indent + 4)
+    icon = f'Icons.Default.{rng.choice(ICONS)}'
+    shape = rng.randrange(12)
+    if shape == 0:
+        return [f'{pad}Icon({icon})']
+    if shape == 1:
+        return [f'{pad}Icon({icon}, null)']
+    if shape == 2:
+        return [f'{pad}Icon({icon}, contentDescription = stringResource(R.string.cd_{rng.choice(ICONS).lower()}))']
+    if shape == 3:
+        return [f'{pad}Icon(', f'{inner}imageVector = {icon},', f'{inner}tint = MaterialTheme.colorScheme.primary',
+                f'{pad})']
+    if shape == 4:
+        return [f'{pad}Icon(', f'{inner}imageVector = {icon},', f'{inner}contentDescription = null,',
+                f'{inner}modifier = Modifier.size({rng.choice([16, 20, 24, 48])}.dp)', f'{pad})']
+    if shape == 5:
+        return [f'{pad}Icon(', f'{inner}{icon},', f'{inner}stringResource(R.string.cd_icon)', f'{pad})']
+    if shape == 6:
+        return [f'{pad}Image(', f'{inner}painter = painterResource(R.drawable.ic_logo),',
+                f'{inner}contentDescription = "Logo {rng.randrange(100)}"', f'{pad})']
+    if shape == 7:
+        return [f'{pad}Row(verticalAlignment = Alignment.CenterVertically) {{',
+                f'{inner}Icon({icon}, contentDescription = null, modifier = Modifier.padding(end = 4.dp))',
+                f'{inner}Text(text = "Icon(texto)")', f'{pad}}}']
+    if shape == 8:
+        return [f'{pad}// Icon({icon})  antigo, sem descricao', f'{pad}/* Image(painter) */']
+    if shape == 9:
+        return [f'{pad}IconButton(onClick = {{ onAction() }}) {{',
+                f'{inner}Icon({icon}, contentDescription = stringResource(R.string.cd_back))', f'{pad}}}']
+    if shape == 10:
+        return [f'{pad}AsyncImage(', f'{inner}model = photoUrl,', f'{inner}modifier = Modifier.size(40.dp)',
+                f'{pad})']
+    return [f'{pad}Box(modifier = Modifier.clickable {{ onClick() }}) {{',
+            f'{inner}Icon({icon}, contentDescription = "Abrir")', f'{pad}}}']
+
+
+def screen_file(rng, package, name):
+    lines = [f'package {package}', ''] + rng.sample(IMPORTS, rng.randint(4, len(IMPORTS))) + ['']
+    for idx in range(max(1, int(rng.lognormvariate(1.2, 0.7)))):
+        lines += ['@Composable', f'fun {name}Section{idx}(', '    modifier: Modifier = Modifier,',
+                  '    onClick: () -> Unit = {}', ') {', '    Column(modifier = modifier.padding(16.dp)) {']
+        for _ in range(rng.randint(1, 8)):
+            lines += icon_snippet(rng, 8)
+            if rng.random() < 0.3:
+                lines.append(f'        Text(text = "{name} ${{state.count}} itens", style = MaterialTheme.typography.bodyMedium)')
+        lines += ['    }', '}', '']
+    return lines
+
+
+def view_model_file(rng, package, name):
+    lines = [f'package {package}', '', 'import javax.inject.Inject', 'import javax.inject.Singleton',
+             'import kotlinx.coroutines.flow.MutableStateFlow', '']
+    if rng.random() < 0.5:
+        lines.append('@Singleton')
+    lines += [f'class {name}ViewModel @Inject constructor(', f'    private val repository: {name}Repository',
+              ') : ViewModel() {', '    private val _state = MutableStateFlow(0)', '']
+    for idx in range(rng.randint(1, 6)):
+        lines += [f'    fun load{idx}(id: String) {{', '        viewModelScope.launch {',
+                  f'            repository.fetch{idx}(id)', '        }', '    }', '']
+    lines.append('}')
+    return lines
+
+
+def generate(out_dir, files, seed=1):
+    """Write the corpus under out_dir (replacing it); returns the number of files written"""
+    rng = random.Random(seed)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    java_root = os.path.join(out_dir, JAVA_DIR)
+    for idx in range(files):
+        feature = FEATURES[idx % len(FEATURES)]
+        group = idx // (FILES_PER_DIR * len(FEATURES))
+        kind = 'ui' if rng.random() < 0.75 else 'data'
+        directory = os.path.join(java_root, kind, feature, f'part{group}')
+        name = f'{feature.capitalize()}{idx}'
+        package = f'{PACKAGE}.{kind}.{feature}.part{group}'
+        if kind == 'ui':
+            lines = screen_file(rng, package, name)
+            filename = f'{name}Screen.kt'
+        else:
+            lines = view_model_file(rng, package, name)
+            filename = f'{name}ViewModel.kt'
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, filename), 'w', encoding='utf-8', newline='\n') as f:
+            f.write('\n'.join(lines) + '\n')
+    return files
+
+
+def corpus_dir(files, seed=1, base=DEFAULT_OUT_DIR):
+    return os.path.join(base, f'{files}-s{seed}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Kotlin tree for scanner benchmarks')
+    parser.add_argument('--files', type=int, default=1000, help='Number of .kt files (default: 1000)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (same seed, same tree)')
+    parser.add_argument('--out', default=None, help='Output directory (default: .cache/kotlin-corpus/<files>-s<seed>)')
+    args = parser.parse_args()
+
+    out_dir = args.out or corpus_dir(args.files, args.seed)
+    generate(out_dir, args.files, args.seed)
+    print(f'{args.files} files written to {out_dir}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Single-pass Kotlin lexer and call index shared by the audit and fix scripts.
+
+tokenize() walks a file once and emits identifier, string and punctuation
+tokens. Line and nested block comments are dropped; string literals (plain,
+raw triple-quoted, with $name and ${...} templates, which may themselves hold
+strings and braces) and char literals become a single token each, so parens
+and commas inside them never confuse call matching.
+
+CallIndex builds on the token stream: every `name(...)` call with its span
+and its top-level arguments (named or positional), so scanners look calls up
+instead of rescanning raw text. With names= only those callees are wanted:
+a regex finds the candidate `name(` sites, one skim over the string and
+comment delimiters drops the ones inside literals or comments, and the
+argument lists of the remaining calls are only skimmed for brackets and
+commas. An argument's tokens, and the whole-file token stream, are built on
+first use (arg.tokens, index.tokens).
+
+strip_comments() blanks the comments out of a source (same offsets and lines)
+for regex scans that must not match inside comments or KDoc; index.code is
+the same view built from the index's own tokens.
+
+Usage:
+    index = CallIndex(source)
+    for call in index.calls_named('Icon', 'Image'):
+        cd = call.arg('contentDescription')
+        print(call.line, call.name, [arg.text for arg in call.args])
+"""
+import bisect
+import functools
+import re
+
+IDENT = 'ident'
+STRING = 'string'
+CHAR = 'char'
+NUMBER = 'number'
+OP = 'op'
+
+_IDENT_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|`[^`\n]+`')
+_NUMBER_RE = re.compile(r'0[xXbB][0-9A-Fa-f_]+[uUL]*|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?[fFdDuUL]*')
+_OP_RE = re.compile(r'===|!==|==|!=|<=|>=|->|::|\?\.|\?:|!!|&&|\|\||\.\.<|\.\.|\+\+|--|[-+*/%=<>!?:.,;@#&|^~()\[\]{}$\\]')
+# One match per token (leading whitespace included); lastgroup is the kind
+_TOKEN_RE = re.compile(
+    r'\s*(?:(?P<line>//[^\n]*)|(?P<block>/\*)|(?P<string>")|(?P<char>\')'
+    r'|(?P<ident>' + _IDENT_RE.pattern + r')|(?P<number>' + _NUMBER_RE.pattern + r')'
+    r'|(?P<op>' + _OP_RE.pattern + r'|\S))')
+# Fast paths: a one-line string whose ${...} templates hold no strings, braces or
+# comments, a block comment without nesting
+_PLAIN_STRING_RE = re.compile(r'"(?:[^"\\\n$]|\\.|\$(?!\{)|\$\{[^{}"\'/\n]*\})*"')
+_FLAT_COMMENT_RE = re.compile(r'/\*(?:[^*/]|\*(?!/)|/(?!\*))*\*/')
+# Where something that hides code may start: strings, chars, comments, `quoted
+# names` (a bare character class keeps the search fast; '/' may be a division)
+_OPAQUE_RE = re.compile(r'["\'`/]')
+# What matters when splitting an argument list without tokenizing it
+_ARG_STOP_RE = re.compile(r'[()\[\]{},"\'`/]')
+# Leading whitespace and `name =` (not `==`) of an argument
+_ARG_HEAD_RE = re.compile(r'\s*(?:(' + _IDENT_RE.pattern + r')\s*=(?!=)\s*)?')
+
+# Keywords that take parentheses but are not calls
+CONTROL_KEYWORDS = {'if', 'when', 'for', 'while', 'catch', 'return', 'throw', 'in', 'is', 'as'}
+
+OPENERS = {'(': ')', '[': ']', '{': '}'}
+CLOSERS = {')', ']', '}'}
+
+
+@functools.lru_cache(maxsize=None)
+def _name_pattern(names):
+    """`name(` (same line) for any of names, longest first"""
+    return re.compile('(' + '|'.join(map(re.escape, names)) + r')[ \t]*\(')
+
+
+class Token:
+    __slots__ = ('kind', 'text', 'start', 'end')
+
+    def __init__(self, kind, text, start, end):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f'Token({self.kind}, {self.text!r}, {self.start})'
+
+
+def _after_fun(src, start):
+    """`fun` and whitespace right before src[start]: a declaration, not a call"""
+    lo = max(0, start - 64)
+    i = lo + len(src[lo:start].rstrip())
+    return (i < start and i >= 3 and src.startswith('fun', i - 3)
+            and (i == 3 or not (src[i - 4].isalnum() or src[i - 4] in '_`')))
+
+
+def _skip_block_comment(src, i):
+    """src[i:i+2] == '/*'; returns the index after the matching '*/' (comments nest)"""
+    m = _FLAT_COMMENT_RE.match(src, i)
+    if m:
+        return m.end()
+    depth = 0
+    n = len(src)
+    while i < n:
+        if src.startswith('/*', i):
+            depth += 1
+            i += 2
+        elif src.startswith('*/', i):
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    return n
+
+
+def _skip_template(src, i):
+    """src[i:i+2] == '${'; returns the index after the matching '}'"""
+    depth = 0
+    n = len(src)
+    while i < n:
+        ch = src[i]
+        if ch == '"':
+            i = _skip_string(src, i)
+        elif ch == "'":
+            i = _skip_char(src, i)
+        elif src.startswith('//', i):
+            nl = src.find('\n', i)
+            i = n if nl < 0 else nl
+        elif src.startswith('/*', i):
+            i = _skip_block_comment(src, i)
+        elif ch == '{':
+            depth += 1
+            i += 1
+        elif ch == '}':
+            depth -= 1
+            i += 1
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    return n
+
+
+def _skip_string(src, i):
+    """src[i] == '"'; returns the index after the closing quote(s)"""
+    n = len(src)
+    if src.startswith('"""', i):
+        i += 3
+        while i < n:
+            if src.startswith('"""', i):
+                # Extra quotes before the closing triple belong to the content
+                while src.startswith('""""', i):
+                    i += 1
+                return i + 3
+            if src.startswith('${', i):
+                i = _skip_template(src, i + 1)
+            else:
+                i += 1
+        return n
+
+    m = _PLAIN_STRING_RE.match(src, i)
+    if m:
+        return m.end()
+    i += 1
+    while i < n:
+        ch = src[i]
+        if ch == '\\':
+            i += 2
+        elif ch == '"':
+            return i + 1
+        elif ch == '\n':
+            # Unterminated literal: stop at the end of the line
+            return i
+        elif src.startswith('${', i):
+            i = _skip_template(src, i + 1)
+        else:
+            i += 1
+    return n
+
+
+def _skip_char(src, i):
+    """src[i] == "'"; returns the index after the closing quote"""
+    n = len(src)
+    j = i + 1
+    while j < n and j - i < 12:
+        if src[j] == '\\':
+            j += 2
+        elif src[j] == "'":
+            return j + 1
+        elif src[j] == '\n':
+            break
+        else:
+            j += 1
+    return i + 1
+
+
+def tokenize(src, start=0, stop=None):
+    """Tokens of src[start:stop], without whitespace and comments"""
+    tokens = []
+    append = tokens.append
+    match = _TOKEN_RE.match
+    stop = len(src) if stop is None else stop
+    i = start
+    while True:
+        m = match(src, i, stop)
+        if m is None:
+            break
+        kind = m.lastgroup
+        end = m.end()
+        if kind == 'ident':
+            append(Token(IDENT, m.group(kind), m.start(kind), end))
+        elif kind == 'op':
+            append(Token(OP, m.group(kind), m.start(kind), end))
+        elif kind == 'string':
+            begin = end - 1
+            end = _skip_string(src, begin)
+            append(Token(STRING, src[begin:end], begin, end))
+        elif kind == 'char':
+            begin = end - 1
+            end = _skip_char(src, begin)
+            append(Token(CHAR, src[begin:end], begin, end))
+        elif kind == 'number':
+            append(Token(NUMBER, m.group(kind), m.start(kind), end))
+        elif kind == 'block':
+            end = _skip_block_comment(src, end - 2)
+        i = end
+    return tokens
+
+
+def _skim_args(src, open_):
+    """
+    src[open_] is '('; returns (end after the matching ')', [(start, end,
+    commented)] raw top-level argument spans), or None if it is never closed.
+    Only brackets, commas and what can hide them (strings, chars, comments,
+    `quoted names`) are looked at.
+    """
+    spans = []
+    search = _ARG_STOP_RE.search
+    depth = 0
+    begin = open_ + 1
+    commented = False
+    i = open_
+    while True:
+        m = search(src, i)
+        if m is None:
+            return None
+        pos = m.start()
+        ch = src[pos]
+        i = pos + 1
+        if ch in OPENERS:
+            depth += 1
+        elif ch in CLOSERS:
+            depth -= 1
+            if depth == 0:
+                spans.append((begin, pos, commented))
+                return i, spans
+        elif ch == ',':
+            if depth == 1:
+                spans.append((begin, pos, commented))
+                begin = i
+                commented = False
+        elif ch == '"':
+            i = _skip_string(src, pos)
+        elif ch == "'":
+            i = _skip_char(src, pos)
+        elif ch == '`':
+            name = _IDENT_RE.match(src, pos)
+            if name:
+                i = name.end()
+        elif src.startswith('//', pos):
+            commented = commented or depth == 1
+            nl = src.find('\n', pos)
+            i = len(src) if nl < 0 else nl
+        elif src.startswith('/*', pos):
+            commented = commented or depth == 1
+            i = _skip_block_comment(src, pos)
+
+
+def opaque_spans(src, stop=None):
+    """
+    Sorted (start, end) of the strings, char literals, comments and `quoted
+    names` of src; with stop, only those starting before it
+    """
+    spans = []
+    n = len(src)
+    stop = n if stop is None else stop
+    i = 0
+    search = _OPAQUE_RE.search
+    while True:
+        m = search(src, i, stop)
+        if m is None:
+            return spans
+        start = m.start()
+        ch = src[start]
+        if ch == '"':
+            end = _skip_string(src, start)
+        elif ch == "'":
+            end = _skip_char(src, start)
+        elif ch == '`':
+            close = src.find('`', start + 1)
+            nl = src.find('\n', start + 1)
+            end = close + 1 if close >= 0 and (nl < 0 or close < nl) else start + 1
+        elif src.startswith('//', start):
+            nl = src.find('\n', start)
+            end = n if nl < 0 else nl
+        elif src.startswith('/*', start):
+            end = _skip_block_comment(src, start)
+        else:
+            i = start + 1
+            continue
+        spans.append((start, end))
+        i = end
+
+
+def strip_comments(src, tokens=None):
+    """
+    src with every comment blanked out (newlines kept), so offsets and line
+    numbers still match; strings, and templates inside them, are untouched.
+    tokens: tokenize(src) when the caller already has it
+    """
+    if '//' not in src and '/*' not in src:
+        return src
+    parts = []
+    pos = 0
+    for token in tokens if tokens is not None else tokenize(src):
+        gap = src[pos:token.start]
+        parts.append(re.sub(r'[^\n]', ' ', gap) if '/' in gap else gap)
+        parts.append(token.text)
+        pos = token.end
+    gap = src[pos:]
+    parts.append(re.sub(r'[^\n]', ' ', gap) if '/' in gap else gap)
+    return ''.join(parts)
+
+
+class Arg:
+    __slots__ = ('name', 'text', 'start', 'end', 'value_start', '_tokens', '_src')
+
+    def __init__(self, name, text, start, end, value_start, tokens, src=None):
+        self.name = name                # None for positional arguments
+        self.text = text                # argument text, stripped (without `name =`)
+        self.start = start
+        self.end = end
+        self.value_start = value_start
+        self._tokens = tokens
+        self._src = src
+
+    @property
+    def tokens(self):
+        """Value tokens (tokenized on first use for skimmed arguments)"""
+        if self._tokens is None:
+            self._tokens = tokenize(self._src, self.value_start, stop=self.end)
+        return self._tokens
+
+    def __repr__(self):
+        return f'Arg({self.name}, {self.text!r})'
+
+
+class Call:
+    __slots__ = ('name', 'start', 'open', 'end', 'line', 'args', 'declaration')
+
+    def __init__(self, name, start, open_, end, line, args, declaration):
+        self.name = name
+        self.start = start              # offset of the callee name
+        self.open = open_               # offset of '('
+        self.end = end                  # offset after ')'
+        self.line = line                # 1-based line of the callee name
+        self.args = args
+        self.declaration = declaration  # `fun Name(...)`, not a call
+
+    def arg(self, name):
+        for arg in self.args:
+            if arg.name == name:
+                return arg
+        return None
+
+    def positional(self, index):
+        args = [arg for arg in self.args if arg.name is None]
+        return args[index] if index < len(args) else None
+
+    def __repr__(self):
+        return f'Call({self.name}@{self.line}, {self.args})'
+
+
+class CallIndex:
+    """All calls of a Kotlin source, tokenized once"""
+
+    def __init__(self, src, names=None):
+        """names: only index calls to these callees (their argument lists are only skimmed)"""
+        self.src = src
+        self.names = frozenset(names) if names is not None else None
+        self._line_starts = None
+        self._tokens = None
+        self._code = None
+        if self.names is None:
+            self._line_starts = self.line_starts
+            self._tokens = tokenize(src)
+            self._match = self._match_brackets()
+            self.calls = self._find_calls()
+        else:
+            self.calls = self._find_named_calls()
+        self._by_name = {}
+        for call in self.calls:
+            self._by_name.setdefault(call.name, []).append(call)
+
+    @property
+    def tokens(self):
+        """Token stream of the whole file (built on first use when names= was given)"""
+        if self._tokens is None:
+            self._tokens = tokenize(self.src)
+        return self._tokens
+
+    @property
+    def code(self):
+        """The source with comments blanked out (strip_comments), from the same tokens"""
+        if self._code is None:
+            # Only a source with comment markers needs the tokens
+            has_comments = '//' in self.src or '/*' in self.src
+            self._code = strip_comments(self.src, self.tokens) if has_comments else self.src
+        return self._code
+
+    @property
+    def line_starts(self):
+        if self._line_starts is None:
+            self._line_starts = [0] + [m.end() for m in re.finditer('\n', self.src)]
+        return self._line_starts
+
+    def line_of(self, offset):
+        if self._line_starts is None:
+            # names= mode builds no line table: counting is cheaper for a few lookups
+            return self.src.count('\n', 0, offset) + 1
+        return bisect.bisect_right(self._line_starts, offset)
+
+    def line_text_at(self, offset):
+        """Text of the line holding offset"""
+        start = self.src.rfind('\n', 0, offset) + 1
+        end = self.src.find('\n', offset)
+        return self.src[start:] if end < 0 else self.src[start:end]
+
+    def line_text(self, line):
+        starts = self.line_starts
+        start = starts[line - 1]
+        end = starts[line] - 1 if line < len(starts) else len(self.src)
+        return self.src[start:end]
+
+    def calls_named(self, *names):
+        if len(names) == 1:
+            return list(self._by_name.get(names[0], []))
+        return sorted((call for name in names for call in self._by_name.get(name, [])), key=lambda c: c.start)
+
+    def _match_brackets(self):
+        """Token index of each opener -> token index of its closer"""
+        match = {}
+        stack = []
+        for idx, tok in enumerate(self.tokens):
+            if tok.kind != OP:
+                continue
+            if tok.text in OPENERS:
+                stack.append(idx)
+            elif tok.text in CLOSERS and stack:
+                match[stack.pop()] = idx
+        return match
+
+    def _find_calls(self):
+        tokens = self.tokens
+        calls = []
+        for idx in range(len(tokens) - 1):
+            tok = tokens[idx]
+            if tok.kind != IDENT or tok.text in CONTROL_KEYWORDS:
+                continue
+            if self.names is not None and tok.text not in self.names:
+                continue
+            nxt = tokens[idx + 1]
+            if nxt.kind != OP or nxt.text != '(' or idx + 1 not in self._match:
+                continue
+            # `name (` across a newline is not a call in Kotlin
+            if '\n' in self.src[tok.end:nxt.start]:
+                continue
+            close = self._match[idx + 1]
+            declaration = idx > 0 and tokens[idx - 1].kind == IDENT and tokens[idx - 1].text == 'fun'
+            calls.append(Call(tok.text, tok.start, nxt.start, tokens[close].end, self.line_of(tok.start),
+                              self._split_args(tokens, idx + 1, close), declaration))
+        return calls
+
+    def _find_named_calls(self):
+        """Calls to self.names without tokenizing the whole file"""
+        src = self.src
+        names = sorted(self.names - CONTROL_KEYWORDS, key=len, reverse=True)
+        if not names:
+            return []
+        # No lookbehind in front: a literal prefix lets the regex engine skip ahead fast
+        pattern = _name_pattern(tuple(names))
+        candidates = [m for m in pattern.finditer(src)
+                      if not m.start() or not (src[m.start() - 1].isalnum() or src[m.start() - 1] in '_`')]
+        if not candidates:
+            return []
+
+        spans = opaque_spans(src, stop=candidates[-1].start())
+        span_starts = [start for start, _ in spans]
+        calls = []
+        # Candidates come in order: count newlines from the previous one only
+        line = 1
+        counted = 0
+        for m in candidates:
+            start = m.start()
+            idx = bisect.bisect_right(span_starts, start) - 1
+            if idx >= 0 and start < spans[idx][1]:
+                continue  # inside a string or comment
+            open_ = m.end() - 1
+            skimmed = _skim_args(src, open_)
+            if skimmed is None:
+                continue
+            end, arg_spans = skimmed
+            declaration = _after_fun(src, start)
+            line += src.count('\n', counted, start)
+            counted = start
+            calls.append(Call(m.group(1), start, open_, end, line,
+                              self._skimmed_args(arg_spans), declaration))
+        return calls
+
+    def _skimmed_args(self, spans):
+        """Args from _skim_args spans; value tokens are left for Arg.tokens to build"""
+        src = self.src
+        args = []
+        for begin, end, commented in spans:
+            if not commented:
+                head = _ARG_HEAD_RE.match(src, begin, end)
+                value_start = head.end()
+                text = src[value_start:end].rstrip()
+                if text:
+                    name = head.group(1)
+                    args.append(Arg(name, text, head.start(1) if name else value_start,
+                                    value_start + len(text), value_start, None, src))
+                    continue
+            # Comments in the argument, or nothing after `name =`: let the tokenizer trim it
+            tokens = tokenize(src, begin, stop=end)
+            if tokens:
+                args.append(self._make_arg(tokens, 0, len(tokens)))
+        return args
+
+    def _split_args(self, tokens, open_idx, close_idx):
+        """Top-level arguments between tokens[open_idx] == '(' and tokens[close_idx] == ')'"""
+        args = []
+        depth = 0
+        begin = open_idx + 1
+        for idx in range(open_idx + 1, close_idx):
+            tok = tokens[idx]
+            if tok.kind != OP:
+                continue
+            if tok.text in OPENERS:
+                depth += 1
+            elif tok.text in CLOSERS:
+                depth -= 1
+            elif tok.text == ',' and depth == 0:
+                if begin < idx:
+                    args.append(self._make_arg(tokens, begin, idx))
+                begin = idx + 1
+        if begin < close_idx:
+            args.append(self._make_arg(tokens, begin, close_idx))
+        return args
+
+    def _make_arg(self, tokens, first, stop):
+        name = None
+        value_first = first
+        if (stop - first >= 3 and tokens[first].kind == IDENT
+                and tokens[first + 1].kind == OP and tokens[first + 1].text == '='):
+            name = tokens[first].text
+            value_first = first + 2
+        start = tokens[first].start
+        end = tokens[stop - 1].end
+        value_start = tokens[value_first].start
+        return Arg(name, self.src[value_start:end].strip(), start, end, value_start, tokens[value_first:stop])
+
+
+def string_value(token):
+    """Content of a plain (non-raw) string literal token, templates included, or None"""
+    text = token.text
+    if token.kind != STRING or text.startswith('"""') or len(text) < 2 or not text.endswith('"'):
+        return None
+    return text[1:-1]
@@ -0,0 +1,316 @@
+"""
+Rankings materializados (top-k) por temporada e por mes
+
+Mantem em leaderboards/{season_<id>} e leaderboards/{month_<AAAA-MM>} as
+listas dos melhores jogadores (pontos, gols, assistencias e MVPs), de modo
+que as telas de ranking leem um unico documento em vez de ordenar colecoes
+inteiras.
+
+- Incremental (--game): soma o jogo em monthly_player_stats com Increment,
+  le so os jogadores do jogo e mescla os novos valores no top-k atual.
+  O jogo e marcado com leaderboardsApplied no mesmo batch dos incrementos.
+  O ranking da temporada vem de season_participations, entao rode antes
+  recompute_season_standings.py --game. Os totais de quem ja esta no ranking
+  sao relidos; se algum caiu (ex.: recompute_season_standings.py completo),
+  o ranking e reconstruido em vez de mesclado.
+- Reconstrucao (--rebuild): uma passada com projecao, heap limitado a k por
+  ranking.
+
+Uso:
+    python scripts/leaderboards.py --game GAME_ID
+    python scripts/leaderboards.py --rebuild                  # temporada ativa e mes atual
+    python scripts/leaderboards.py --rebuild --season ID --month 2026-03
+    python scripts/leaderboards.py --rebuild --dry-run
+"""
+
+import argparse
+import heapq
+from datetime import date
+
+from firebase_admin import firestore
+
+from evaluate_badges import get_docs
+from recompute_season_standings import (
+    STAT_FIELDS, aggregate_stats, db, existing_participations, get_season, load_game_rows,
+)
+
+DEFAULT_TOP_K = 50
+
+# Ranking -> campo do documento de origem
+SEASON_METRICS = {'points': 'points', 'goals': 'goalsScored', 'assists': 'assists', 'mvp': 'mvpCount'}
+MONTH_METRICS = {'goals': 'goalsScored', 'assists': 'assists', 'mvp': 'mvpCount'}
+
+MONTHLY_COLLECTION = 'monthly_player_stats'
+
+
+class TopK:
+    """Os k maiores valores vistos, com heap minimo de tamanho k"""
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+
+    def push(self, value, user_id):
+        if not value:
+            return
+        item = (value, user_id)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def items(self):
+        """[(user_id, valor)] do maior para o menor; empate pelo ID"""
+        return [(user_id, value) for value, user_id in sorted(self._heap, key=lambda e: (-e[0], e[1]))]
+
+
+def merge_top(entries, updated, k):
+    """
+    Mescla valores novos de alguns jogadores em um top-k ja gravado.
+    So vale se nenhum total caiu: ai quem esta fora do top-k nunca passa a
+    frente de quem ficou (ver total_dropped).
+    """
+    top = TopK(k)
+    for entry in entries:
+        if entry['userId'] not in updated:
+            top.push(entry['value'], entry['userId'])
+    for user_id, value in updated.items():
+        top.push(value, user_id)
+    return top.items()
+
+
+def total_dropped(entries, updated):
+    """True se algum jogador do ranking tem agora menos do que o ranking mostra"""
+    return any(entry['userId'] in updated and updated[entry['userId']] < entry['value'] for entry in entries)
+
+
+def board_ref(scope):
+    return db.collection('leaderboards').document(scope)
+
+
+def month_scope(month):
+    return f'month_{month}'
+
+
+def season_scope(season_id):
+    return f'season_{season_id}'
+
+
+def to_entries(ranked, previous=None):
+    """Linhas do ranking com nome e foto (reaproveita as do documento anterior)"""
+    known = {entry['userId']: entry for entry in previous or []}
+    missing = sorted({user_id for user_id, _ in ranked if user_id not in known})
+    users = get_docs('users', missing, ['name', 'nickname', 'photo_url']) if missing else {}
+
+    entries = []
+    for user_id, value in ranked:
+        if user_id in known:
+            name, photo = known[user_id].get('name'), known[user_id].get('photoUrl')
+        else:
+            user = users.get(user_id, {})
+            name, photo = user.get('nickname') or user.get('name') or '', user.get('photo_url')
+        entries.append({'userId': user_id, 'name': name, 'photoUrl': photo, 'value': value})
+    return entries
+
+
+def write_board(scope, data, boards, k, dry_run=False):
+    payload = dict(data)
+    payload.update({'k': k, 'boards': boards, 'updatedAt': firestore.SERVER_TIMESTAMP})
+    if not dry_run:
+        board_ref(scope).set(payload)
+
+    for name, entries in boards.items():
+        leader = entries[0] if entries else None
+        print(f"  {scope} / {name}: {len(entries)} jogadores"
+              + (f" | 1o {leader['name'] or leader['userId']} ({leader['value']})" if leader else ""))
+
+
+def build_boards(rows, metrics, k):
+    """rows: iteravel de (user_id, dict). Uma passada, um heap por ranking"""
+    tops = {name: TopK(k) for name in metrics}
+    for user_id, row in rows:
+        for name, field in metrics.items():
+            tops[name].push(row.get(field, 0) or 0, user_id)
+    return {name: to_entries(top.items()) for name, top in tops.items()}
+
+
+# ---------------------------------------------------------------------------
+# Reconstrucao
+# ---------------------------------------------------------------------------
+
+def rebuild_season(season, k=DEFAULT_TOP_K, dry_run=False):
+    participations = (db.collection('season_participations')
+                      .where('seasonId', '==', season.id)
+                      .select(['userId'] + list(SEASON_METRICS.values()))
+                      .stream())
+    rows = ((doc.to_dict().get('userId'), doc.to_dict()) for doc in participations)
+    boards = build_boards(rows, SEASON_METRICS, k)
+    write_board(season_scope(season.id), {'scope': 'season', 'seasonId': season.id}, boards, k, dry_run)
+    return boards
+
+
+def rebuild_month(month, k=DEFAULT_TOP_K, dry_run=False):
+    """Recalcula monthly_player_stats do mes a partir dos jogos e remonta o ranking"""
+    games = {
+        game.id: game.to_dict()
+        for game in (db.collection('games')
+                     .where('status', '==', 'FINISHED')
+                     .where('date', '>=', f'{month}-01')
+                     .where('date', '<=', f'{month}-31')
+                     .select(['date', 'status', 'mvpId', 'leaderboardsApplied'])
+                     .stream())
+    }
+    confirmations, teams = load_game_rows(games.keys()) if games else ([], [])
+    stats = aggregate_stats(games, confirmations, teams)
+    print(f"Mes {month}: {len(games)} jogos, {len(stats)} jogadores")
+
+    if not dry_run:
+        writer = db.bulk_writer()
+        stale = db.collection(MONTHLY_COLLECTION).where('month', '==', month).select(['userId']).stream()
+        for doc in stale:
+            if doc.to_dict().get('userId') not in stats:
+                writer.delete(doc.reference)
+        for user_id, row in stats.items():
+            writer.set(db.collection(MONTHLY_COLLECTION).document(f'{month}_{user_id}'),
+                       {'month': month, 'userId': user_id, **row})
+        for game_id, game_data in games.items():
+            if game_data.get('leaderboardsApplied') != month:
+                writer.update(db.collection('games').document(game_id), {'leaderboardsApplied': month})
+        writer.close()
+
+    boards = build_boards(stats.items(), MONTH_METRICS, k)
+    write_board(month_scope(month), {'scope': 'month', 'month': month}, boards, k, dry_run)
+    return boards
+
+
+# ---------------------------------------------------------------------------
+# Incremental
+# ---------------------------------------------------------------------------
+
+def season_rows(season_id, user_ids):
+    """user_id -> participacao (so os campos dos rankings) dos jogadores dados"""
+    refs = existing_participations(season_id, user_ids).values()
+    return {doc.to_dict().get('userId'): doc.to_dict()
+            for doc in db.get_all(list(refs), field_paths=['userId'] + list(SEASON_METRICS.values()))
+            if doc.exists}
+
+
+def merge_into_board(scope, data, metrics, values, k, rebuild, refresh=None, dry_run=False):
+    """
+    values: user_id -> documento de origem com os totais ja atualizados.
+    refresh(user_ids) rele os totais de quem ja esta no ranking (podem ter
+    mudado fora deste script); se algum total caiu, chama rebuild().
+    """
+    snapshot = board_ref(scope).get()
+    current = snapshot.to_dict().get('boards', {}) if snapshot.exists else {}
+
+    if refresh is not None:
+        listed = {entry['userId'] for entries in current.values() for entry in entries} - set(values)
+        if listed:
+            # Quem sumiu da origem tem total zero
+            values = {**{user_id: {} for user_id in listed}, **refresh(listed), **values}
+
+    updates = {name: {user_id: row.get(field, 0) or 0 for user_id, row in values.items()}
+               for name, field in metrics.items()}
+    dropped = [name for name in metrics if total_dropped(current.get(name, []), updates[name])]
+    if dropped:
+        print(f"  {scope}: total caiu em {', '.join(dropped)}, reconstruindo o ranking")
+        return rebuild()
+
+    boards = {}
+    for name in metrics:
+        ranked = merge_top(current.get(name, []), updates[name], k)
+        boards[name] = to_entries(ranked, current.get(name))
+    write_board(scope, data, boards, k, dry_run)
+    return boards
+
+
+def apply_game(game_id, k=DEFAULT_TOP_K, dry_run=False):
+    game = db.collection('games').document(game_id).get()
+    if not game.exists:
+        print(f"ERRO: Jogo {game_id} nao encontrado!")
+        return None
+
+    game_data = game.to_dict()
+    if game_data.get('status') != 'FINISHED':
+        print(f"Jogo {game_id} ainda nao foi finalizado ({game_data.get('status')})")
+        return None
+
+    month = game_data.get('date', '')[:7]
+    confirmations, teams = load_game_rows([game_id])
+
+    if game_data.get('leaderboardsApplied') == month:
+        print(f"Jogo {game_id} ja aplicado nos rankings de {month}")
+    else:
+        stats = aggregate_stats({game_id: game_data}, confirmations, teams)
+        doc_ids = {user_id: f'{month}_{user_id}' for user_id in stats}
+        current = get_docs(MONTHLY_COLLECTION, list(doc_ids.values()), STAT_FIELDS) if stats else {}
+
+        batch = db.batch()
+        values = {}
+        for user_id, row in stats.items():
+            data = {field: firestore.Increment(value) for field, value in row.items()}
+            data.update({'month': month, 'userId': user_id})
+            batch.set(db.collection(MONTHLY_COLLECTION).document(doc_ids[user_id]), data, merge=True)
+
+            previous = current.get(doc_ids[user_id], {})
+            values[user_id] = {field: (previous.get(field, 0) or 0) + value for field, value in row.items()}
+        batch.update(game.reference, {'leaderboardsApplied': month})
+        if not dry_run:
+            batch.commit()
+
+        merge_into_board(month_scope(month), {'scope': 'month', 'month': month}, MONTH_METRICS, values, k,
+                         rebuild=lambda: rebuild_month(month, k, dry_run), dry_run=dry_run)
+
+    season = get_season()
+    if season is None:
+        return game_data
+    season_data = season.to_dict()
+    if not season_data['startDate'] <= game_data.get('date', '') <= season_data['endDate']:
+        return game_data
+    if game_data.get('standingsSeasonId') != season.id:
+        print(f"Jogo {game_id} ainda nao esta na classificacao; rode recompute_season_standings.py --game antes")
+        return game_data
+
+    user_ids = {conf.get('user_id') for conf in confirmations if conf.get('user_id')}
+    merge_into_board(season_scope(season.id), {'scope': 'season', 'seasonId': season.id},
+                     SEASON_METRICS, season_rows(season.id, user_ids), k,
+                     rebuild=lambda: rebuild_season(season, k, dry_run),
+                     refresh=lambda listed: season_rows(season.id, listed), dry_run=dry_run)
+    return game_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rankings materializados por temporada e por mes')
+    parser.add_argument('--game', help='Aplica um jogo finalizado (incremental)')
+    parser.add_argument('--rebuild', action='store_true', help='Reconstroi os rankings do zero')
+    parser.add_argument('--season', help='Temporada para --rebuild (padrao: temporada ativa)')
+    parser.add_argument('--month', help='Mes AAAA-MM para --rebuild (padrao: mes atual)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_K, help='Tamanho de cada ranking (padrao: 50)')
+    parser.add_argument('--dry-run', action='store_true', help='Calcula sem gravar')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("RANKINGS MATERIALIZADOS")
+    print("="*60 + "\n")
+
+    if args.game:
+        apply_game(args.game, k=args.top, dry_run=args.dry_run)
+    elif args.rebuild:
+        season = get_season(args.season)
+        if season is None:
+            print("ERRO: Temporada nao encontrada!")
+            exit(1)
+        rebuild_season(season, k=args.top, dry_run=args.dry_run)
+        rebuild_month(args.month or date.today().isoformat()[:7], k=args.top, dry_run=args.dry_run)
+    else:
+        parser.print_help()
+
+    if args.dry_run:
+        print("\n(dry-run: nada foi gravado)")
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Materializa as proximas ocorrencias dos jogos recorrentes
+
+Segue o mesmo modelo do app (GameDetailViewModel.scheduleNextGame): cada
+serie e um documento de schedules e os jogos dela tem schedule_id. Os jogos
+com recurrence (weekly, biweekly, monthly) sao agrupados por schedule_id e
+cada serie e expandida a partir do seu jogo mais recente, ate o horizonte,
+com a mesma regra de datas do app (calculateNextDate): semanal +7 dias,
+quinzenal +14 e mensal no mesmo dia da semana da mesma semana do mes (ou o
+ultimo, se o mes nao tiver essa semana).
+
+Como no app, o template do schedule (horario, duracao, quadra, local) vale
+para as novas ocorrencias, as datas em exceptions sao puladas e uma serie
+cujo schedule foi excluido nao gera mais jogos. Jogo recorrente ainda sem
+schedule_id ganha um schedule, como o app faz ao finaliza-lo. O dateTime
+(usado para ordenar) e recalculado do dia e horario de cada ocorrencia.
+
+Antes de criar, cada ocorrencia e conferida contra um indice em memoria dos
+horarios ja ocupados por quadra (uma unica leitura com projecao dos jogos do
+periodo), evitando reservar a mesma quadra duas vezes. As ocorrencias tem ID
+deterministico ({scheduleId}_{AAAAMMDD}), entao rodar de novo nao duplica nada.
+
+Uso:
+    python scripts/materialize_recurring_games.py              # proximos 30 dias
+    python scripts/materialize_recurring_games.py --days 60
+    python scripts/materialize_recurring_games.py --dry-run
+"""
+
+import argparse
+import bisect
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+try:
+    firebase_admin.get_app()
+except:
+    cred = credentials.Certificate('scripts/serviceAccountKey.json')
+    firebase_admin.initialize_app(cred)
+
+db = firestore.client()
+
+RECURRENCE_STEPS = {'weekly': 7, 'biweekly': 14}
+RECURRENCES = ['weekly', 'biweekly', 'monthly']
+
+# O modelo Game do app grava schedule_id; scripts antigos, scheduleId
+SCHEDULE_KEYS = ['schedule_id', 'scheduleId']
+
+DEFAULT_HORIZON_DAYS = 30
+DEFAULT_DURATION_MINUTES = 60
+BATCH_LIMIT = 500
+
+# O app calcula dateTime no fuso do aparelho; os grupos jogam no Brasil
+GAME_TIMEZONE = ZoneInfo('America/Sao_Paulo')
+
+# Campos do jogo de origem que nao passam para as novas ocorrencias
+RESET_FIELDS = [
+    'mvpId', 'team1Score', 'team2Score', 'xpProcessed', 'standingsSeasonId',
+    'badgesProcessed', 'counterShards', 'updatedAt', 'recurrenceSourceId',
+]
+
+# Campo do schedule (template) -> campo do jogo
+TEMPLATE_FIELDS = {
+    'field_id': 'fieldId', 'field_name': 'fieldName', 'location_id': 'locationId',
+    'location_name': 'locationName', 'location_address': 'locationAddress',
+}
+
+
+def game_datetime(day, hhmm):
+    """dateTime do jogo (ordenacao no Firestore), como calculateNextDateTime do app; None se o horario for invalido"""
+    try:
+        return datetime.combine(date.fromisoformat(day), datetime.strptime(hhmm, '%H:%M').time(), GAME_TIMEZONE)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_minutes(hhmm):
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def game_slot(data):
+    """(inicio, fim) do jogo em minutos do dia"""
+    start = to_minutes(data.get('time') or '00:00')
+    end = to_minutes(data['endTime']) if data.get('endTime') else start + DEFAULT_DURATION_MINUTES
+    return start, end
+
+
+def schedule_id_of(data):
+    for key in SCHEDULE_KEYS:
+        if data.get(key):
+            return data[key]
+    return None
+
+
+def next_monthly(day):
+    """Mesmo dia da semana na mesma semana do mes seguinte (ex.: 2a terca), ou o ultimo"""
+    aligned_week = (day.day - 1) // 7
+    year, month = (day.year + 1, 1) if day.month == 12 else (day.year, day.month + 1)
+    first_weekday = date(year, month, 1)
+    candidate = first_weekday + timedelta(days=(day.weekday() - first_weekday.weekday()) % 7 + 7 * aligned_week)
+    if candidate.month != month:
+        candidate -= timedelta(days=7)
+    return candidate
+
+
+def next_date(day, recurrence):
+    """Proxima data da serie, como GameDetailViewModel.calculateNextDate"""
+    if recurrence == 'monthly':
+        return next_monthly(day)
+    return day + timedelta(days=RECURRENCE_STEPS[recurrence])
+
+
+def expand_dates(latest, recurrence, start, end):
+    """Datas seguintes a `latest` (jogo mais recente da serie) dentro de [start, end]"""
+    current = latest
+    step = RECURRENCE_STEPS.get(recurrence)
+    if step and latest < start:
+        # Pula direto para a ultima data da serie antes da janela
+        current += timedelta(days=(start - latest).days // step * step)
+    current = next_date(current, recurrence)
+    while current <= end:
+        if current >= start:
+            yield current
+        current = next_date(current, recurrence)
+
+
+class CourtSlotIndex:
+    """Horarios ocupados por quadra e data, ordenados para busca binaria"""
+
+    def __init__(self):
+        self._slots = defaultdict(list)  # (field_id, date) -> [(inicio, fim)]
+
+    def add(self, field_id, day, slot):
+        bisect.insort(self._slots[(field_id, day)], slot)
+
+    def conflicts(self, field_id, day, slot):
+        """True se o horario sobrepoe algum jogo da mesma quadra no dia"""
+        slots = self._slots.get((field_id, day))
+        if not slots:
+            return False
+        start, end = slot
+        # Entre os jogos que comecam antes do fim do novo horario, algum termina depois do inicio?
+        idx = bisect.bisect_left(slots, (end,))
+        return any(other_end > start for _, other_end in slots[:idx])
+
+
+def load_index(start, end):
+    """Indice de horarios ja ocupados no periodo"""
+    index = CourtSlotIndex()
+    for game in (db.collection('games')
+                 .where('date', '>=', start.isoformat())
+                 .where('date', '<=', end.isoformat())
+                 .select(['date', 'time', 'endTime', 'fieldId', 'status'])
+                 .stream()):
+        data = game.to_dict()
+        if data.get('status') == 'CANCELLED' or not data.get('fieldId'):
+            continue
+        index.add(data['fieldId'], data['date'], game_slot(data))
+    return index
+
+
+def load_series():
+    """
+    Jogos recorrentes agrupados por serie: {chave: [(id, dados)]}. A chave e o
+    schedule_id; jogo sem schedule_id e uma serie so dele (chave = ID do jogo).
+    Ocorrencias criadas por versoes antigas deste script (recurrenceSourceId)
+    entram na serie do jogo de origem.
+    """
+    games = {}
+    for game in db.collection('games').where('recurrence', 'in', RECURRENCES).stream():
+        data = game.to_dict()
+        if data.get('date'):
+            games[game.id] = data
+
+    series = defaultdict(list)
+    for game_id, data in games.items():
+        source_id = data.get('recurrenceSourceId')
+        source = games.get(source_id, {}) if source_id else {}
+        key = schedule_id_of(data) or schedule_id_of(source) or source_id or game_id
+        series[key].append((game_id, data))
+    return series
+
+
+def load_schedules(schedule_ids):
+    """{id: dados} dos schedules existentes (get_all em lotes de 100)"""
+    refs = [db.collection('schedules').document(schedule_id) for schedule_id in schedule_ids]
+    schedules = {}
+    for i in range(0, len(refs), 100):
+        for snap in db.get_all(refs[i:i + 100]):
+            if snap.exists:
+                schedules[snap.id] = snap.to_dict()
+    return schedules
+
+
+def schedule_from_game(data):
+    """Schedule novo a partir do jogo, como GameDetailViewModel.buildScheduleFromGame"""
+    game_day = date.fromisoformat(data['date'])
+    return {
+        'owner_id': data.get('ownerId', ''),
+        'owner_name': data.get('ownerName', ''),
+        'name': f"Jogo de {data.get('ownerName', '')} - {data.get('locationName', '')}",
+        'location_id': data.get('locationId', ''),
+        'location_name': data.get('locationName', ''),
+        'location_address': data.get('locationAddress', ''),
+        'field_id': data.get('fieldId', ''),
+        'field_name': data.get('fieldName', ''),
+        'field_type': data.get('gameType', 'Society'),
+        'time': data.get('time', ''),
+        'duration': 60,
+        'recurrence_type': data['recurrence'],
+        'day_of_week': (game_day.weekday() + 1) % 7,  # 0 = domingo
+        'created_at': firestore.SERVER_TIMESTAMP,
+    }
+
+
+def apply_template(data, schedule):
+    """Horario, duracao, quadra e local do schedule valem para a nova ocorrencia"""
+    data = dict(data)
+    for schedule_key, game_key in TEMPLATE_FIELDS.items():
+        if schedule.get(schedule_key):
+            data[game_key] = schedule[schedule_key]
+    if schedule.get('time') and schedule['time'] != data.get('time'):
+        end = to_minutes(schedule['time']) + int(schedule.get('duration') or DEFAULT_DURATION_MINUTES)
+        data['time'] = schedule['time']
+        data['endTime'] = f"{end // 60 % 24:02d}:{end % 60:02d}"
+    return data
+
+
+def new_occurrence(schedule_id, template, day):
+    data = {key: value for key, value in template.items() if key not in RESET_FIELDS and key not in SCHEDULE_KEYS}
+    data.update({
+        'date': day,
+        'dateTime': game_datetime(day, data.get('time')),
+        'status': 'SCHEDULED',
+        'confirmationCount': 0,
+        'goalkeeperCount': 0,
+        'schedule_id': schedule_id,
+        'createdAt': firestore.SERVER_TIMESTAMP,
+    })
+    return data
+
+
+def materialize(horizon_days=DEFAULT_HORIZON_DAYS, dry_run=False):
+    start = date.today()
+    end = start + timedelta(days=horizon_days)
+    print(f"Periodo: {start.isoformat()} a {end.isoformat()}\n")
+
+    series = load_series()
+    index = load_index(start, end)
+    schedules = load_schedules(sorted(key for key, games in series.items()
+                                      if any(schedule_id_of(data) for _, data in games)))
+    print(f"Series recorrentes: {len(series)}\n")
+
+    writes = []       # (ref, dados, merge)
+    to_create = []
+    conflicts = []
+    new_schedules = 0
+    deleted = []
+    for key, games in sorted(series.items()):
+        games.sort(key=lambda game: game[1]['date'])
+        active = [game for game in games if game[1].get('status') != 'CANCELLED']
+        if not active:
+            continue
+        template_id, template = active[-1]
+
+        if any(schedule_id_of(data) for _, data in games):
+            schedule_id = key
+            schedule = schedules.get(schedule_id)
+            if schedule is None:
+                # Schedule excluido pelo usuario: o app tambem para de agendar a serie
+                deleted.append(schedule_id)
+                continue
+        else:
+            ref = db.collection('schedules').document()
+            schedule_id = ref.id
+            schedule = schedule_from_game(template)
+            writes.append((ref, schedule, False))
+            writes += [(db.collection('games').document(game_id), {'schedule_id': schedule_id}, True)
+                       for game_id, _ in games]
+            new_schedules += 1
+
+        template = apply_template(template, schedule)
+        slot = game_slot(template)
+        existing = {data['date'] for _, data in games}
+        skipped = set(schedule.get('exceptions') or [])
+        latest = date.fromisoformat(games[-1][1]['date'])
+        for day in expand_dates(latest, template['recurrence'], start, end):
+            day_str = day.isoformat()
+            if day_str in existing or day_str in skipped:
+                continue
+            field_id = template.get('fieldId')
+            if field_id and index.conflicts(field_id, day_str, slot):
+                conflicts.append((schedule_id, day_str, template.get('fieldName') or field_id))
+                continue
+            if field_id:
+                index.add(field_id, day_str, slot)
+            doc_id = f"{schedule_id}_{day.strftime('%Y%m%d')}"
+            to_create.append((doc_id, new_occurrence(schedule_id, template, day_str)))
+
+    for schedule_id in deleted:
+        print(f"  - Serie {schedule_id}: schedule excluido, nada a criar")
+    for schedule_id, day_str, field in conflicts:
+        print(f"  ! Conflito: {schedule_id} em {day_str} ({field}) - quadra ja ocupada")
+
+    writes += [(db.collection('games').document(doc_id), data, False) for doc_id, data in to_create]
+    batches = 0
+    if not dry_run:
+        for i in range(0, len(writes), BATCH_LIMIT):
+            batch = db.batch()
+            for ref, data, merge in writes[i:i + BATCH_LIMIT]:
+                batch.set(ref, data, merge=merge)
+            batch.commit()
+            batches += 1
+
+    print(f"\nSchedules criados (jogos sem schedule_id): {new_schedules}")
+    print(f"\nOcorrencias criadas: {len(to_create)} (em {batches} batch(es))")
+    print(f"Conflitos de quadra: {len(conflicts)}")
+    return to_create, conflicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cria as proximas ocorrencias dos jogos recorrentes')
+    parser.add_argument('--days', type=int, default=DEFAULT_HORIZON_DAYS, help='Horizonte em dias (padrao: 30)')
+    parser.add_argument('--dry-run', action='store_true', help='Mostra o que seria criado sem gravar')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("MATERIALIZAR JOGOS RECORRENTES")
+    print("="*60 + "\n")
+
+    materialize(horizon_days=args.days, dry_run=args.dry_run)
+
+    if args.dry_run:
+        print("\n(dry-run: nada foi gravado)")
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Multi-pattern literal matcher for the Kotlin source scanners.
+
+A set of literal patterns is compiled into one regex whose alternation is
+factored as a prefix trie ('IconButton|Icon' becomes 'Icon(?:Button)?'), so
+each text position is tested against the trie once instead of against every
+pattern: a scan costs O(text length), not O(text length x patterns).
+
+search() answers "does any pattern occur?" (the skip-list check); present()
+and find_all() report every hit in a single pass, overlapping ones included
+(a zero-width lookahead tries every position), which lets a scanner decide
+up front which of its fixers a file needs. Built from bytes patterns, the
+matcher runs on raw file bytes (see source_files.py).
+
+Usage:
+    skip = MultiPattern(['IconButton', 'AsyncImage', 'val '])
+    if skip.search(line): ...
+    triggers = MultiPattern(['Icon', 'AsyncImage', '.clickable'])
+    needed = triggers.present(content)
+"""
+import re
+
+
+def _trie_regex(patterns):
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        optional = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if optional:
+            # Longest match first: the trie tries the longer pattern, then accepts the prefix
+            body = body + '?' if len(branches) == 1 and len(branches[0]) == 1 else '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class MultiPattern:
+    def __init__(self, patterns):
+        self.patterns = sorted(set(patterns))
+        if not self.patterns or '' in self.patterns or b'' in self.patterns:
+            raise ValueError('MultiPattern needs non-empty patterns')
+        if all(isinstance(pattern, bytes) for pattern in self.patterns):
+            # Bytes patterns scan bytes, mmap objects included, without decoding them;
+            # latin-1 maps each byte to one char, so the trie is built byte by byte
+            source = _trie_regex([pattern.decode('latin-1') for pattern in self.patterns])
+            self.regex = re.compile(source.encode('latin-1'))
+            self._overlapping = re.compile(f'(?=({source}))'.encode('latin-1'))
+        else:
+            source = _trie_regex(self.patterns)
+            self.regex = re.compile(source)
+            self._overlapping = re.compile(f'(?=({source}))')
+        # A hit on 'IconButton' also means 'Icon' occurs at the same position
+        self._prefixes = {
+            pattern: [other for other in self.patterns if pattern.startswith(other)]
+            for pattern in self.patterns
+        }
+
+    def search(self, text):
+        """First (leftmost, longest) pattern found in text, or None"""
+        match = self.regex.search(text)
+        return match.group() if match else None
+
+    def find_all(self, text):
+        """Every (offset, pattern) hit, overlapping ones included, in offset order"""
+        hits = []
+        for match in self._overlapping.finditer(text):
+            start = match.start()
+            for pattern in self._prefixes[match.group(1)]:
+                hits.append((start, pattern))
+        return hits
+
+    def present(self, text):
+        """Set of the patterns that occur anywhere in text"""
+        # Non-overlapping pass first: if nothing matches, no pattern occurs at all
+        # (the common case for a prefilter), at plain regex-search cost
+        found = set()
+        for match in self.regex.finditer(text):
+            found.update(self._prefixes[match.group()])
+            if len(found) == len(self.patterns):
+                break
+        if found and len(found) < len(self.patterns):
+            # A pattern may only occur overlapped by a longer hit: check the rest directly
+            # (with find(): `in` on an mmap tests single bytes, not substrings)
+            found.update(pattern for pattern in self.patterns if pattern not in found and text.find(pattern) >= 0)
+        return found
@@ -0,0 +1,144 @@
+"""
+Varredura paralela de colecoes grandes com consultas particionadas
+
+Divide uma collection group em N faixas de cursor (get_partitions do
+Firestore) e processa cada faixa em sua propria thread ou processo, cada um
+com seu stream. Os resultados parciais voltam na ordem das particoes e sao
+combinados por quem chamou (ex.: merge_counts).
+
+- threads: bom para varreduras limitadas pela rede (o gRPC libera o GIL)
+- processos: para processamento pesado por documento; cada processo abre seu
+  proprio cliente, entao a funcao passada precisa ser de nivel de modulo e o
+  resultado precisa ser serializavel (nada de defaultdict com lambda)
+
+Particoes sao calculadas sobre a collection group inteira e nao aceitam
+filtros; use `fields` para projetar e filtre dentro da funcao. Para uma
+colecao raiz use root_only=True (ignora subcolecoes de mesmo nome).
+
+Uso (como biblioteca):
+    from partitioned_scan import scan, merge_counts
+
+    def count_by_status(docs):
+        counts = {}
+        for doc in docs:
+            status = doc.to_dict().get('status')
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    partials = scan('confirmations', count_by_status, partitions=8, fields=['status'])
+    totals = merge_counts(partials)
+
+Uso (linha de comando, conta documentos):
+    python scripts/partitioned_scan.py notifications --partitions 8
+    python scripts/partitioned_scan.py xp_logs --partitions 8 --processes
+"""
+
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.base_query import QueryPartition
+
+try:
+    firebase_admin.get_app()
+except:
+    cred = credentials.Certificate('scripts/serviceAccountKey.json')
+    firebase_admin.initialize_app(cred)
+
+db = firestore.client()
+
+DEFAULT_PARTITIONS = 8
+
+
+def partition_ranges(group, partitions=DEFAULT_PARTITIONS):
+    """Faixas [(inicio, fim)] como caminhos de documento; None = ponta aberta"""
+    return [
+        (part.start_at.path if part.start_at else None, part.end_at.path if part.end_at else None)
+        for part in db.collection_group(group).get_partitions(partitions)
+    ]
+
+
+def range_query(group, start, end, fields=None):
+    """Consulta da faixa [start, end) da collection group, ordenada por ID"""
+    query = QueryPartition(
+        db.collection_group(group),
+        db.document(start) if start else None,
+        db.document(end) if end else None,
+    ).query()
+    return query.select(fields) if fields is not None else query
+
+
+def _scan_range(group, start, end, fn, fields, root_only):
+    docs = range_query(group, start, end, fields).stream()
+    if root_only:
+        docs = (doc for doc in docs if doc.reference.parent.parent is None)
+    return fn(docs)
+
+
+def scan(group, fn, partitions=DEFAULT_PARTITIONS, fields=None, processes=False, root_only=False):
+    """
+    Aplica fn(iteravel de documentos) a cada faixa em paralelo.
+    Retorna a lista de resultados parciais na ordem das faixas.
+    """
+    ranges = partition_ranges(group, partitions)
+    args = [(group, start, end, fn, fields, root_only) for start, end in ranges]
+
+    if processes:
+        # spawn: cada processo inicializa o proprio cliente (canais gRPC nao sobrevivem a fork)
+        with ProcessPoolExecutor(max_workers=len(args), mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(_scan_range, *item) for item in args]
+            return [future.result() for future in futures]
+
+    with ThreadPoolExecutor(max_workers=len(args)) as pool:
+        futures = [pool.submit(_scan_range, *item) for item in args]
+        return [future.result() for future in futures]
+
+
+def merge_counts(partials):
+    """Soma dicts parciais; valores podem ser numeros ou dicts de numeros"""
+    merged = {}
+    for partial in partials:
+        for key, value in partial.items():
+            if isinstance(value, dict):
+                row = merged.setdefault(key, {})
+                for field, amount in value.items():
+                    row[field] = row.get(field, 0) + amount
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def count_docs(docs):
+    return {'docs': sum(1 for _ in docs)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Conta documentos com varredura particionada')
+    parser.add_argument('collection', help='Colecao ou collection group')
+    parser.add_argument('--partitions', type=int, default=DEFAULT_PARTITIONS, help='Numero de faixas (padrao: 8)')
+    parser.add_argument('--processes', action='store_true', help='Um processo por faixa em vez de threads')
+    parser.add_argument('--root-only', action='store_true', help='So a colecao raiz, sem subcolecoes de mesmo nome')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print(f"VARREDURA PARTICIONADA: {args.collection}")
+    print("="*60 + "\n")
+
+    started = time.perf_counter()
+    partials = scan(args.collection, count_docs, partitions=args.partitions, fields=[],
+                    processes=args.processes, root_only=args.root_only)
+    elapsed = time.perf_counter() - started
+
+    for index, partial in enumerate(partials):
+        print(f"  Faixa {index + 1}: {partial['docs']} documentos")
+    print(f"\nTotal: {merge_counts(partials).get('docs', 0)} documentos em {elapsed:.2f}s"
+          f" ({len(partials)} faixas)")
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,26 @@
 """
 Script para popular o Firestore com dados REAIS de locais e quadras de Curitiba
 Baseado em informações reais fornecidas pelo usuário
+
+Os IDs saem do nome + endereco do local e do nome da quadra (seed_ids.py) e
+so os documentos que faltam sao criados: rodar de novo nao duplica nada e
+nao grava nada. Locais e quadras ja existentes com IDs antigos sao
+reaproveitados pelo mesmo criterio.
+
+Uso:
+    python scripts/populate_real_data.py              # cria o que falta
+    python scripts/populate_real_data.py --merge      # e atualiza campos alterados
+    python scripts/populate_real_data.py --dry-run
 """
 
+import argparse
+
 import firebase_admin
 from firebase_admin import credentials, firestore
-from datetime import datetime
+
+from doc_loader import where_in
+from seed_ids import SeedWriter, adopt_ids, field_id, field_key, location_id, location_key
+from venue_summaries import refresh_summaries
 
 # Inicializar Firebase Admin
 try:
@@ -208,80 +223,120 @@ LOCAIS_CURITIBA = [
     },
 ]
 
-def populate_firestore():
-    """Popula o Firestore com dados reais"""
+def load_existing_ids():
+    """IDs ja gravados (inclusive os antigos, aleatorios) dos locais e quadras deste seed"""
+    names = [local['name'] for local in LOCAIS_CURITIBA]
+    location_ids = adopt_ids(where_in(db.collection('locations'), 'name', names, fields=['name', 'address']),
+                             lambda d: location_key(d.get('name'), d.get('address')))
+    field_ids = adopt_ids(where_in(db.collection('fields'), 'location_id', list(location_ids.values()),
+                                   fields=['location_id', 'name']),
+                          lambda d: field_key(d.get('location_id'), d.get('name')))
+    return location_ids, field_ids
+
+
+def populate_firestore(merge=False, dry_run=False):
+    """Popula o Firestore com dados reais (so cria o que ainda nao existe)"""
     print("\n" + "="*60)
     print("🔥 POPULANDO FIRESTORE COM DADOS REAIS")
     print("="*60 + "\n")
-    
-    total_locations = 0
-    total_fields = 0
-    
+
     # ID do admin/owner padrão (pode ser ajustado)
     default_owner_id = "mock_admin"
-    
+
+    location_ids, field_ids = load_existing_ids()
+    writer = SeedWriter(db, merge=merge, dry_run=dry_run)
+    seeded = []
+
     for local_data in LOCAIS_CURITIBA:
-        try:
-            # Criar documento do local
-            location_ref = db.collection('locations').document()
-            
-            location = {
-                'name': local_data['name'],
-                'address': local_data['address'],
-                'city': local_data.get('city', 'Curitiba'),
-                'state': local_data.get('state', 'PR'),
-                'neighborhood': local_data.get('neighborhood', ''),
-                'region': '',  # Pode ser preenchido depois
-                'owner_id': default_owner_id,
-                'is_verified': True,
+        # ID estavel: nome + endereco (ou o ID que o local ja tem)
+        key = location_key(local_data['name'], local_data['address'])
+        loc_id = location_ids.get(key) or location_id(local_data['name'], local_data['address'])
+        location_ref = db.collection('locations').document(loc_id)
+
+        location = {
+            'name': local_data['name'],
+            'address': local_data['address'],
+            'city': local_data.get('city', 'Curitiba'),
+            'state': local_data.get('state', 'PR'),
+            'neighborhood': local_data.get('neighborhood', ''),
+            'region': '',  # Pode ser preenchido depois
+            'owner_id': default_owner_id,
+            'is_verified': True,
+            'is_active': True,
+            'rating': 4.5,
+            'rating_count': 0,
+            'description': local_data.get('description', ''),
+            'amenities': local_data.get('amenities', []),
+            'phone': local_data.get('phone', ''),
+            'opening_time': '08:00',
+            'closing_time': '23:00',
+            'operating_days': [1, 2, 3, 4, 5, 6, 7],
+            'min_game_duration_minutes': 60,
+            'created_at': firestore.SERVER_TIMESTAMP
+        }
+        writer.put(location_ref, location)
+
+        # Quadras do local: ID estavel a partir do local + nome da quadra
+        field_refs = []
+        for field_data in local_data.get('fields', []):
+            fid = field_ids.get(field_key(loc_id, field_data['name'])) or field_id(loc_id, field_data['name'])
+            field_ref = db.collection('fields').document(fid)
+
+            field = {
+                'location_id': loc_id,
+                'name': field_data['name'],
+                'type': field_data['type'],
+                'surface': field_data.get('surface', 'Grama Sintética'),
+                'is_covered': field_data.get('is_covered', False),
+                'hourly_price': field_data.get('price', 150.0),
                 'is_active': True,
-                'rating': 4.5,
-                'rating_count': 0,
-                'description': local_data.get('description', ''),
-                'amenities': local_data.get('amenities', []),
-                'phone': local_data.get('phone', ''),
-                'opening_time': '08:00',
-                'closing_time': '23:00',
-                'operating_days': [1, 2, 3, 4, 5, 6, 7],
-                'min_game_duration_minutes': 60,
-                'created_at': firestore.SERVER_TIMESTAMP
+                'photos': [],
+                'dimensions': '50x30m' if field_data['type'] == 'SOCIETY' else '40x20m'
             }
-            
-            location_ref.set(location)
-            total_locations += 1
-            
-            print(f"✅ Local criado: {local_data['name']}")
-            
-            # Criar quadras do local
-            for field_data in local_data.get('fields', []):
-                field_ref = db.collection('fields').document()
-                
-                field = {
-                    'location_id': location_ref.id,
-                    'name': field_data['name'],
-                    'type': field_data['type'],
-                    'surface': field_data.get('surface', 'Grama Sintética'),
-                    'is_covered': field_data.get('is_covered', False),
-                    'hourly_price': field_data.get('price', 150.0),
-                    'is_active': True,
-                    'photos': [],
-                    'dimensions': '50x30m' if field_data['type'] == 'SOCIETY' else '40x20m'
-                }
-                
-                field_ref.set(field)
-                total_fields += 1
-            
-            print(f"   📍 {len(local_data.get('fields', []))} quadra(s) criada(s)")
-            
-        except Exception as e:
-            print(f"❌ Erro ao criar {local_data['name']}: {e}")
-    
+            writer.put(field_ref, field)
+            field_refs.append(field_ref.path)
+
+        seeded.append((local_data['name'], location_ref.path, field_refs))
+
+    # Uma leitura em lote de tudo e batches so com o que falta (ou mudou, com --merge)
+    writer.flush()
+    created = set(writer.created)
+    updated = set(writer.updated)
+
+    for name, location_path, field_paths in seeded:
+        status = 'criado' if location_path in created else 'atualizado' if location_path in updated else 'ja existe'
+        new_fields = sum(1 for path in field_paths if path in created)
+        print(f"✅ Local {status}: {name}")
+        print(f"   📍 {new_fields} de {len(field_paths)} quadra(s) criada(s)")
+
+    # Quadras novas ou alteradas: atualizar os resumos dos locais (location_summaries)
+    if created or updated:
+        print("\nAtualizando resumos dos locais...")
+        refresh_summaries(dry_run=dry_run)
+        print()
+
+    total_locations = sum(1 for _, path, _ in seeded if path in created)
+    total_fields = len(created) - total_locations
+
     print(f"\n{'='*60}")
-    print(f"✅ POPULAÇÃO CONCLUÍDA!")
+    print(f"✅ POPULAÇÃO CONCLUÍDA!" + (" (dry-run: nada foi gravado)" if dry_run else ""))
     print(f"{'='*60}")
-    print(f"Total de Locais: {total_locations}")
-    print(f"Total de Quadras: {total_fields}")
+    print(f"Locais criados: {total_locations}")
+    print(f"Quadras criadas: {total_fields}")
+    print(f"Documentos atualizados: {len(writer.updated)}")
+    print(f"Documentos sem mudanca: {len(writer.unchanged)}")
     print(f"{'='*60}\n")
 
+
+def main():
+    parser = argparse.ArgumentParser(description='Popula locais e quadras reais de Curitiba (idempotente)')
+    parser.add_argument('--merge', action='store_true',
+                        help='Tambem atualiza campos que mudaram nos documentos ja existentes')
+    parser.add_argument('--dry-run', action='store_true', help='Mostra o que seria gravado sem gravar')
+    args = parser.parse_args()
+
+    populate_firestore(merge=args.merge, dry_run=args.dry_run)
+
+
 if __name__ == "__main__":
-    populate_firestore()
+    main()
@@ -0,0 +1,312 @@
+"""
+Recalcula a classificacao de uma temporada (season_participations)
+
+Le os jogos finalizados da temporada, as confirmacoes e os times uma unica
+vez, agrega gols, assistencias, clean sheets e MVPs por jogador e grava as
+participacoes em lote, usando o modelo de pontuacao da propria temporada
+(pointsPerGame, pointsPerGoal, pointsPerAssist, pointsPerCleanSheet).
+
+Uso:
+    python scripts/recompute_season_standings.py                 # temporada ativa
+    python scripts/recompute_season_standings.py --season ID
+    python scripts/recompute_season_standings.py --game GAME_ID  # aplica um jogo novo
+    python scripts/recompute_season_standings.py --dry-run
+"""
+
+import argparse
+from collections import defaultdict
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+try:
+    firebase_admin.get_app()
+except:
+    cred = credentials.Certificate('scripts/serviceAccountKey.json')
+    firebase_admin.initialize_app(cred)
+
+db = firestore.client()
+
+# Limite do operador 'in' do Firestore
+IN_QUERY_LIMIT = 30
+
+GAME_FIELDS = ['date', 'status', 'mvpId', 'standingsSeasonId']
+CONFIRMATION_FIELDS = ['game_id', 'user_id', 'status', 'team_id', 'position',
+                       'is_goalkeeper', 'goals', 'assists', 'is_mvp']
+TEAM_FIELDS = ['game_id', 'score']
+
+STAT_FIELDS = ['gamesPlayed', 'goalsScored', 'assists', 'cleanSheets', 'mvpCount']
+
+DEFAULT_DIVISION = 'BRONZE'
+
+
+def chunked(items, size):
+    """Divide uma lista em pedacos de no maximo `size` itens"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def get_season(season_id=None):
+    """Busca a temporada pelo ID ou, sem ID, a temporada ativa"""
+    if season_id:
+        doc = db.collection('seasons').document(season_id).get()
+        return doc if doc.exists else None
+
+    for doc in db.collection('seasons').where('isActive', '==', True).limit(1).stream():
+        return doc
+    return None
+
+
+def game_id_of(confirmation):
+    """ID do jogo de uma confirmacao (subcolecao de games ou colecao raiz)"""
+    parent = confirmation.reference.parent.parent
+    if parent is not None:
+        return parent.id
+    return confirmation.to_dict().get('game_id')
+
+
+def stream_season_games(season_data):
+    """Jogos finalizados dentro do periodo da temporada"""
+    return (db.collection('games')
+            .where('status', '==', 'FINISHED')
+            .where('date', '>=', season_data['startDate'])
+            .where('date', '<=', season_data['endDate'])
+            .select(GAME_FIELDS)
+            .stream())
+
+
+def stream_by_game_ids(query, game_ids, fields):
+    """Executa `query` filtrando por game_id em pedacos de IN_QUERY_LIMIT"""
+    for chunk in chunked(list(game_ids), IN_QUERY_LIMIT):
+        yield from query.where('game_id', 'in', chunk).select(fields).stream()
+
+
+def load_game_rows(game_ids):
+    """Carrega confirmacoes e times dos jogos como linhas (dicts) prontas para agregar"""
+    confirmations = []
+    for conf in stream_by_game_ids(db.collection_group('confirmations'), game_ids, CONFIRMATION_FIELDS):
+        data = conf.to_dict()
+        data['game_id'] = game_id_of(conf)
+        confirmations.append(data)
+
+    teams = []
+    for team in stream_by_game_ids(db.collection('teams'), game_ids, TEAM_FIELDS):
+        data = team.to_dict()
+        data['id'] = team.id
+        teams.append(data)
+
+    return confirmations, teams
+
+
+def conceded_by_team(teams):
+    """Gols sofridos por time: soma dos placares dos outros times do mesmo jogo"""
+    total_by_game = defaultdict(int)
+    for team in teams:
+        total_by_game[team.get('game_id')] += team.get('score', 0) or 0
+
+    return {
+        team['id']: total_by_game[team.get('game_id')] - (team.get('score', 0) or 0)
+        for team in teams
+    }
+
+
+def is_goalkeeper(confirmation):
+    return bool(confirmation.get('is_goalkeeper')) or confirmation.get('position') == 'GOALKEEPER'
+
+
+def aggregate_stats(games, confirmations, teams):
+    """
+    Agrega as estatisticas por jogador em uma unica passada.
+
+    games: dict game_id -> dados do jogo
+    confirmations: linhas de confirmacao (com game_id)
+    teams: linhas de time (com id, game_id e score)
+    Retorna dict user_id -> {gamesPlayed, goalsScored, assists, cleanSheets, mvpCount}
+    """
+    conceded = conceded_by_team(teams)
+    stats = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+
+    for conf in confirmations:
+        game = games.get(conf.get('game_id'))
+        user_id = conf.get('user_id')
+        if game is None or not user_id or conf.get('status') != 'CONFIRMED':
+            continue
+
+        row = stats[user_id]
+        row['gamesPlayed'] += 1
+        row['goalsScored'] += conf.get('goals', 0) or 0
+        row['assists'] += conf.get('assists', 0) or 0
+        if conf.get('is_mvp') or (game.get('mvpId') and game.get('mvpId') == user_id):
+            row['mvpCount'] += 1
+        if is_goalkeeper(conf) and conceded.get(conf.get('team_id')) == 0:
+            row['cleanSheets'] += 1
+
+    return dict(stats)
+
+
+def calculate_points(row, season_data):
+    """Pontuacao do jogador segundo o modelo da temporada"""
+    return (row['gamesPlayed'] * season_data.get('pointsPerGame', 0)
+            + row['goalsScored'] * season_data.get('pointsPerGoal', 0)
+            + row['assists'] * season_data.get('pointsPerAssist', 0)
+            + row['cleanSheets'] * season_data.get('pointsPerCleanSheet', 0))
+
+
+def participation_ref(season_id, user_id):
+    """Referencia deterministica da participacao de um jogador"""
+    return db.collection('season_participations').document(f'{season_id}_{user_id}')
+
+
+def existing_participations(season_id, user_ids=None):
+    """Mapeia user_id -> referencia das participacoes ja existentes na temporada"""
+    query = db.collection('season_participations').where('seasonId', '==', season_id)
+    if user_ids is None:
+        docs = query.select(['userId']).stream()
+    else:
+        docs = (doc
+                for chunk in chunked(list(user_ids), IN_QUERY_LIMIT)
+                for doc in query.where('userId', 'in', chunk).select(['userId']).stream())
+    return {doc.to_dict().get('userId'): doc.reference for doc in docs}
+
+
+def recompute_season(season, dry_run=False):
+    """Recalcula do zero todas as participacoes da temporada"""
+    season_id = season.id
+    season_data = season.to_dict()
+
+    print(f"Temporada: {season_data.get('name')} ({season_id})")
+    print(f"Periodo: {season_data['startDate']} a {season_data['endDate']}\n")
+
+    games = {game.id: game.to_dict() for game in stream_season_games(season_data)}
+    print(f"Jogos finalizados: {len(games)}")
+
+    confirmations, teams = load_game_rows(games.keys())
+    print(f"Confirmacoes lidas: {len(confirmations)}")
+    print(f"Times lidos: {len(teams)}")
+
+    stats = aggregate_stats(games, confirmations, teams)
+    existing = existing_participations(season_id)
+
+    # Participacoes sem jogos na temporada voltam a zero
+    for user_id in existing:
+        stats.setdefault(user_id, dict.fromkeys(STAT_FIELDS, 0))
+
+    print(f"Jogadores: {len(stats)}\n")
+
+    writer = None if dry_run else db.bulk_writer()
+    for user_id, row in stats.items():
+        data = dict(row)
+        data['seasonId'] = season_id
+        data['userId'] = user_id
+        data['points'] = calculate_points(row, season_data)
+        data['updatedAt'] = firestore.SERVER_TIMESTAMP
+
+        ref = existing.get(user_id)
+        if ref is None:
+            ref = participation_ref(season_id, user_id)
+            data['division'] = DEFAULT_DIVISION
+            data['joinedAt'] = firestore.SERVER_TIMESTAMP
+
+        if writer is not None:
+            writer.set(ref, data, merge=True)
+
+    # Marca os jogos contabilizados para que --game nao os aplique de novo
+    for game_id, game_data in games.items():
+        if writer is not None and game_data.get('standingsSeasonId') != season_id:
+            writer.update(db.collection('games').document(game_id), {'standingsSeasonId': season_id})
+
+    if writer is not None:
+        writer.close()
+
+    ranking = sorted(stats.items(), key=lambda item: calculate_points(item[1], season_data), reverse=True)
+    print("TOP 10:")
+    for position, (user_id, row) in enumerate(ranking[:10], 1):
+        print(f"  {position:2d}. {user_id[:20]:20} {calculate_points(row, season_data):5d} pts"
+              f" | {row['gamesPlayed']} jogos | {row['goalsScored']} gols | {row['assists']} assist.")
+
+    return stats
+
+
+def apply_game(season, game_id, dry_run=False):
+    """
+    Aplica um unico jogo recem-finalizado na classificacao usando Increment.
+    O jogo e marcado com standingsSeasonId no mesmo lote, entao reaplicar e um no-op.
+    """
+    season_id = season.id
+    season_data = season.to_dict()
+
+    game = db.collection('games').document(game_id).get()
+    if not game.exists:
+        print(f"ERRO: Jogo {game_id} nao encontrado!")
+        return None
+
+    game_data = game.to_dict()
+    if game_data.get('status') != 'FINISHED':
+        print(f"Jogo {game_id} ainda nao foi finalizado ({game_data.get('status')})")
+        return None
+    if not season_data['startDate'] <= game_data.get('date', '') <= season_data['endDate']:
+        print(f"Jogo {game_id} ({game_data.get('date')}) fora do periodo da temporada")
+        return None
+    if game_data.get('standingsSeasonId') == season_id:
+        print(f"Jogo {game_id} ja aplicado na temporada {season_id}")
+        return None
+
+    confirmations, teams = load_game_rows([game_id])
+    stats = aggregate_stats({game_id: game_data}, confirmations, teams)
+    existing = existing_participations(season_id, stats.keys())
+
+    batch = db.batch()
+    for user_id, row in stats.items():
+        data = {field: firestore.Increment(value) for field, value in row.items()}
+        data['points'] = firestore.Increment(calculate_points(row, season_data))
+        data['seasonId'] = season_id
+        data['userId'] = user_id
+        data['updatedAt'] = firestore.SERVER_TIMESTAMP
+
+        ref = existing.get(user_id)
+        if ref is None:
+            ref = participation_ref(season_id, user_id)
+            data['division'] = DEFAULT_DIVISION
+            data['joinedAt'] = firestore.SERVER_TIMESTAMP
+        batch.set(ref, data, merge=True)
+
+    batch.update(game.reference, {'standingsSeasonId': season_id})
+
+    if dry_run:
+        print(f"Jogo {game_id} seria aplicado: {len(stats)} jogadores seriam atualizados")
+        return stats
+
+    batch.commit()
+    print(f"Jogo {game_id} aplicado: {len(stats)} jogadores atualizados")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recalcula a classificacao de uma temporada')
+    parser.add_argument('--season', help='ID da temporada (padrao: temporada ativa)')
+    parser.add_argument('--game', help='Aplica apenas este jogo finalizado (incremental)')
+    parser.add_argument('--dry-run', action='store_true', help='Calcula sem gravar')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("RECALCULAR CLASSIFICACAO DA TEMPORADA")
+    print("="*60 + "\n")
+
+    season = get_season(args.season)
+    if season is None:
+        print("ERRO: Temporada nao encontrada!")
+        exit(1)
+
+    if args.game:
+        apply_game(season, args.game, dry_run=args.dry_run)
+    else:
+        recompute_season(season, dry_run=args.dry_run)
+
+    if args.dry_run:
+        print("\n(dry-run: nada foi gravado)")
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Reconcilia confirmationCount/goalkeeperCount dos jogos com as confirmacoes reais
+
+Conta as confirmacoes de todos os jogos em uma unica passada por
+collection_group('confirmations') e corrige em lote apenas os jogos com
+contadores divergentes.
+
+Tambem define os contadores distribuidos (shards) em games/{id}/counter_shards:
+jogos com muitas confirmacoes simultaneas incrementam um shard aleatorio em
+vez do documento do jogo, e o total e a soma dos shards (read_counters).
+O app le confirmationCount/goalkeeperCount do documento do jogo: quem
+incrementa os shards chama fold_counters depois da rajada para gravar a soma
+no documento, e esta reconciliacao faz o mesmo para todo jogo com shards cujo
+documento ficou para tras. Ate la, quem precisa do valor exato soma os shards.
+
+Uso:
+    python scripts/reconcile_game_counters.py
+    python scripts/reconcile_game_counters.py --dry-run
+    python scripts/reconcile_game_counters.py --partitions 8     # varredura paralela
+"""
+
+import argparse
+import random
+from collections import defaultdict
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+from partitioned_scan import merge_counts, scan
+from recompute_season_standings import game_id_of
+
+try:
+    firebase_admin.get_app()
+except:
+    cred = credentials.Certificate('scripts/serviceAccountKey.json')
+    firebase_admin.initialize_app(cred)
+
+db = firestore.client()
+
+COUNTER_FIELDS = ['confirmationCount', 'goalkeeperCount']
+SHARDS_COLLECTION = 'counter_shards'
+DEFAULT_SHARDS = 10
+
+
+# ---------------------------------------------------------------------------
+# Contadores distribuidos
+# ---------------------------------------------------------------------------
+
+def init_counter_shards(game_ref, num_shards=DEFAULT_SHARDS, initial=None):
+    """Cria os shards do jogo; `initial` (dict) vai para o shard 0"""
+    batch = db.batch()
+    for shard in range(num_shards):
+        values = dict.fromkeys(COUNTER_FIELDS, 0)
+        if shard == 0 and initial:
+            values.update(initial)
+        batch.set(game_ref.collection(SHARDS_COLLECTION).document(str(shard)), values)
+    batch.update(game_ref, {'counterShards': num_shards})
+    batch.commit()
+
+
+def increment_counters(game_ref, num_shards, confirmations=1, goalkeepers=0):
+    """
+    Incrementa (ou decrementa, com valores negativos) um shard aleatorio.
+    O documento do jogo so muda em fold_counters
+    """
+    shard = game_ref.collection(SHARDS_COLLECTION).document(str(random.randrange(num_shards)))
+    shard.set({
+        'confirmationCount': firestore.Increment(confirmations),
+        'goalkeeperCount': firestore.Increment(goalkeepers),
+    }, merge=True)
+
+
+def read_counters(game_ref):
+    """Soma os shards do jogo"""
+    totals = dict.fromkeys(COUNTER_FIELDS, 0)
+    for shard in game_ref.collection(SHARDS_COLLECTION).stream():
+        data = shard.to_dict()
+        for field in COUNTER_FIELDS:
+            totals[field] += data.get(field, 0) or 0
+    return totals
+
+
+def fold_counters(game_ref):
+    """Grava no documento do jogo a soma dos shards (os campos que o app le)"""
+    totals = read_counters(game_ref)
+    game_ref.update(totals)
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# Reconciliacao
+# ---------------------------------------------------------------------------
+
+def count_confirmations(confirmations):
+    """game_id -> {confirmationCount, goalkeeperCount} contando so CONFIRMED"""
+    counts = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for conf in confirmations:
+        data = conf.to_dict()
+        if data.get('status') != 'CONFIRMED':
+            continue
+        row = counts[game_id_of(conf)]
+        row['confirmationCount'] += 1
+        if data.get('is_goalkeeper') or data.get('position') == 'GOALKEEPER':
+            row['goalkeeperCount'] += 1
+    return counts
+
+
+def count_partition(confirmations):
+    """count_confirmations de uma faixa, em dicts simples para voltar de outro processo"""
+    return {game_id: dict(row) for game_id, row in count_confirmations(confirmations).items()}
+
+
+def sum_shards(shards):
+    """game_id -> soma dos shards"""
+    totals = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for shard in shards:
+        data = shard.to_dict()
+        row = totals[shard.reference.parent.parent.id]
+        for field in COUNTER_FIELDS:
+            row[field] += data.get(field, 0) or 0
+    return totals
+
+
+def reconcile(dry_run=False, partitions=None, processes=False):
+    fields = ['status', 'is_goalkeeper', 'position', 'game_id']
+    if partitions:
+        actual = merge_counts(scan('confirmations', count_partition, partitions=partitions,
+                                   fields=fields, processes=processes))
+    else:
+        actual = count_confirmations(db.collection_group('confirmations').select(fields).stream())
+    print(f"Jogos com confirmacoes: {len(actual)}")
+
+    shard_totals = sum_shards(db.collection_group(SHARDS_COLLECTION).select(COUNTER_FIELDS).stream())
+
+    zero = dict.fromkeys(COUNTER_FIELDS, 0)
+    writer = None if dry_run else db.bulk_writer()
+    checked = 0
+    fixed = 0
+    folded = 0
+
+    for game in db.collection('games').select(COUNTER_FIELDS + ['counterShards']).stream():
+        checked += 1
+        data = game.to_dict()
+        expected = actual.get(game.id, zero)
+        num_shards = data.get('counterShards') or 0
+
+        stored = shard_totals.get(game.id, zero) if num_shards else data
+        counts_ok = all((stored.get(field) or 0) == expected[field] for field in COUNTER_FIELDS)
+        # Jogo com shards: o documento fica para tras ate alguem gravar a soma (fold_counters)
+        behind = bool(num_shards) and any((data.get(field) or 0) != (stored.get(field) or 0)
+                                          for field in COUNTER_FIELDS)
+        if counts_ok and not behind:
+            continue
+
+        if not counts_ok:
+            fixed += 1
+            print(f"  {game.id}: confirmacoes {stored.get('confirmationCount') or 0} -> {expected['confirmationCount']}"
+                  f" | goleiros {stored.get('goalkeeperCount') or 0} -> {expected['goalkeeperCount']}")
+        if behind:
+            folded += 1
+            print(f"  {game.id}: documento atras dos shards (confirmacoes {data.get('confirmationCount') or 0}"
+                  f" vs {stored.get('confirmationCount') or 0} | goleiros {data.get('goalkeeperCount') or 0}"
+                  f" vs {stored.get('goalkeeperCount') or 0})")
+        if writer is None:
+            continue
+
+        writer.update(game.reference, dict(expected))
+        if num_shards and not counts_ok:
+            # Total correto no shard 0, demais zerados
+            for shard in range(num_shards):
+                values = dict(expected) if shard == 0 else dict(zero)
+                writer.set(game.reference.collection(SHARDS_COLLECTION).document(str(shard)), values)
+
+    if writer is not None:
+        writer.close()
+
+    print(f"\nJogos verificados: {checked}")
+    print(f"Jogos corrigidos: {fixed}")
+    print(f"Jogos com documento atras dos shards: {folded}")
+    return fixed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcilia os contadores de confirmacoes dos jogos')
+    parser.add_argument('--dry-run', action='store_true', help='Mostra as divergencias sem corrigir')
+    parser.add_argument('--partitions', type=int, help='Le as confirmacoes em N faixas paralelas')
+    parser.add_argument('--processes', action='store_true', help='Com --partitions, usa processos em vez de threads')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("RECONCILIAR CONTADORES DOS JOGOS")
+    print("="*60 + "\n")
+
+    reconcile(dry_run=args.dry_run, partitions=args.partitions, processes=args.processes)
+
+    if args.dry_run:
+        print("\n(dry-run: nada foi gravado)")
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
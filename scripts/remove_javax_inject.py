@@ -1,22 +1,25 @@
-import os, re, glob
+"""Remove javax.inject imports and @Inject/@Singleton annotations (fora de /di/).
 
-sep = os.sep
-files = glob.glob('app/src/main/java/**/*.kt', recursive=True)
-files = [f for f in files if sep+'di'+sep not in f and '/di/' not in f]
+The rules are the 'javax-inject' rule set of codemod.py; this script is kept
+as a shortcut. To run it together with other migrations in a single pass:
+    python scripts/codemod.py javax-inject <outros rule sets>
+"""
+import os
 
-count = 0
-for f in files:
-    with open(f, 'r', encoding='utf-8') as fp:
-        content = fp.read()
-    orig = content
-    content = re.sub(r'import javax\.inject\.(Inject|Singleton|Named|Qualifier)\r?\n', '', content)
-    content = re.sub(r'@Inject\r?\n', '', content)
-    content = re.sub(r'@Singleton\r?\n', '', content)
-    content = content.replace('@Inject ', '').replace('@Singleton ', '')
-    if content != orig:
-        with open(f, 'w', encoding='utf-8') as fp:
-            fp.write(content)
-        count += 1
-        print('Fixed: ' + os.path.basename(f))
+from codemod import RULE_SETS, run
 
-print('Total: ' + str(count))
+
+def main():
+    count = 0
+    for f, changed, counts, diff in run([RULE_SETS['javax-inject']]):
+        if changed:
+            count += 1
+            print('Fixed: ' + os.path.basename(f))
+
+    print('Total: ' + str(count))
+
+
+if __name__ == '__main__':
+    # run() starts a process pool; with spawn (Windows, macOS) each worker
+    # re-imports this module, so nothing may run at import time
+    main()
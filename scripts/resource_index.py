@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Inverted index of the Android / Compose resources and their references.
+
+One walk over app, composeApp and shared reads every resource file and every
+Kotlin/Java source once and records, per resource key:
+    definitions   values XML entries (<string name=...>, <plurals>, <color>, ...),
+                  file resources (res/drawable/x.png -> R.drawable.x) and @+id/ ids
+    references    R.type.name / Res.type.name / MR.type.name in sources (outside
+                  comments and KDoc), @type/name, ?attr/name and style parents
+                  in XML (manifests included)
+Keys are (namespace, type, name): ('R', 'string', 'cd_back') for res/,
+('Res', 'string', ...) for composeResources/ and ('MR', 'strings', ...) for
+moko-resources (mr/). Library resources (android.R, material R, @android:)
+are not project keys and are left out.
+
+Missing keys, unused resources and per-module usage are then dictionary
+lookups instead of one grep (or a Gradle lint run) per resource. Per-file
+extraction results are cached like the scanners' (.cache/kotlin-audit).
+
+Resources looked up by name at runtime (Resources.getIdentifier) cannot be
+seen statically; the files doing it are listed with the unused report.
+
+Usage:
+    python3 scripts/resource_index.py                     # summary
+    python3 scripts/resource_index.py --missing
+    python3 scripts/resource_index.py --unused [--type string drawable]
+    python3 scripts/resource_index.py --unused --missing  # both reports, one index
+    python3 scripts/resource_index.py --usage
+    python3 scripts/resource_index.py --key R.string.cd_back
+    python3 scripts/resource_index.py --json index.json [--no-cache]
+"""
+import argparse
+import json
+import os
+import re
+import xml.parsers.expat
+from collections import Counter, defaultdict, namedtuple
+
+import kotlin_lexer
+from scan_cache import MISS, ResultCache, version_of
+from source_files import decode_source
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_ROOTS = ['app', 'composeApp', 'shared']
+SKIP_DIRS = {'build', '.gradle', '.idea', 'node_modules'}
+PROJECT_PACKAGE = 'com.futebadosparcas'
+
+# Resource directory name -> namespace of the generated accessor class
+RESOURCE_DIRS = {'res': 'R', 'composeResources': 'Res', 'mr': 'MR'}
+
+# Values XML element -> resource type, per namespace
+VALUE_TYPES = {
+    'R': {
+        'string': 'string', 'plurals': 'plurals', 'string-array': 'array', 'integer-array': 'array',
+        'array': 'array', 'color': 'color', 'dimen': 'dimen', 'style': 'style', 'integer': 'integer',
+        'bool': 'bool', 'fraction': 'fraction', 'drawable': 'drawable', 'attr': 'attr',
+        'declare-styleable': 'styleable',
+    },
+    'Res': {'string': 'string', 'plurals': 'plurals', 'string-array': 'array'},
+    'MR': {'string': 'strings', 'plurals': 'plurals'},
+}
+
+# Resource directory (without qualifiers) -> type of the files in it
+FILE_TYPES = {
+    'R': {name: name for name in ('drawable', 'mipmap', 'layout', 'menu', 'anim', 'animator', 'raw', 'xml',
+                                  'font', 'color', 'navigation', 'interpolator', 'transition')},
+    'Res': {'drawable': 'drawable', 'font': 'font'},
+    'MR': {'images': 'images', 'fonts': 'fonts', 'files': 'files', 'colors': 'colors'},
+}
+
+# Types not reported as unused: ids and attrs are referenced by generated code and the framework
+UNUSED_IGNORED_TYPES = {'id', 'attr', 'styleable'}
+# Types not reported as missing: themes and attrs mostly come from libraries (Material, AppCompat)
+MISSING_IGNORED_TYPES = {'attr', 'style'}
+
+SOURCE_REF = re.compile(r'(?<![\w.])((?:[A-Za-z_]\w*\.)*?)(R|Res|MR)\.(\w+)\.(\w+)')
+XML_REF = re.compile(r'@(\+?)([a-z]+)/([\w.]+)')
+XML_ATTR_REF = re.compile(r'(?<=[">])\?(?:attr/)?([A-Za-z_]\w*)\b(?!:)')
+STYLE_PARENT = re.compile(r'\bparent="(?:@style/)?([\w.]+)"')
+DYNAMIC_LOOKUP = re.compile(r'\bgetIdentifier\s*\(')
+
+Definition = namedtuple('Definition', ['key', 'module', 'path', 'line'])
+Reference = namedtuple('Reference', ['key', 'module', 'path', 'line'])
+
+
+def format_key(key):
+    return '.'.join(key)
+
+
+def parse_key(text):
+    """'R.string.cd_back' -> ('R', 'string', 'cd_back')"""
+    parts = text.split('.')
+    if len(parts) != 3 or parts[0] not in VALUE_TYPES:
+        raise ValueError(f'not a resource key (R|Res|MR).type.name: {text}')
+    return tuple(parts)
+
+
+def style_name(name):
+    # R.style.Theme_App_Dark is <style name="Theme.App.Dark">
+    return name.replace('.', '_')
+
+
+def line_of(text, offset):
+    return text.count('\n', 0, offset) + 1
+
+
+def resource_location(rel):
+    """(namespace, directory type, is_values_dir) of a file under a resource dir, or None"""
+    parts = rel.split('/')
+    for idx, part in enumerate(parts[:-2]):
+        if part in RESOURCE_DIRS and idx >= 2 and parts[idx - 2] == 'src':
+            kind = parts[idx + 1].split('-')[0]
+            return RESOURCE_DIRS[part], kind, kind == 'values'
+    return None
+
+
+def values_definitions(text, ns):
+    """(type, name, line) of the entries of a values XML file"""
+    types = VALUE_TYPES[ns]
+    found = []
+    stack = []
+    parser = xml.parsers.expat.ParserCreate()
+
+    def start(tag, attrs):
+        parent = stack[-1] if stack else None
+        name = attrs.get('name')
+        if name and parent == 'resources':
+            kind = attrs.get('type') if tag == 'item' else types.get(tag)
+            if kind:
+                found.append((kind, style_name(name) if ns == 'R' else name, parser.CurrentLineNumber))
+        elif name and tag == 'attr' and parent == 'declare-styleable' and ':' not in name:
+            found.append(('attr', name, parser.CurrentLineNumber))
+        stack.append(tag)
+
+    def end(tag):
+        stack.pop()
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.Parse(text.encode('utf-8'), True)
+    return found
+
+
+def xml_references(text):
+    """(definitions, references) as (type, name, line) found in any resource/manifest XML"""
+    definitions = []
+    references = []
+    for match in XML_REF.finditer(text):
+        if text[match.start() + 1:match.start() + 9] == 'android:':
+            continue
+        kind, name = match.group(2), match.group(3)
+        target = definitions if match.group(1) else references
+        target.append((kind, style_name(name), line_of(text, match.start())))
+    for match in XML_ATTR_REF.finditer(text):
+        references.append(('attr', match.group(1), line_of(text, match.start())))
+    for match in STYLE_PARENT.finditer(text):
+        references.append(('style', style_name(match.group(1)), line_of(text, match.start())))
+    # <style name="Theme.App.Dark"> without parent= inherits from Theme.App
+    for match in re.finditer(r'<style\s+name="([\w.]+)"(?![^>]*\bparent=)', text):
+        if '.' in match.group(1):
+            references.append(('style', style_name(match.group(1).rsplit('.', 1)[0]),
+                               line_of(text, match.start())))
+    return definitions, references
+
+
+def source_references(text, code=None):
+    """
+    (namespace, type, name, line) of the generated resource accessors used in Kotlin/Java code.
+    code: text with comments blanked out, when the caller already lexed it (CallIndex.code)
+    """
+    refs = []
+    # R.string.x in a comment or KDoc is neither a missing key nor a use of the resource
+    if code is None:
+        code = kotlin_lexer.strip_comments(text) if SOURCE_REF.search(text) else text
+    for match in SOURCE_REF.finditer(code):
+        package = match.group(1).rstrip('.')
+        if package and not package.startswith(PROJECT_PACKAGE) and 'generated.resources' not in package:
+            continue
+        refs.append((match.group(2), match.group(3), match.group(4), line_of(text, match.start())))
+    return refs
+
+
+def extract(path, rel):
+    """
+    Per-file result (cached): {'defs': [[ns, type, name, line]], 'refs': [...], 'dynamic': [line]}
+    """
+    result = {'defs': [], 'refs': [], 'dynamic': []}
+    location = resource_location(rel)
+    if location is not None and not rel.endswith('.xml'):
+        ns, kind, _ = location
+        if kind in FILE_TYPES[ns]:
+            result['defs'].append([ns, FILE_TYPES[ns][kind], os.path.basename(rel).split('.')[0], 1])
+        return result
+
+    with open(path, 'rb') as f:
+        text = decode_source(f.read())
+
+    if rel.endswith(('.kt', '.java')):
+        result['refs'] = [list(ref) for ref in source_references(text)]
+        result['dynamic'] = [line_of(text, m.start()) for m in DYNAMIC_LOOKUP.finditer(text)]
+        return result
+
+    # XML: values entries, file resources (layouts, drawables, ...), manifests
+    if location is not None:
+        ns, kind, is_values = location
+        if is_values:
+            result['defs'] = [[ns, kind_, name, line] for kind_, name, line in values_definitions(text, ns)]
+        elif kind in FILE_TYPES[ns]:
+            result['defs'].append([ns, FILE_TYPES[ns][kind], os.path.basename(rel).split('.')[0], 1])
+    if location is None or location[0] == 'R':
+        ids, refs = xml_references(text)
+        result['defs'] += [['R', kind, name, line] for kind, name, line in ids]
+        result['refs'] = [['R', kind, name, line] for kind, name, line in refs]
+    return result
+
+
+def indexed_files(roots, sources=True):
+    """Resource files, manifests and (with sources) Kotlin/Java files, in one walk"""
+    paths = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(PROJECT_ROOT, root)):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.'))
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, PROJECT_ROOT).replace('\\', '/')
+                if resource_location(rel) is not None or name == 'AndroidManifest.xml':
+                    paths.append((path, rel))
+                elif sources and name.endswith(('.kt', '.java')) and '/src/' in rel:
+                    paths.append((path, rel))
+    return paths
+
+
+def resource_paths(roots=SOURCE_ROOTS):
+    """Resource files and manifests under roots (everything the definitions come from)"""
+    return [path for path, _ in indexed_files(roots, sources=False)]
+
+
+class ResourceIndex:
+    def __init__(self):
+        self.definitions = defaultdict(list)
+        self.references = defaultdict(list)
+        self.dynamic_lookups = []
+        self.files = 0
+
+    @classmethod
+    def build(cls, roots=SOURCE_ROOTS, sources=True, use_cache=True):
+        """Index of roots; sources=False reads only resource files (definitions, XML references)"""
+        cache = ResultCache('resource_index', version_of(__file__, kotlin_lexer.__file__)) if use_cache else None
+        index = cls()
+        paths = indexed_files(roots, sources)
+        for path, rel in paths:
+            result = cache.lookup(path) if cache is not None else MISS
+            if result is MISS:
+                result = extract(path, rel)
+                if cache is not None:
+                    cache.store(path, result)
+            index.add(rel, result)
+        if cache is not None:
+            cache.save()
+        index.files = len(paths)
+        return index
+
+    def add(self, rel, result):
+        module = rel.split('/', 1)[0]
+        for ns, kind, name, line in result['defs']:
+            key = (ns, kind, name)
+            self.definitions[key].append(Definition(key, module, rel, line))
+        for ns, kind, name, line in result['refs']:
+            key = (ns, kind, name)
+            self.references[key].append(Reference(key, module, rel, line))
+        self.dynamic_lookups.extend((rel, line) for line in result['dynamic'])
+
+    def defined(self, key):
+        return key in self.definitions
+
+    def names(self, ns, kind, module=None):
+        """Names defined for a namespace/type (optionally only by one module)"""
+        return {key[2] for key, defs in self.definitions.items()
+                if key[:2] == (ns, kind) and (module is None or any(d.module == module for d in defs))}
+
+    def missing(self):
+        """Referenced keys without a definition: {key: [Reference]}"""
+        return {key: refs for key, refs in sorted(self.references.items())
+                if key not in self.definitions and key[1] not in MISSING_IGNORED_TYPES}
+
+    def unused(self, kinds=None):
+        """Defined keys nobody references: {key: [Definition]}"""
+        return {key: defs for key, defs in sorted(self.definitions.items())
+                if key not in self.references and key[1] not in UNUSED_IGNORED_TYPES
+                and (kinds is None or key[1] in kinds)}
+
+    def usage_by_module(self):
+        """{module: Counter of 'ns.type' referenced from it}"""
+        usage = defaultdict(Counter)
+        for key, refs in self.references.items():
+            for ref in refs:
+                usage[ref.module][f'{key[0]}.{key[1]}'] += 1
+        return usage
+
+    def definitions_by_module(self):
+        """{module: Counter of 'ns.type' defined in it} (one per key, not per translation)"""
+        defined = defaultdict(Counter)
+        for key, defs in self.definitions.items():
+            for module in {d.module for d in defs}:
+                defined[module][f'{key[0]}.{key[1]}'] += 1
+        return defined
+
+    def to_dict(self):
+        return {
+            'files': self.files,
+            'definitions': {format_key(k): [d._asdict() for d in v] for k, v in sorted(self.definitions.items())},
+            'references': {format_key(k): [r._asdict() for r in v] for k, v in sorted(self.references.items())},
+            'dynamic_lookups': [{'path': path, 'line': line} for path, line in self.dynamic_lookups],
+        }
+
+
+def print_summary(index):
+    print('=' * 60)
+    print(f'RESOURCE INDEX ({index.files} files)')
+    print('=' * 60)
+    defined = index.definitions_by_module()
+    used = index.usage_by_module()
+    for module in sorted(set(defined) | set(used)):
+        print(f'\n{module}:')
+        kinds = sorted(set(defined[module]) | set(used[module]))
+        for kind in kinds:
+            print(f'  {kind:<16} defined: {defined[module][kind]:>5}   references: {used[module][kind]:>5}')
+    print(f'\nMissing keys:     {len(index.missing())}')
+    print(f'Unused resources: {len(index.unused())}')
+    print('=' * 60)
+
+
+def print_missing(index, limit):
+    missing = index.missing()
+    print(f'Referenced but not defined: {len(missing)}')
+    for key, refs in missing.items():
+        print(f'\n  {format_key(key)} ({len(refs)} references)')
+        for ref in refs[:limit]:
+            print(f'    {ref.path}:{ref.line}')
+
+
+def print_unused(index, kinds):
+    unused = index.unused(kinds)
+    by_kind = Counter(key[:2] for key in unused)
+    print(f'Defined but never referenced: {len(unused)}')
+    for key, defs in unused.items():
+        print(f'  {format_key(key):<60} {defs[0].path}:{defs[0].line}')
+    print()
+    for kind, count in sorted(by_kind.items()):
+        print(f'  {".".join(kind)}: {count}')
+    if index.dynamic_lookups:
+        print('\nLooked up by name at runtime (getIdentifier), may be false positives:')
+        for path, line in index.dynamic_lookups:
+            print(f'  {path}:{line}')
+
+
+def print_usage(index):
+    for module, usage in sorted(index.usage_by_module().items()):
+        print(f'{module}: {sum(usage.values())} references')
+        for kind, count in usage.most_common():
+            print(f'  {kind:<16} {count}')
+
+
+def print_key(index, key):
+    print(format_key(key))
+    defs = index.definitions.get(key, [])
+    refs = index.references.get(key, [])
+    print(f'  defined ({len(defs)}):' if defs else '  NOT DEFINED')
+    for d in defs:
+        print(f'    {d.path}:{d.line}')
+    print(f'  referenced ({len(refs)}):' if refs else '  never referenced')
+    for r in refs:
+        print(f'    {r.path}:{r.line}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index of resource definitions and references')
+    # Reports combine: each one asked for is printed from the same index
+    parser.add_argument('--missing', action='store_true', help='Keys referenced but not defined')
+    parser.add_argument('--unused', action='store_true', help='Resources defined but never referenced')
+    parser.add_argument('--usage', action='store_true', help='References per module and type')
+    parser.add_argument('--key', help='Where one key is defined and used (e.g. R.string.cd_back)')
+    parser.add_argument('--type', nargs='+', metavar='TYPE', help='With --unused: only these types (string, drawable, ...)')
+    parser.add_argument('--limit', type=int, default=5, help='References listed per missing key')
+    parser.add_argument('--json', metavar='FILE', help='Also save the whole index as JSON')
+    parser.add_argument('--no-cache', action='store_true', help='Re-read every file, ignore the result cache')
+    args = parser.parse_args()
+
+    try:
+        key = parse_key(args.key) if args.key else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    index = ResourceIndex.build(use_cache=not args.no_cache)
+
+    reports = []
+    if args.unused:
+        reports.append(lambda: print_unused(index, set(args.type) if args.type else None))
+    if args.missing:
+        reports.append(lambda: print_missing(index, args.limit))
+    if args.usage:
+        reports.append(lambda: print_usage(index))
+    if key:
+        reports.append(lambda: print_key(index, key))
+    for idx, report in enumerate(reports or [lambda: print_summary(index)]):
+        if idx:
+            print()
+        report()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(index.to_dict(), f, indent=2, ensure_ascii=False)
+        print(f'\nSaved to {args.json}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Persistent per-file result cache for the Kotlin source scanners.
+
+Entries are keyed by path (relative to the project root) and validated by
+mtime + size first, then by content hash, so a touched-but-unchanged file is
+still a hit. The cache is invalidated as a whole when the scanner's own source
+changes (its hash is the cache version).
+
+changed_files() lists the files touched by a git range (plus uncommitted and
+untracked files); scanners re-parse those and trust the cache for the rest.
+
+Usage (from a scanner):
+    cache = ResultCache('audit_real_cd', version_of(__file__))
+    result = cache.lookup(path)
+    if result is MISS:
+        result = analyze(path)
+        cache.store(path, result)
+    cache.save()
+"""
+import hashlib
+import json
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'kotlin-audit')
+
+MISS = object()
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def version_of(*paths):
+    """Cache version from the analyzer sources: editing a rule drops stale results"""
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def cache_key(path):
+    return os.path.relpath(os.path.abspath(path), PROJECT_ROOT).replace('\\', '/')
+
+
+class ResultCache:
+    def __init__(self, name, version, cache_dir=CACHE_DIR):
+        self.path = os.path.join(cache_dir, f'{name}.json')
+        self.version = version
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.version:
+            self.entries = data.get('files', {})
+
+    def lookup(self, path, trust=False):
+        """
+        Cached result for path, or MISS.
+        trust=True skips validation (the caller knows the file did not change).
+        """
+        entry = self.entries.get(cache_key(path))
+        if entry is None:
+            self.misses += 1
+            return MISS
+        if trust:
+            self.hits += 1
+            return entry['result']
+
+        stat = os.stat(path)
+        if entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            self.hits += 1
+            return entry['result']
+
+        if entry['sha1'] == file_digest(path):
+            # Same content, new mtime (checkout, touch): refresh the stat fast path
+            entry['mtime_ns'] = stat.st_mtime_ns
+            entry['size'] = stat.st_size
+            self._dirty = True
+            self.hits += 1
+            return entry['result']
+
+        self.misses += 1
+        return MISS
+
+    def store(self, path, result):
+        stat = os.stat(path)
+        self.entries[cache_key(path)] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha1': file_digest(path),
+            'result': result,
+        }
+        self._dirty = True
+
+    def discard(self, path):
+        if self.entries.pop(cache_key(path), None) is not None:
+            self._dirty = True
+
+    def prune(self, root, paths):
+        """Drop entries under root for files that are no longer in the scanned set"""
+        prefix = cache_key(root).rstrip('/') + '/'
+        keep = {cache_key(path) for path in paths}
+        stale = [key for key in self.entries if key.startswith(prefix) and key not in keep]
+        for key in stale:
+            del self.entries[key]
+        self._dirty = self._dirty or bool(stale)
+
+    def save(self):
+        if not self._dirty:
+            return
+        # tempfile and subprocess are imported where used: a cold --no-cache run never needs them
+        import tempfile
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'files': self.entries}, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+def _git_lines(*args):
+    import subprocess
+    out = subprocess.run(['git', *args], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True).stdout
+    return [line for line in out.splitlines() if line]
+
+
+def changed_files(git_range):
+    """
+    Absolute paths changed in git_range (e.g. 'HEAD', 'origin/main...HEAD'),
+    plus uncommitted and untracked files.
+    """
+    names = set(_git_lines('diff', '--name-only', git_range))
+    names.update(_git_lines('diff', '--name-only', 'HEAD'))
+    names.update(_git_lines('ls-files', '--others', '--exclude-standard'))
+    return {os.path.join(PROJECT_ROOT, name) for name in names}
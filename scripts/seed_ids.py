@@ -0,0 +1,164 @@
+"""
+IDs deterministicos e gravacao create-if-absent para os scripts de seed
+
+Os scripts que criam locais e quadras usavam IDs automaticos (document(),
+.add()), entao cada nova execucao duplicava tudo. Aqui o ID sai da chave
+natural normalizada (sem acento, minusculo, so letras e numeros):
+    local  -> nome + endereco        loc_jb-esportes-eventos_3f9c0a1b2d4e
+    quadra -> nome + ID do local     fld_society-1_8a7b6c5d4e3f
+
+SeedWriter junta os documentos, le todos com get_all (100 por chamada) e
+grava em batches so o que falta (create) ou, com merge=True, tambem os campos
+que mudaram. Rodar de novo custa so as leituras: zero escritas e nada para o
+check_duplicates.py limpar.
+
+Documentos gravados antes dos IDs deterministicos (IDs aleatorios) podem ser
+reaproveitados com adopt_ids(), em vez de ganharem uma copia nova.
+
+Uso:
+    writer = SeedWriter(db, merge=False, dry_run=False)
+    loc_id = location_id(nome, endereco)
+    writer.put(db.collection('locations').document(loc_id), dados)
+    writer.flush()        # get_all + batches; writer.created / updated / unchanged
+"""
+
+import hashlib
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+
+from google.api_core.exceptions import Conflict
+
+# Referencias por chamada de get_all
+READ_BATCH_SIZE = 100
+
+# Operacoes por batch (limite do Firestore)
+BATCH_LIMIT = 500
+
+ID_HASH_CHARS = 12
+ID_SLUG_CHARS = 40
+
+# Valores comparaveis com o que esta gravado; sentinelas (SERVER_TIMESTAMP,
+# Increment, ...) so valem na criacao e nao contam como mudanca
+PLAIN_TYPES = (str, int, float, bool, list, dict, datetime, type(None))
+
+
+def normalize(text):
+    """'JB Esportes & Eventos' -> 'jb esportes eventos'"""
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+
+
+def location_key(name, address):
+    return (normalize(name), normalize(address))
+
+
+def field_key(location_id, name):
+    return (location_id, normalize(name))
+
+
+def stable_id(prefix, key):
+    """prefixo + slug da primeira parte + hash da chave inteira (mesma chave, mesmo ID)"""
+    digest = hashlib.sha1('|'.join(key).encode('utf-8')).hexdigest()[:ID_HASH_CHARS]
+    slug = key[0].replace(' ', '-')[:ID_SLUG_CHARS]
+    return f'{prefix}_{slug}_{digest}' if slug else f'{prefix}_{digest}'
+
+
+def location_id(name, address):
+    return stable_id('loc', location_key(name, address))
+
+
+def field_id(location_id, name):
+    key = field_key(location_id, name)
+    return stable_id('fld', (key[1], key[0]))
+
+
+def adopt_ids(snapshots, key_of):
+    """
+    {chave natural: ID} de documentos ja existentes, para reaproveitar IDs
+    antigos em vez de criar outro documento. Com duplicatas, fica o menor ID.
+    """
+    ids = {}
+    for snap in sorted(snapshots, key=lambda s: s.id):
+        ids.setdefault(key_of(snap.to_dict() or {}), snap.id)
+    return ids
+
+
+def changed_fields(current, data):
+    """Campos de data com valor diferente do gravado (sentinelas ignoradas)"""
+    return {key: value for key, value in data.items()
+            if isinstance(value, PLAIN_TYPES) and current.get(key) != value}
+
+
+class SeedWriter:
+    def __init__(self, client, merge=False, dry_run=False):
+        self._client = client
+        self.merge = merge
+        self.dry_run = dry_run
+        self._pending = OrderedDict()  # caminho -> (referencia, dados)
+        self.created = []
+        self.updated = []
+        self.unchanged = []
+        self.rpcs = 0
+
+    def put(self, ref, data):
+        self._pending[ref.path] = (ref, data)
+
+    def flush(self):
+        """Le o que esta pendente e grava so o necessario; devolve [(operacao, ref, dados)]"""
+        pending = list(self._pending.values())
+        self._pending.clear()
+
+        existing = {}
+        for i in range(0, len(pending), READ_BATCH_SIZE):
+            self.rpcs += 1
+            for snap in self._client.get_all([ref for ref, _ in pending[i:i + READ_BATCH_SIZE]]):
+                if snap.exists:
+                    existing[snap.reference.path] = snap.to_dict()
+
+        ops = []
+        for ref, data in pending:
+            current = existing.get(ref.path)
+            changes = changed_fields(current, data) if current is not None and self.merge else None
+            if current is None:
+                ops.append(('create', ref, data))
+                self.created.append(ref.path)
+            elif changes:
+                ops.append(('merge', ref, changes))
+                self.updated.append(ref.path)
+            else:
+                self.unchanged.append(ref.path)
+
+        if not self.dry_run:
+            self._commit(ops)
+        return ops
+
+    def _commit(self, ops):
+        for i in range(0, len(ops), BATCH_LIMIT):
+            chunk = ops[i:i + BATCH_LIMIT]
+            batch = self._client.batch()
+            for op, ref, data in chunk:
+                if op == 'create':
+                    batch.create(ref, data)
+                else:
+                    batch.set(ref, data, merge=True)
+            self.rpcs += 1
+            try:
+                batch.commit()
+            except Conflict:
+                # Alguem criou um desses documentos depois da leitura: o batch inteiro
+                # falhou, entao grava um a um e pula os que ja existem
+                self._commit_each(chunk)
+
+    def _commit_each(self, chunk):
+        for op, ref, data in chunk:
+            self.rpcs += 1
+            if op != 'create':
+                ref.set(data, merge=True)
+                continue
+            try:
+                ref.create(data)
+            except Conflict:
+                self.created.remove(ref.path)
+                self.unchanged.append(ref.path)
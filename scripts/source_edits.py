@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Offset-based source edits for the Kotlin fix scripts.
+
+Fixers do not rebuild the file string; they describe what to change as
+Edit(offset, length, replacement) records against the original content.
+apply_edits() splices all of them in one pass (each unchanged span is copied
+once), write_atomic() replaces the file through a temp file + os.replace so
+an interrupted run never leaves a half-written source, and unified_diff()
+renders the same change as a patch for review instead of writing it.
+
+Usage:
+    edits = [Edit(10, 0, 'inserted'), Edit(42, 5, 'other')]
+    new_content = apply_edits(content, edits)
+    if new_content != content:
+        write_atomic(path, new_content)
+"""
+import difflib
+import os
+import tempfile
+from collections import namedtuple
+
+# offset/length in characters of the original content; length 0 is an insertion
+Edit = namedtuple('Edit', ['offset', 'length', 'replacement'])
+
+
+def normalize_edits(edits):
+    """
+    Edits sorted by offset, without overlaps: an edit starting inside one
+    already kept (a fix nested in a call that is rewritten whole) is dropped.
+    Insertions at the same offset keep their original order.
+    """
+    kept = []
+    end = -1
+    for edit in sorted(edits, key=lambda e: (e.offset, e.length)):
+        if kept and edit.offset < end:
+            continue
+        kept.append(edit)
+        end = max(end, edit.offset + edit.length)
+    return kept
+
+
+def apply_edits(content, edits):
+    """content with every edit applied, in a single splice pass"""
+    pieces = []
+    pos = 0
+    for edit in normalize_edits(edits):
+        pieces.append(content[pos:edit.offset])
+        pieces.append(edit.replacement)
+        pos = edit.offset + edit.length
+    pieces.append(content[pos:])
+    return ''.join(pieces)
+
+
+def write_atomic(path, content, encoding='utf-8'):
+    """Replace path with content; readers see the old file or the new one, never a partial write"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            f.write(content)
+        try:
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def unified_diff(path, old, new, label=None):
+    """git-style unified diff of one file ('' when unchanged)"""
+    name = (label or path).replace('\\', '/')
+    lines = []
+    for line in difflib.unified_diff(old.splitlines(keepends=True), new.splitlines(keepends=True),
+                                     fromfile=f'a/{name}', tofile=f'b/{name}'):
+        lines.append(line)
+        if not line.endswith('\n'):
+            lines.append('\n\\ No newline at end of file\n')
+    return ''.join(lines)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Prefiltered source reading for the Kotlin scanners.
+
+read_source() looks for the scanner's trigger tokens (a bytes MultiPattern)
+in the raw file bytes before anything else: a file without any trigger costs
+one C-level regex pass and is never decoded, lexed or parsed. Files from
+MMAP_MIN_BYTES up are memory-mapped, so the prefilter reads them straight
+from the page cache without copying; smaller files are cheaper to read in
+one call than to map. Only files with a hit are decoded, with the same
+newline translation as open(..., 'r').
+
+balanced_chunks() splits the files of a scan into chunks of similar total
+size for the scanners' process pools.
+
+Usage:
+    TRIGGERS = MultiPattern([b'Icon', b'Image'])
+    text, hits = read_source(path, TRIGGERS)
+    if text is None:
+        return []           # no trigger: nothing to parse
+"""
+import mmap
+import os
+
+# Below this size one read() is as fast as mmap + munmap (measured on CPython 3 / Linux)
+MMAP_MIN_BYTES = 256 * 1024
+
+# Chunks per worker: more chunks smooth out uneven files, fewer cut IPC overhead
+CHUNKS_PER_WORKER = 4
+
+
+def decode_source(data, encoding='utf-8'):
+    """bytes -> str as text-mode open() would return it (universal newlines)"""
+    text = data.decode(encoding)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def read_source(path, prefilter=None, encoding='utf-8'):
+    """
+    (text, hits): hits is the set of prefilter patterns found in the file and
+    text is None when there is none. Without a prefilter the file is always
+    decoded and hits is empty.
+    """
+    with open(path, 'rb') as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        if size >= MMAP_MIN_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if prefilter is None:
+                    return decode_source(mm[:], encoding), set()
+                hits = prefilter.present(mm)
+                return (decode_source(mm[:], encoding) if hits else None), hits
+        data = f.read()
+
+    if prefilter is None:
+        return decode_source(data, encoding), set()
+    hits = prefilter.present(data)
+    return (decode_source(data, encoding) if hits else None), hits
+
+
+def balanced_chunks(paths, count):
+    """Split paths into `count` chunks of similar total size (largest file first)"""
+    chunks = [[] for _ in range(max(count, 1))]
+    loads = [0] * len(chunks)
+    for path in sorted(paths, key=lambda p: (-os.path.getsize(p), p)):
+        idx = loads.index(min(loads))
+        chunks[idx].append(path)
+        loads[idx] += os.path.getsize(path)
+    return [chunk for chunk in chunks if chunk]
@@ -0,0 +1,169 @@
+"""
+Balanceamento de times em lote (versao Python do GreedyTeamBalancer do app)
+
+Parte do mesmo snake draft do TeamBalancer.kt (goleiros alternados, jogadores
+de linha em 0,1,1,0,...) e refina com busca local por trocas: a cada passo
+avalia todas as trocas A<->B de uma vez (valores do time B ordenados + busca
+binaria pelo valor ideal) e aplica a melhor. Goleiros so trocam com goleiros,
+entao a restricao de goleiros por time se mantem.
+
+Sem Firebase: o benchmark roda sobre pools sinteticos.
+
+Uso:
+    python scripts/team_balancer.py --benchmark 5000
+"""
+
+import argparse
+import bisect
+import random
+import time
+
+# Mesmo padrao do app quando o jogador ainda nao tem estatisticas
+DEFAULT_RATING = 3.0
+
+
+def player_rating(stats):
+    """
+    Nota geral de 0 a 5 a partir do documento de `statistics`, com a mesma
+    formula do GetPlayerPerformanceUseCase (40% ataque, 30% defesa, 20% vitorias,
+    10% disciplina).
+    """
+    games = (stats or {}).get('total_games') or 0
+    if not games:
+        return DEFAULT_RATING
+    offensive = min((stats.get('total_goals') or 0) / games / 1.5, 1.0)
+    defensive = min((stats.get('total_saves') or 0) / games / 4.0, 1.0)
+    wins = (stats.get('total_wins') or 0) / games
+    cards = (stats.get('yellow_cards') or 0) + (stats.get('red_cards') or 0)
+    discipline = max(1.0 - cards / games / 2.0, 0.0)
+    combined = offensive * 0.4 + defensive * 0.3 + wins * 0.2 + discipline * 0.1
+    return round(min(max(combined * 5.0, 0.0), 5.0), 3)
+
+
+def snake_draft(players):
+    """Distribui [(id, rating)] ja ordenados: 0,1,1,0,0,1,..."""
+    team_a, team_b = [], []
+    for index, player in enumerate(players):
+        round_number, pick = divmod(index, 2)
+        goes_to_a = pick == 0 if round_number % 2 == 0 else pick == 1
+        (team_a if goes_to_a else team_b).append(player)
+    return team_a, team_b
+
+
+def best_swap(team_a, team_b, diff):
+    """
+    Melhor troca (i, j) entre team_a[i] e team_b[j] para a diferenca `diff` (soma A - soma B).
+    Trocar a por b muda a diferenca para diff - 2*(a - b); o ideal e b = a - diff/2.
+    Retorna (nova_diferenca_absoluta, i, j) ou None se nenhuma troca melhora.
+    """
+    if not team_a or not team_b:
+        return None
+
+    order = sorted(range(len(team_b)), key=lambda j: team_b[j][1])
+    values_b = [team_b[j][1] for j in order]
+
+    best = None
+    for i, (_, a) in enumerate(team_a):
+        target = a - diff / 2
+        pos = bisect.bisect_left(values_b, target)
+        for k in (pos - 1, pos):
+            if 0 <= k < len(values_b):
+                new_diff = abs(diff - 2 * (a - values_b[k]))
+                if best is None or new_diff < best[0]:
+                    best = (new_diff, i, order[k])
+
+    if best is None or best[0] >= abs(diff) - 1e-9:
+        return None
+    return best
+
+
+def balance(players, goalkeepers, goalkeepers_per_team=1, max_steps=50):
+    """
+    Divide jogadores de linha e goleiros em dois times equilibrados.
+
+    players, goalkeepers: listas de (id, rating)
+    Goleiros alem de `goalkeepers_per_team` por time jogam na linha.
+    Retorna dict com teamA/teamB (ids), ratingA/ratingB (medias) e difference (entre as somas).
+    """
+    goalkeepers = sorted(goalkeepers, key=lambda p: p[1], reverse=True)
+    players = players + goalkeepers[2 * goalkeepers_per_team:]
+    gk_a, gk_b = snake_draft(goalkeepers[:2 * goalkeepers_per_team])
+    line_a, line_b = snake_draft(sorted(players, key=lambda p: p[1], reverse=True))
+
+    def diff():
+        return (sum(r for _, r in line_a) + sum(r for _, r in gk_a)
+                - sum(r for _, r in line_b) - sum(r for _, r in gk_b))
+
+    for _ in range(max_steps):
+        current = diff()
+        candidates = [swap + (group,) for group, swap in
+                      (('line', best_swap(line_a, line_b, current)), ('gk', best_swap(gk_a, gk_b, current)))
+                      if swap is not None]
+        if not candidates:
+            break
+        _, i, j, group = min(candidates)
+        team_a, team_b = (line_a, line_b) if group == 'line' else (gk_a, gk_b)
+        team_a[i], team_b[j] = team_b[j], team_a[i]
+
+    team_a = gk_a + line_a
+    team_b = gk_b + line_b
+    rating_a = sum(r for _, r in team_a) / len(team_a) if team_a else 0.0
+    rating_b = sum(r for _, r in team_b) / len(team_b) if team_b else 0.0
+    return {
+        'teamA': [player_id for player_id, _ in team_a],
+        'teamB': [player_id for player_id, _ in team_b],
+        'ratingA': round(rating_a, 3),
+        'ratingB': round(rating_b, 3),
+        'difference': round(abs(diff()), 3),
+    }
+
+
+def synthetic_pools(count, seed=42):
+    """Pools parecidos com os jogos reais: 10 a 20 jogadores de linha e 0 a 2 goleiros"""
+    rng = random.Random(seed)
+    pools = []
+    for n in range(count):
+        players = [(f'p{n}_{i}', round(rng.uniform(0.5, 5.0), 2)) for i in range(rng.randint(10, 20))]
+        goalkeepers = [(f'g{n}_{i}', round(rng.uniform(0.5, 5.0), 2)) for i in range(rng.randint(0, 2))]
+        pools.append((players, goalkeepers))
+    return pools
+
+
+def benchmark(count):
+    pools = synthetic_pools(count)
+
+    started = time.perf_counter()
+    greedy_diff = 0.0
+    for players, goalkeepers in pools:
+        result = balance(players, goalkeepers, max_steps=0)
+        greedy_diff += result['difference']
+    greedy_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    local_diff = 0.0
+    for players, goalkeepers in pools:
+        result = balance(players, goalkeepers)
+        local_diff += result['difference']
+    local_time = time.perf_counter() - started
+
+    print(f"Pools: {count}")
+    print(f"Snake draft:  {count / greedy_time:10.0f} pools/s | diferenca media de soma {greedy_diff / count:.3f}")
+    print(f"Busca local:  {count / local_time:10.0f} pools/s | diferenca media de soma {local_diff / count:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do balanceamento de times em lote')
+    parser.add_argument('--benchmark', type=int, default=5000, help='Numero de pools sinteticos')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("BENCHMARK - BALANCEAMENTO DE TIMES")
+    print("="*60 + "\n")
+
+    benchmark(args.benchmark)
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
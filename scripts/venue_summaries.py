@@ -0,0 +1,170 @@
+"""
+Resumos materializados das quadras de cada local
+
+Para mostrar quantas quadras um local tem, de que tipos e a faixa de preco,
+as listagens consultavam os fields de cada local (N + quadras leituras).
+Este job faz uma unica varredura de fields (com projecao), agrupa por local
+e grava em location_summaries/{locationId}:
+    fieldCount, fieldsByType {tipo: n}, minPrice, maxPrice,
+    coveredCount, uncoveredCount, inactiveCount, sourceHash, updatedAt
+Assim uma listagem le N documentos. Os scripts que gravam quadras
+(populate_real_data.py, add_campo_fields.py, fix_campo_fields.py) chamam
+refresh_summaries() depois de gravar, para o resumo nao ficar velho.
+
+So os locais cujas quadras mudaram sao gravados: o hash do resumo calculado
+e comparado com o sourceHash ja gravado, e rodar de novo sem mudancas nao
+escreve nada. Resumos de locais que nao existem mais sao apagados.
+
+Uso:
+    python scripts/venue_summaries.py                    # todos os locais
+    python scripts/venue_summaries.py --location ID      # so um local (apos editar quadras)
+    python scripts/venue_summaries.py --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+from collections import Counter, defaultdict
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+try:
+    firebase_admin.get_app()
+except:
+    cred = credentials.Certificate('scripts/serviceAccountKey.json')
+    firebase_admin.initialize_app(cred)
+
+db = firestore.client()
+
+SUMMARY_COLLECTION = 'location_summaries'
+BATCH_LIMIT = 500
+
+# Os scripts de seed gravaram as quadras com nomes de campo diferentes
+LOCATION_KEYS = ['location_id', 'locationId']
+PRICE_KEYS = ['hourly_price', 'hourlyPrice', 'price']
+COVERED_KEYS = ['is_covered', 'isCovered']
+ACTIVE_KEYS = ['is_active', 'isActive']
+FIELD_PROJECTION = ['type'] + LOCATION_KEYS + PRICE_KEYS + COVERED_KEYS + ACTIVE_KEYS
+
+
+def first_value(data, keys):
+    for key in keys:
+        if data.get(key) is not None:
+            return data[key]
+    return None
+
+
+def summarize(fields):
+    """Resumo de uma lista de quadras (dicts); o mesmo conteudo gera sempre o mesmo hash"""
+    prices = [float(price) for price in (first_value(f, PRICE_KEYS) for f in fields)
+              if isinstance(price, (int, float))]
+    covered = sum(1 for f in fields if first_value(f, COVERED_KEYS))
+    summary = {
+        'fieldCount': len(fields),
+        'fieldsByType': dict(sorted(Counter(f.get('type') or 'UNKNOWN' for f in fields).items())),
+        'minPrice': min(prices) if prices else None,
+        'maxPrice': max(prices) if prices else None,
+        'coveredCount': covered,
+        'uncoveredCount': len(fields) - covered,
+        'inactiveCount': sum(1 for f in fields if first_value(f, ACTIVE_KEYS) is False),
+    }
+    summary['sourceHash'] = hashlib.sha1(json.dumps(summary, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return summary
+
+
+def load_fields(location_id=None):
+    """Quadras agrupadas por local, numa varredura com projecao (ou so as de um local)"""
+    by_location = defaultdict(list)
+    if location_id is None:
+        queries = [db.collection('fields').select(FIELD_PROJECTION)]
+    else:
+        queries = [db.collection('fields').where(key, '==', location_id).select(FIELD_PROJECTION)
+                   for key in LOCATION_KEYS]
+
+    seen = set()
+    for query in queries:
+        for field in query.stream():
+            if field.id in seen:
+                continue
+            seen.add(field.id)
+            data = field.to_dict()
+            by_location[first_value(data, LOCATION_KEYS) or 'NO_LOCATION'].append(data)
+    return by_location
+
+
+def count_fields(location_id):
+    """Quadras de um local pela mesma regra do resumo (location_id ou locationId)"""
+    return len(load_fields(location_id).get(location_id, []))
+
+
+def refresh_summaries(location_id=None, dry_run=False):
+    """Recalcula os resumos e grava so os que mudaram; devolve (gravados, sem mudanca, apagados)"""
+    if location_id is None:
+        location_ids = {loc.id for loc in db.collection('locations').select(['name']).stream()}
+        stored = {snap.id: (snap.to_dict() or {}).get('sourceHash')
+                  for snap in db.collection(SUMMARY_COLLECTION).select(['sourceHash']).stream()}
+    else:
+        location_ids = {location_id} if db.collection('locations').document(location_id).get().exists else set()
+        snap = db.collection(SUMMARY_COLLECTION).document(location_id).get()
+        stored = {location_id: (snap.to_dict() or {}).get('sourceHash')} if snap.exists else {}
+
+    fields_by_location = load_fields(location_id)
+    orphans = sum(len(fields) for loc_id, fields in fields_by_location.items() if loc_id not in location_ids)
+
+    writes = []
+    unchanged = 0
+    for loc_id in sorted(location_ids):
+        summary = summarize(fields_by_location.get(loc_id, []))
+        if stored.get(loc_id) == summary['sourceHash']:
+            unchanged += 1
+            continue
+        summary['updatedAt'] = firestore.SERVER_TIMESTAMP
+        writes.append((loc_id, summary))
+    deletes = sorted(set(stored) - location_ids)
+
+    ops = [('set', loc_id, summary) for loc_id, summary in writes] + [('delete', loc_id, None) for loc_id in deletes]
+    if not dry_run:
+        for i in range(0, len(ops), BATCH_LIMIT):
+            batch = db.batch()
+            for op, loc_id, summary in ops[i:i + BATCH_LIMIT]:
+                ref = db.collection(SUMMARY_COLLECTION).document(loc_id)
+                if op == 'set':
+                    batch.set(ref, summary)
+                else:
+                    batch.delete(ref)
+            batch.commit()
+
+    print(f"Locais: {len(location_ids)}")
+    print(f"Resumos gravados: {len(writes)}")
+    print(f"Resumos sem mudanca: {unchanged}")
+    print(f"Resumos apagados (local removido): {len(deletes)}")
+    if orphans:
+        print(f"! Quadras sem local existente: {orphans}")
+    return writes, unchanged, deletes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Materializa o resumo das quadras de cada local')
+    parser.add_argument('--location', metavar='ID', help='Recalcula so este local')
+    parser.add_argument('--dry-run', action='store_true', help='Mostra o que seria gravado sem gravar')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("RESUMOS DOS LOCAIS (location_summaries)")
+    print("="*60 + "\n")
+
+    if args.location and not db.collection('locations').document(args.location).get().exists:
+        print(f"ERRO: local {args.location} nao encontrado")
+        exit(1)
+
+    refresh_summaries(location_id=args.location, dry_run=args.dry_run)
+
+    if args.dry_run:
+        print("\n(dry-run: nada foi gravado)")
+
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()